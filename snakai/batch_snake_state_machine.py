@@ -0,0 +1,266 @@
+# -*- coding: utf-8 -*-
+"""batched snake game state definitions.
+hold N games in numpy arrays and move all of them in one `update_state` call.
+"""
+import collections
+import logging
+
+import numpy as np
+
+from . import snake_state_machine as ssm
+
+logger = logging.getLogger("snakai")
+
+# direction (int value) -> offset / opposite direction. NONE keeps current direction.
+_DX = np.array([-1, 1, 0, 0, 0], dtype=np.int64)
+_DY = np.array([0, 0, -1, 1, 0], dtype=np.int64)
+_OPPOSITE = np.array([ssm.Direction.RIGHT, ssm.Direction.LEFT, ssm.Direction.DOWN, ssm.Direction.UP,
+    ssm.Direction.NONE], dtype=np.int8)
+
+
+class BatchSnakeStateMachine(object):
+    """batched snake-state-machine
+    the rules are the same as `SnakeStateMachine.update_state` / `SnakeStateMachine.new_state`.
+
+    each game is kept in the i-th row of the arrays:
+    1. body: ring buffer of flat cell index (`y * w + x`), capacity = w * h.
+        head is at `head_ptr`, tail is at `head_ptr - length + 1` (mod capacity).
+    2. occupancy: body count of each cell.
+    3. food: flat cell index of the food.
+    4. direction / status / score / steps / remaining_steps: same as the scalar state machine.
+
+    difference to the scalar state machine:
+    - the head collided on the edge is not pushed into the body.
+    - with `auto_reset`, the ended games are re-initialized at the end of `update_state`,
+      their terminal status, score and steps are kept in `done_status`, `done_score`, `done_steps`.
+    """
+    InnerStatus = ssm.SnakeStateMachine.InnerStatus
+    SNAKE_LENGTH = 3
+
+    def __init__(self, batch_size, width, height, auto_reset=True, seed=None):
+        """init
+        """
+        self._n = batch_size
+        self._w = width
+        self._h = height
+        self._cell_num = width * height
+        self._auto_reset = auto_reset
+        self._rng = np.random.default_rng(seed)
+
+        self.body = np.zeros((batch_size, self._cell_num), dtype=np.int32)
+        self.occupancy = np.zeros((batch_size, self._cell_num), dtype=np.uint8)
+        self.head_ptr = np.zeros(batch_size, dtype=np.int64)
+        self.length = np.zeros(batch_size, dtype=np.int64)
+        self.food = np.zeros(batch_size, dtype=np.int64)
+        self.direction = np.full(batch_size, ssm.Direction.NONE, dtype=np.int8)
+        self.status = np.full(batch_size, self.InnerStatus.UN_INIT, dtype=np.int8)
+        self.score = np.zeros(batch_size, dtype=np.int64)
+        self.steps = np.zeros(batch_size, dtype=np.int64)
+        self.remaining_steps = np.zeros(batch_size, dtype=np.int64)
+
+        self.done_status = np.full(batch_size, self.InnerStatus.UN_INIT, dtype=np.int8)
+        self.done_score = np.zeros(batch_size, dtype=np.int64)
+        self.done_steps = np.zeros(batch_size, dtype=np.int64)
+
+    def new_state(self, mask=None):
+        """init games.
+        mask: bool array, only init the games where mask is True. None means all games.
+        """
+        if mask is None:
+            idx = np.arange(self._n)
+        else:
+            idx = np.nonzero(mask)[0]
+        k = len(idx)
+        if k == 0:
+            return
+        rng = self._rng
+        w = self._w
+        L = self.SNAKE_LENGTH
+        # left space for snake body
+        head_x = rng.integers(L + 1, self._w - L - 1, size=k)
+        head_y = rng.integers(L + 1, self._h - L - 1, size=k)
+        # food should not be in the same x and y with snake head.
+        food_x = rng.integers(0, self._w, size=k)
+        food_y = rng.integers(0, self._h, size=k)
+        while True:
+            bad = (food_x == head_x) | (food_y == head_y)
+            bad_num = np.count_nonzero(bad)
+            if not bad_num:
+                break
+            food_x[bad] = rng.integers(0, self._w, size=bad_num)
+            food_y[bad] = rng.integers(0, self._h, size=bad_num)
+        # should head for the food in the initialization.
+        is_right = head_x <= food_x
+        direction = np.where(is_right, ssm.Direction.RIGHT, ssm.Direction.LEFT)
+        tail_x_offset = np.where(is_right, -1, 1)
+
+        self.occupancy[idx] = 0
+        # ring buffer: tail in 0, head in L - 1
+        for i in range(L):
+            cell = head_y * w + head_x + tail_x_offset * (L - 1 - i)
+            self.body[idx, i] = cell
+            self.occupancy[idx, cell] += 1
+        self.head_ptr[idx] = L - 1
+        self.length[idx] = L
+        self.food[idx] = food_y * w + food_x
+        self.direction[idx] = direction
+        self.score[idx] = 0
+        self.steps[idx] = 0
+        self.remaining_steps[idx] = ssm.calc_max_remaining_steps(self._w, self._h, L)
+        self.status[idx] = self.InnerStatus.RUNNING
+
+    def update_state(self, directions) -> np.ndarray:
+        """move every running game by one step.
+        Parameters
+        ------------
+        directions: int array with shape (batch_size,), the `Direction` value of each game.
+
+        Returns
+        ---------
+        bool array
+            whether each game is ok after this step.
+        """
+        directions = np.asarray(directions, dtype=np.int8)
+        is_ok = np.zeros(self._n, dtype=bool)
+        idx = np.nonzero(self.status == self.InnerStatus.RUNNING)[0]
+        if len(idx) == 0:
+            return is_ok
+        w = self._w
+        cap = self._cell_num
+
+        self.steps[idx] += 1
+        self.remaining_steps[idx] -= 1
+        # update direction: ignore NONE and the opposite direction
+        cur_d = self.direction[idx]
+        d = directions[idx]
+        d = np.where((d != ssm.Direction.NONE) & (d != _OPPOSITE[cur_d]), d, cur_d)
+        self.direction[idx] = d
+
+        head = self.body[idx, self.head_ptr[idx]]
+        new_x = head % w + _DX[d]
+        new_y = head // w + _DY[d]
+        collide_wall = (new_x < 0) | (new_x >= w) | (new_y < 0) | (new_y >= self._h)
+        new_head = np.where(collide_wall, 0, new_y * w + new_x)
+        # tail is not removed yet, so collide on current tail is also a collision
+        collide_body = ~collide_wall & (self.occupancy[idx, new_head] > 0)
+        is_fail = collide_wall | collide_body | (self.remaining_steps[idx] <= 0)
+
+        # add head (except collided on the edge)
+        push_idx = idx[~collide_wall]
+        push_head = new_head[~collide_wall]
+        self.head_ptr[push_idx] = (self.head_ptr[push_idx] + 1) % cap
+        self.body[push_idx, self.head_ptr[push_idx]] = push_head
+        self.occupancy[push_idx, push_head] += 1
+        self.length[push_idx] += 1
+        self.status[idx[is_fail]] = self.InnerStatus.FAIL
+
+        has_eaten = ~is_fail & (new_head == self.food[idx])
+        eat_idx = idx[has_eaten]
+        if len(eat_idx):
+            self.score[eat_idx] += 1
+            self.remaining_steps[eat_idx] = ssm.calc_max_remaining_steps(self._w, self._h,
+                self.length[eat_idx])
+            has_succeeded = self.length[eat_idx] == cap
+            self.status[eat_idx[has_succeeded]] = self.InnerStatus.SUCCESS
+            self._update_food(eat_idx[~has_succeeded])
+        # remove tail to make a moving illusion
+        move_idx = idx[~is_fail & ~has_eaten]
+        tail = self.body[move_idx, (self.head_ptr[move_idx] - self.length[move_idx] + 1) % cap]
+        self.occupancy[move_idx, tail] -= 1
+        self.length[move_idx] -= 1
+
+        is_ok[idx] = self.status[idx] == self.InnerStatus.RUNNING
+        ended_idx = idx[~is_ok[idx]]
+        self.done_status[ended_idx] = self.status[ended_idx]
+        self.done_score[ended_idx] = self.score[ended_idx]
+        self.done_steps[ended_idx] = self.steps[ended_idx]
+        if self._auto_reset and len(ended_idx):
+            ended_mask = np.zeros(self._n, dtype=bool)
+            ended_mask[ended_idx] = True
+            self.new_state(ended_mask)
+        return is_ok
+
+    def heads(self) -> np.ndarray:
+        """flat cell index of every head"""
+        return self.body[np.arange(self._n), self.head_ptr]
+
+    def dist_features(self) -> np.ndarray:
+        """distances of every game, the same as `DistanceCalc` on the scalar state.
+        Returns
+        ---------
+        int array with shape (batch_size, 6), each row is
+            [barrier up, barrier down, barrier left, barrier right, food x with sign, food y with sign]
+            the barrier distance is -1 if it's the opposite of current direction.
+        """
+        (w, h) = (self._w, self._h)
+        rows = np.arange(self._n)
+        head = self.heads()
+        (head_y, head_x) = np.divmod(head, w)
+        occupied = self.occupancy.reshape(self._n, h, w) > 0
+        ys = np.arange(h)
+        col = occupied[rows, :, head_x]
+        up_y = np.where(col & (ys < head_y[:, None]), ys, -1).max(axis=1)
+        down_y = np.where(col & (ys > head_y[:, None]), ys, h).min(axis=1)
+        xs = np.arange(w)
+        row = occupied[rows, head_y, :]
+        left_x = np.where(row & (xs < head_x[:, None]), xs, -1).max(axis=1)
+        right_x = np.where(row & (xs > head_x[:, None]), xs, w).min(axis=1)
+
+        features = np.empty((self._n, 6), dtype=np.int64)
+        # no body => distance to edge
+        features[:, 0] = np.where(up_y >= 0, head_y - up_y, head_y)
+        features[:, 1] = down_y - head_y
+        features[:, 2] = np.where(left_x >= 0, head_x - left_x, head_x)
+        features[:, 3] = right_x - head_x
+        d = self.direction
+        features[d == ssm.Direction.DOWN, 0] = -1
+        features[d == ssm.Direction.UP, 1] = -1
+        features[d == ssm.Direction.RIGHT, 2] = -1
+        features[d == ssm.Direction.LEFT, 3] = -1
+        (food_y, food_x) = np.divmod(self.food, w)
+        features[:, 4] = head_x - food_x
+        features[:, 5] = head_y - food_y
+        return features
+
+    def to_state_machine(self, i) -> ssm.SnakeStateMachine:
+        """export the i-th game to a scalar state machine, for rendering or debugging.
+        """
+        state = ssm.SnakeStateMachine(self._w, self._h)
+        cells = self.body[i, (self.head_ptr[i] - np.arange(self.length[i])) % self._cell_num]
+        state.snake = collections.deque(_cell2point(c, self._w) for c in cells)
+        state.food = _cell2point(self.food[i], self._w)
+        state.direction = ssm.Direction(int(self.direction[i]))
+        state.score = int(self.score[i])
+        state.steps = int(self.steps[i])
+        state.remaining_steps = int(self.remaining_steps[i])
+        state._status = int(self.status[i])
+        return state
+
+    @property
+    def batch_size(self):
+        """get batch size"""
+        return self._n
+
+    @property
+    def state_width(self):
+        """get width"""
+        return self._w
+
+    @property
+    def state_height(self):
+        """get height"""
+        return self._h
+
+    def _update_food(self, idx):
+        """choose food uniformly from the free cells of each game in `idx`.
+        """
+        if len(idx) == 0:
+            return
+        is_free = self.occupancy[idx] == 0
+        free_cnt = is_free.sum(axis=1)
+        nth = self._rng.integers(0, free_cnt)
+        self.food[idx] = (np.cumsum(is_free, axis=1) > nth[:, None]).argmax(axis=1)
+
+
+def _cell2point(cell, width) -> ssm.Point:
+    return ssm.Point(int(cell % width), int(cell // width))
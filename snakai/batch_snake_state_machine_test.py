@@ -0,0 +1,55 @@
+# -*- coding: utf8 -*-
+"""test (pytest)
+"""
+import numpy as np
+
+from . import snake_state_machine as ssm
+from . import batch_snake_state_machine as bssm
+
+
+def _assert_same_game(batch_state, i, state):
+    exported = batch_state.to_state_machine(i)
+    assert list(exported.snake) == list(state.snake)
+    assert exported.food == state.food
+    assert exported.direction == state.direction
+    assert exported.score == state.score
+    assert exported.steps == state.steps
+    assert exported.remaining_steps == state.remaining_steps
+
+
+def test_batch_rules_same_as_scalar():
+    batch_size = 32
+    batch_state = bssm.BatchSnakeStateMachine(batch_size, width=12, height=10, seed=1234)
+    batch_state.new_state()
+    states = [batch_state.to_state_machine(i) for i in range(batch_size)]
+    rng = np.random.default_rng(4321)
+    ended_games = 0
+    for _ in range(200):
+        # direction NONE is also included
+        directions = rng.integers(0, 5, size=batch_size)
+        is_ok = batch_state.update_state(directions)
+        for (i, state) in enumerate(states):
+            scalar_ok = state.update_state(ssm.Direction(int(directions[i])))
+            assert scalar_ok == is_ok[i]
+            if not scalar_ok:
+                ended_games += 1
+                assert batch_state.done_status[i] == state._status
+                assert batch_state.done_score[i] == state.score
+                assert batch_state.done_steps[i] == state.steps
+                # auto reset
+                states[i] = batch_state.to_state_machine(i)
+                continue
+            # food is drawn from a different rng
+            state.food = batch_state.to_state_machine(i).food
+            _assert_same_game(batch_state, i, state)
+    assert ended_games > 0
+
+
+def test_batch_food_not_in_body():
+    batch_state = bssm.BatchSnakeStateMachine(32, width=10, height=9, seed=1)
+    batch_state.new_state()
+    rng = np.random.default_rng(1)
+    for _ in range(200):
+        batch_state.update_state(rng.integers(0, 4, size=32))
+        assert np.all(batch_state.occupancy[np.arange(32), batch_state.food] == 0)
+        assert np.all(batch_state.occupancy.sum(axis=1) == batch_state.length)
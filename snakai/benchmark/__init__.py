@@ -0,0 +1,4 @@
+# -*- coding: utf-8 -*-
+"""benchmarks. 
+every module is runnable by `python -m snakai.benchmark.<module>`
+"""
@@ -0,0 +1,71 @@
+#!python3
+# -*- coding: utf-8 -*-
+"""benchmark the per-move cost of the A* strategy, with and without the cached path reuse.
+
+each case plays seeded games until `moves` moves, and reports the average cost per move,
+the number of A* searches and the average cost per search (`AStar._plan`).
+"""
+import argparse
+import time
+
+from snakai import snake_state_machine as ssm
+from snakai.strategy import astar
+from snakai.strategy import base
+
+
+def run_case(width, height, moves, seed, reuse_path) -> dict:
+    """play until `moves` moves"""
+    strategy = astar.AStar(reuse_path=reuse_path)
+    raw_plan = strategy._plan
+    plan_seconds = [0.]
+
+    def _timed_plan(game_state):
+        start = time.perf_counter()
+        next_cell = raw_plan(game_state)
+        plan_seconds[0] += time.perf_counter() - start
+        return next_cell
+
+    strategy._plan = _timed_plan
+    state = ssm.SnakeStateMachine(width, height, seed=seed)
+    (move_cnt, plan_cnt, scores, seconds) = (0, 0, [], 0.)
+    while move_cnt < moves:
+        state.new_state()
+        while state.is_state_ok() and move_cnt < moves:
+            search_cnt = strategy.search_cnt
+            start = time.perf_counter()
+            action = strategy.gen_next_action(state, None)
+            seconds += time.perf_counter() - start
+            plan_cnt += strategy.search_cnt != search_cnt
+            state.update_state(ssm.Direction.NONE if action == base.Action.IDLE else action.to_direction())
+            move_cnt += 1
+        strategy.clear4next(state)
+        scores.append(state.score)
+    return {
+        "moves": move_cnt,
+        "plans": plan_cnt,
+        "searches": strategy.search_cnt,
+        "us_per_move": seconds / move_cnt * 1e6,
+        "us_per_plan": plan_seconds[0] / max(plan_cnt, 1) * 1e6,
+        "max_score": max(scores),
+    }
+
+
+def main():
+    """run benchmark"""
+    parser = argparse.ArgumentParser(description="benchmark A* path reuse")
+    parser.add_argument("--width", type=int, default=200)
+    parser.add_argument("--height", type=int, default=200)
+    parser.add_argument("--moves", type=int, default=5000, help="moves of each case")
+    parser.add_argument("--seed", type=int, default=1234)
+    args = parser.parse_args()
+
+    print(f"board {args.width}x{args.height}, {args.moves} moves")
+    print(f"{'reuse':>6} {'plans':>7} {'searches':>9} {'us/move':>9} {'us/plan':>9} {'max score':>10}")
+    for reuse_path in (True, False):
+        r = run_case(args.width, args.height, args.moves, args.seed, reuse_path)
+        print(f"{str(reuse_path):>6} {r['plans']:>7} {r['searches']:>9} {r['us_per_move']:>9.1f} "
+            f"{r['us_per_plan']:>9.1f} {r['max_score']:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+#!python3
+# -*- coding: utf-8 -*-
+"""benchmark food spawning cost along with the snake filling ratio.
+
+the free-cell index should keep the cost flat, while the legacy rejection sampling
+grows dramatically when the snake occupies almost all space.
+"""
+import argparse
+import collections
+import random
+import timeit
+
+from snakai import snake_state_machine as ssm
+
+
+FILL_RATIOS = [0.1, 0.3, 0.5, 0.7, 0.9, 0.95, 0.99]
+
+
+def build_state(width, height, fill_ratio):
+    """build a state whose snake occupies `fill_ratio` of the board (in zigzag shape)
+    """
+    zigzag = []
+    for y in range(height):
+        xs = range(width) if y % 2 == 0 else range(width - 1, -1, -1)
+        zigzag.extend(ssm.Point(x, y) for x in xs)
+    body_len = max(1, int(width * height * fill_ratio))
+    state = ssm.SnakeStateMachine(width, height)
+    # head is the last point of the zigzag path
+    state.snake = collections.deque(reversed(zigzag[:body_len]))
+    return state
+
+
+def legacy_spawn_food(width, height, snake: collections.deque, rng):
+    """the previous rejection sampling impl, only for comparison.
+    snake: a plain deque of the body points (as the legacy state kept), so every retry scans it.
+    """
+    while True:
+        new_food = ssm.Point(rng.randrange(0, width), rng.randrange(0, height))
+        if new_food not in snake:
+            return new_food
+
+
+def main():
+    """run benchmark"""
+    parser = argparse.ArgumentParser(description="benchmark food spawning")
+    parser.add_argument("--width", type=int, default=60)
+    parser.add_argument("--height", type=int, default=20)
+    parser.add_argument("--number", type=int, default=2000, help="spawn times for each fill ratio")
+    parser.add_argument("--skip_legacy", action="store_true", help="skip the legacy rejection sampling")
+    args = parser.parse_args()
+
+    print(f"board {args.width}x{args.height}, {args.number} spawns per ratio, cost in us/spawn")
+    print(f"{'fill-ratio':>10} {'free-cell':>10} {'legacy':>10}")
+    for ratio in FILL_RATIOS:
+        state = build_state(args.width, args.height, ratio)
+        cost = timeit.timeit(state._spawn_food, number=args.number) / args.number * 1e6
+        if args.skip_legacy:
+            legacy_cost_str = "-"
+        else:
+            rng = random.Random(1234)
+            snake = collections.deque(state.snake)
+            legacy_cost = timeit.timeit(lambda: legacy_spawn_food(args.width, args.height, snake, rng),
+                number=args.number) / args.number * 1e6
+            legacy_cost_str = f"{legacy_cost:.2f}"
+        print(f"{ratio:>10.0%} {cost:>10.2f} {legacy_cost_str:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+#!python3
+# -*- coding: utf-8 -*-
+"""benchmark the startup cost of listing strategy names (what `run.py` does for argparse).
+
+each case runs in a fresh interpreter:
+    lazy:  import the strategy registry and get the names
+    eager: also import every strategy module, which is what the registry did before
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+_CASES = {
+    "lazy": "import snakai.strategy as s; s.get_names()",
+    "eager": ("import snakai.strategy as s; names = s.get_names(); "
+        "[s.get_strategy_cls(n) for n in names]"),
+}
+_CHECK_NUMPY = "; import sys; print('numpy' in sys.modules)"
+
+
+def run_case(code, repeat):
+    """wall time (seconds) of each run"""
+    costs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], check=True)
+        costs.append(time.perf_counter() - start)
+    return costs
+
+
+def main():
+    """run benchmark"""
+    parser = argparse.ArgumentParser(description="benchmark strategy registry import time")
+    parser.add_argument("--repeat", type=int, default=10, help="runs of each case")
+    args = parser.parse_args()
+
+    baseline = statistics.median(run_case("pass", args.repeat))
+    print(f"interpreter startup: {baseline * 1000:.1f} ms (subtracted below), {args.repeat} runs per case")
+    print(f"{'case':>8} {'median(ms)':>12} {'numpy-loaded':>14}")
+    for (name, code) in _CASES.items():
+        cost = statistics.median(run_case(code, args.repeat)) - baseline
+        numpy_loaded = subprocess.run([sys.executable, "-c", code + _CHECK_NUMPY], check=True,
+            capture_output=True, text=True).stdout.strip()
+        print(f"{name:>8} {cost * 1000:>12.1f} {numpy_loaded:>14}")
+
+
+if __name__ == "__main__":
+    main()
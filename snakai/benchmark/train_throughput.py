@@ -0,0 +1,207 @@
+#!python3
+# -*- coding: utf-8 -*-
+"""benchmark Q-Learning training throughput.
+
+sweep board sizes and snake length regimes (the snake is pre-filled to `fill_ratio` of the board
+at the start of each episode, the prefilling time is excluded), report env steps/sec, episodes/sec and the time split of
+    encode (`StateEncoder.encode`, it's called inside gen_next_action / update),
+    gen_next_action, update, update_state (`SnakeStateMachine.update_state`).
+with `--fused`, the training step is `QLearningStrategy.act_and_learn` (timed as act_and_learn).
+everything is seeded, so the results are comparable between commits.
+the results are written as json.
+"""
+import argparse
+import json
+import logging
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from snakai import snake_state_machine as ssm
+from snakai.strategy.qlearning import strategy as ql_strategy_module
+
+BOARDS = "20x20,50x50,100x100,200x200"
+FILL_RATIOS = "0,0.3,0.6"
+
+
+def build_prefill(width, height, fill_ratio):
+    """zigzag snake body occupying `fill_ratio` of the board (head at the end of the zigzag path).
+    Returns
+    ---------
+    (body_cells, direction, food_cell), None if the body is not longer than the initial snake.
+    """
+    body_len = int(width * height * fill_ratio)
+    if body_len <= 3:
+        return None
+    zigzag = []
+    for y in range(height):
+        xs = range(width) if y % 2 == 0 else range(width - 1, -1, -1)
+        zigzag.extend(y * width + x for x in xs)
+    body_cells = zigzag[:body_len][::-1]
+    # direction from neck to head
+    (head_y, head_x) = divmod(body_cells[0], width)
+    (neck_y, neck_x) = divmod(body_cells[1], width)
+    if head_y != neck_y:
+        direction = ssm.Direction.DOWN
+    else:
+        direction = ssm.Direction.RIGHT if head_x > neck_x else ssm.Direction.LEFT
+    # food at the end of the zigzag path, far from the body
+    return (body_cells, direction, zigzag[-1])
+
+
+def new_game(state: ssm.SnakeStateMachine, prefill):
+    """start a new game, then replace the snake with the prefilled body"""
+    state.new_state()
+    if prefill is None:
+        return
+    (body_cells, direction, food_cell) = prefill
+    (_, _, _, _, _, _, _, rng_state) = state.export_frame()
+    remaining_steps = ssm.calc_max_remaining_steps(state.state_width, state.state_height, len(body_cells))
+    state.load_frame((0, 0, remaining_steps, int(direction), ssm.SnakeStateMachine.InnerStatus.RUNNING,
+        food_cell, body_cells, rng_state))
+
+
+def run_case(width, height, fill_ratio, step_num, seed, fused=False) -> dict:
+    """train until `step_num` env steps"""
+    train_args = argparse.Namespace(learning_rate=0.1, discount=0.9, init_exploration_rate=0.1,
+        exploration_decay_iter=10 ** 9, seed=seed, replay_capacity=0, replay_batch_size=0, replay_interval=0,
+        qtable_backend="dense")
+    ql_strategy = ql_strategy_module.QLearningStrategy(is_infer=False, train_args=train_args, infer_args=None)
+    state = ssm.SnakeStateMachine(width, height, seed=seed)
+
+    if fused:
+        timers = {"encode": 0., "act_and_learn": 0., "update_state": 0.}
+    else:
+        timers = {"encode": 0., "gen_next_action": 0., "update": 0., "update_state": 0.}
+    state_encoder = ql_strategy._state_encoder
+    raw_encode = state_encoder.encode
+    perf_counter = time.perf_counter
+
+    def _timed_encode(game_state):
+        start = perf_counter()
+        state_id = raw_encode(game_state)
+        timers["encode"] += perf_counter() - start
+        return state_id
+
+    state_encoder.encode = _timed_encode
+    prefill = build_prefill(width, height, fill_ratio)
+    (steps, episodes) = (0, 0)
+    # game initialization (prefilling) is not counted in the throughput
+    reset_seconds = 0.
+    start_time = perf_counter()
+    while steps < step_num:
+        reset_start = perf_counter()
+        new_game(state, prefill)
+        reset_seconds += perf_counter() - reset_start
+        if fused:
+            steps += _run_fused_episode(ql_strategy, state, step_num - steps, timers)
+            episodes += 1
+            continue
+        while state.is_state_ok() and steps < step_num:
+            t0 = perf_counter()
+            action = ql_strategy.gen_next_action(state, None)
+            t1 = perf_counter()
+            state.update_state(action.to_direction())
+            t2 = perf_counter()
+            ql_strategy.update(state)
+            t3 = perf_counter()
+            timers["gen_next_action"] += t1 - t0
+            timers["update_state"] += t2 - t1
+            timers["update"] += t3 - t2
+            steps += 1
+        ql_strategy.clear4next(state)
+        episodes += 1
+    seconds = perf_counter() - start_time - reset_seconds
+    return {
+        "board": f"{width}x{height}",
+        "fused": fused,
+        "fill_ratio": fill_ratio,
+        "steps": steps,
+        "episodes": episodes,
+        "seconds": seconds,
+        "reset_seconds": reset_seconds,
+        "steps_per_sec": steps / seconds,
+        "episodes_per_sec": episodes / seconds,
+        "time_split": {name: {"seconds": t, "ratio": t / seconds} for (name, t) in timers.items()},
+    }
+
+
+def _run_fused_episode(ql_strategy, state, max_steps, timers) -> int:
+    perf_counter = time.perf_counter
+    steps = 0
+    t0 = perf_counter()
+    d = ql_strategy.act_and_learn(state)
+    t1 = perf_counter()
+    timers["act_and_learn"] += t1 - t0
+    while d is not None and steps < max_steps:
+        state.update_state(d)
+        t2 = perf_counter()
+        d = ql_strategy.act_and_learn(state)
+        t3 = perf_counter()
+        timers["update_state"] += t2 - t1
+        timers["act_and_learn"] += t3 - t2
+        t1 = t3
+        steps += 1
+    ql_strategy.clear4next(state)
+    return steps
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+            check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    """run benchmark"""
+    parser = argparse.ArgumentParser(description="benchmark q-learning training throughput")
+    parser.add_argument("--boards", default=BOARDS, help="comma separated board sizes, WxH")
+    parser.add_argument("--fill_ratios", default=FILL_RATIOS,
+        help="comma separated snake fill ratios at the start of each episode")
+    parser.add_argument("--steps", type=int, default=20000, help="env steps of each case")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--fused", action="store_true", help="train by the fused `act_and_learn` step")
+    parser.add_argument("--output", "-o", help="json output path, default is stdout")
+    args = parser.parse_args()
+    # benchmark should not be affected by debug logging
+    logging.getLogger("snakai").setLevel(logging.WARNING)
+
+    results = []
+    step_names = ["act_and_learn"] if args.fused else ["gen_next_action", "update"]
+    print(f"{'board':>9} {'fill':>5} {'steps/s':>10} {'episodes/s':>10} {'encode':>7} "
+        + " ".join(f"{name[:7]:>7}" for name in step_names) + f" {'env':>7}", file=sys.stderr)
+    for board in args.boards.split(","):
+        (width, height) = (int(v) for v in board.lower().split("x"))
+        for fill_ratio in (float(v) for v in args.fill_ratios.split(",")):
+            r = run_case(width, height, fill_ratio, args.steps, args.seed, fused=args.fused)
+            results.append(r)
+            split = r["time_split"]
+            print(f"{r['board']:>9} {fill_ratio:>5.0%} {r['steps_per_sec']:>10.0f} "
+                f"{r['episodes_per_sec']:>10.1f} "
+                f"{split['encode']['ratio']:>7.1%} "
+                + " ".join(f"{split[name]['ratio']:>7.1%}" for name in step_names)
+                + f" {split['update_state']['ratio']:>7.1%}", file=sys.stderr)
+
+    report = {
+        "benchmark": "train_throughput",
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "config": {"steps": args.steps, "seed": args.seed, "fused": args.fused},
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, mode="w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""bitboard view of the snake game board.
+
+body, food and walls are python (arbitrary-precision) int bitmasks,
+so flood fill, reachable-area counting and ray casts can be done by shift-and-mask
+on the whole board instead of per-cell python loops.
+
+layout: row-major, bit of (x, y) = y * stride + x, with stride = w + 1.
+the extra bit in each row is a guard (wall) bit, so shifting left/right never wraps to the next row.
+a column-major (transposed) body mask is also kept for the up/down ray casts.
+"""
+
+from . import snake_state_machine as ssm
+
+
+def _popcount(v: int) -> int:
+    return bin(v).count("1")
+
+
+class Bitboard(object):
+    """bitboard of a board with size (width, height)
+    """
+    def __init__(self, width, height):
+        self._w = width
+        self._h = height
+        self._stride = width + 1
+        self._t_stride = height + 1
+        self._row_mask = (1 << width) - 1
+        self._col_mask = (1 << height) - 1
+        board = 0
+        for y in range(height):
+            board |= self._row_mask << (y * self._stride)
+        # in-board cells
+        self.board = board
+        # guard bits of each row and the rows out of board, i.e. everything not in board
+        self.walls = ((1 << (height * self._stride)) - 1) & ~board
+        self.body = 0
+        self.food = 0
+        self._body_t = 0
+
+    def cell2bit(self, cell: int) -> int:
+        """board cell (`y * w + x`) -> bit index"""
+        (y, x) = divmod(cell, self._w)
+        return y * self._stride + x
+
+    def bit2cell(self, bit: int) -> int:
+        """bit index -> board cell"""
+        (y, x) = divmod(bit, self._stride)
+        return y * self._w + x
+
+    def add_body(self, cell: int):
+        """set body bit"""
+        (y, x) = divmod(cell, self._w)
+        self.body |= 1 << (y * self._stride + x)
+        self._body_t |= 1 << (x * self._t_stride + y)
+
+    def remove_body(self, cell: int):
+        """clear body bit"""
+        (y, x) = divmod(cell, self._w)
+        self.body &= ~(1 << (y * self._stride + x))
+        self._body_t &= ~(1 << (x * self._t_stride + y))
+
+    def set_food(self, cell: int):
+        """set the food (only one food)"""
+        self.food = 1 << self.cell2bit(cell)
+
+    def free(self) -> int:
+        """free cells mask"""
+        return self.board & ~self.body
+
+    def flood_fill(self, cell: int, free: int = None) -> int:
+        """mask of the free cells reachable from cell (cell itself is not included).
+        free: the passable mask, default is `free()`
+        """
+        if free is None:
+            free = self.board & ~self.body
+        stride = self._stride
+        start = 1 << self.cell2bit(cell)
+        reach = start
+        while True:
+            grown = ((reach << 1) | (reach >> 1) | (reach << stride) | (reach >> stride) | reach) & free
+            grown |= start
+            if grown == reach:
+                break
+            reach = grown
+        return reach & ~start
+
+    def reachable_area(self, cell: int, free: int = None) -> int:
+        """count of the free cells reachable from cell"""
+        return _popcount(self.flood_fill(cell, free))
+
+    def ray_free_steps(self, cell: int, d: ssm.Direction) -> int:
+        """free steps from cell towards direction d before hitting the body or the wall
+        """
+        (y, x) = divmod(cell, self._w)
+        if d == ssm.Direction.LEFT or d == ssm.Direction.RIGHT:
+            line = (self.body >> (y * self._stride)) & self._row_mask
+            (pos, size) = (x, self._w)
+            towards_low = d == ssm.Direction.LEFT
+        else:
+            line = (self._body_t >> (x * self._t_stride)) & self._col_mask
+            (pos, size) = (y, self._h)
+            towards_low = d == ssm.Direction.UP
+        if towards_low:
+            lower = line & ((1 << pos) - 1)
+            if not lower:
+                return pos
+            # highest set bit below pos
+            return pos - lower.bit_length()
+        upper = line >> (pos + 1)
+        if not upper:
+            return size - pos - 1
+        # lowest set bit above pos
+        return (upper & -upper).bit_length() - 1
+
+    def load_state(self, state: ssm.SnakeStateMachine):
+        """reset body and food from a state"""
+        self.body = 0
+        self._body_t = 0
+        self.food = 0
+        for cell in state.body_cells():
+            self.add_body(cell)
+        if state.food_cell >= 0:
+            self.set_food(state.food_cell)
+
+    @classmethod
+    def from_state(cls, state: ssm.SnakeStateMachine) -> 'Bitboard':
+        """build from a state"""
+        bitboard = cls(state.state_width, state.state_height)
+        bitboard.load_state(state)
+        return bitboard
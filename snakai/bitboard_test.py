@@ -0,0 +1,54 @@
+# -*- coding: utf8 -*-
+"""test (pytest)
+"""
+import collections
+import random
+
+from . import snake_state_machine as ssm
+
+
+def _bfs_area(state, cell):
+    w = state.state_width
+    neighbors = state.neighbors
+    visited = {cell}
+    queue = collections.deque([cell])
+    while queue:
+        c = queue.popleft()
+        for d in range(4):
+            n = neighbors[c * 4 + d]
+            if n >= 0 and n not in visited and not state.is_cell_collide2snake(n):
+                visited.add(n)
+                queue.append(n)
+    return len(visited) - 1
+
+
+def _naive_ray(state, cell, d):
+    p = state.cell2point(cell)
+    steps = 0
+    while True:
+        p = ssm.gen_next_step_point(p, d)
+        if not (0 <= p.x < state.state_width and 0 <= p.y < state.state_height) or p in state.snake:
+            return steps
+        steps += 1
+
+
+def test_bitboard():
+    state = ssm.SnakeStateMachine(width=11, height=9, seed=1)
+    bitboard = state.enable_bitboard()
+    rng = random.Random(1)
+    for _ in range(10):
+        state.new_state()
+        while state.is_state_ok():
+            token = state.snapshot()
+            for _ in range(3):
+                state.update_state(rng.choice(list(ssm.Direction)))
+            state.restore(token)
+            state.update_state(rng.choice(list(ssm.Direction)))
+            if not state.is_state_ok():
+                break
+            expected = bitboard.from_state(state)
+            assert (bitboard.body, bitboard.food) == (expected.body, expected.food)
+            head = state.head_cell
+            assert bitboard.reachable_area(head) == _bfs_area(state, head)
+            for d in ssm.DirectionUtil.get_effective():
+                assert bitboard.ray_free_steps(head, d) == _naive_ray(state, head, d)
@@ -17,23 +17,28 @@ class CursesSnakeGameExe(object):
     # use the same direction key to speed up snake running
     SPEED_UP_RATIO = 5
 
-    def __init__(self, win_width=60, win_height=20, speed="normal"):
+    def __init__(self, win_width=60, win_height=20, speed="normal", seed=None):
         self._frame_seconds = self._speed2frame_seconds(speed)
-        self._game_state = snake_state_machine.SnakeStateMachine(win_width, win_height)
+        self._game_state = snake_state_machine.SnakeStateMachine(win_width, win_height, seed=seed)
         self._ui = SnakeUIFramework(win_width, win_height)
         self._state_render = SnakeStateRender(self._ui)
 
-    def run(self, strategy):
+    def run(self, strategy, recorder=None):
         """run game
         strategy: strategy.Strategy
+        recorder: game_record.GameRecorder, record the game if not None
         """
         with self._ui.active_env():
             self._ui.init_window()
             # init
             self._game_state.new_state()
             self._state_render.render_init_state(self._game_state)
+            if recorder:
+                recorder.begin(self._game_state)
             # exe continues
-            self._exe_game(strategy)
+            self._exe_game(strategy, recorder)
+            if recorder:
+                recorder.end()
 
         self._print_result()
 
@@ -49,7 +54,7 @@ class CursesSnakeGameExe(object):
         """
         return self._frame_seconds
 
-    def _exe_game(self, strategy):
+    def _exe_game(self, strategy, recorder):
         """execute game (while loop)
         """
         _A = base_strategy.Action
@@ -82,6 +87,8 @@ class CursesSnakeGameExe(object):
 
             # update state
             is_ok = self._game_state.update_state(direction)
+            if recorder:
+                recorder.record(self._game_state)
             if not is_ok:
                 break
             # update ui render
@@ -93,6 +100,7 @@ class CursesSnakeGameExe(object):
             print("Congratulations! You Succeed! Score = {}".format(self._game_state.score))
         else:
             print("Game Over. Score = {} in steps {}".format(self._game_state.score, self._game_state.steps))
+        print("Game seed = {}".format(self._game_state.game_seed))
 
     def _speed2frame_seconds(self, speed_str):
         """speed to frame time"""
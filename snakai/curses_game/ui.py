@@ -5,7 +5,7 @@ import contextlib
 import curses
 import itertools
 
-from snakai.snake_state_machine import Direction
+from snakai.snake_state_machine import Direction, StepOutcome
 
 class SnakeUIFramework(object):
     """ui framework for curses sname game
@@ -124,8 +124,6 @@ class SnakeStateRender(object):
 
     def __init__(self, ui_framework: 'SnakeUIFramework'):
         self._ui = ui_framework
-        self._previours_score = None
-        self._previours_tail = None
 
     def render_init_state(self, game_state):
         """render initial game state"""
@@ -137,9 +135,6 @@ class SnakeStateRender(object):
         # score and remaining steps
         self._ui.set_score(game_state.score)
         self._ui.set_remaining_steps(game_state.remaining_steps)
-        # record state key information for updating render
-        self._previours_score = game_state.score
-        self._previours_tail = game_state.snake[-1]
 
     def render_updated_state(self, game_state):
         """render updated state"""
@@ -148,18 +143,16 @@ class SnakeStateRender(object):
         # draw ui
         self._ui.set_remaining_steps(game_state.remaining_steps)
         self._render_snake_head(game_state)
-        new_score = gs.score
-        has_eat_food = new_score > self._previours_score
-        if not has_eat_food:
-            # => food hadn't been eatten => erase tail
-            ui.erase_point(self._previours_tail)
-        else:
+        outcome = gs.last_outcome
+        if outcome == StepOutcome.ATE:
             # => new food(no need to erase previous food), new score
             ui.draw_point(gs.food, self.FOOD_CH)
-            ui.set_score(new_score)
-        # update key information
-        self._previours_score = new_score
-        self._previours_tail = game_state.snake[-1]
+            ui.set_score(gs.score)
+        elif outcome == StepOutcome.SUCCEEDED:
+            ui.set_score(gs.score)
+        elif gs.last_removed_tail is not None:
+            # => food hadn't been eatten => erase tail
+            ui.erase_point(gs.last_removed_tail)
 
     def _render_snake_body(self, game_state):
         for p in itertools.islice(game_state.snake, 1):
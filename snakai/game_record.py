@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+"""compact binary game recording and replay.
+
+a game is fully determined by its game seed and the directions of each step, so we record
+    seed + board size + 2-bit-per-step direction stream.
+to seek to any step without re-simulating from step 0, the full state is also saved as a keyframe
+every `keyframe_interval` steps.
+
+file layout (little endian):
+    file header: magic(4s) version(B) width(H) height(H) keyframe_interval(I)
+    game records, each is:
+        record_size(I): byte size of the following game payload
+        seed(Q) step_num(I) keyframe_num(I)
+        keyframe offsets(I * keyframe_num): relative to the game payload start
+        directions: ceil(step_num / 4) bytes, 2 bits per step, low bits first
+        keyframes, each is:
+            steps(I) score(I) remaining_steps(i) direction(B) status(B) food_cell(I)
+            body_len(I) body_cells(I * body_len) rng_state(I * 625)
+"""
+import bisect
+import logging
+import mmap
+import struct
+
+from . import snake_state_machine as ssm
+
+logger = logging.getLogger("snakai")
+
+_MAGIC = b"SNKR"
+_VERSION = 1
+_FILE_HEADER = struct.Struct("<4sBHHI")
+_RECORD_SIZE = struct.Struct("<I")
+_GAME_HEADER = struct.Struct("<QII")
+_KEYFRAME_HEADER = struct.Struct("<IIiBBII")
+# python random (Mersenne Twister) state: 624 words + position
+_RNG_STATE = struct.Struct("<625I")
+_RNG_VERSION = 3
+
+
+class GameRecorder(object):
+    """record games into a binary file.
+    usage:
+        recorder.begin(state)   # after `state.new_state()`
+        recorder.record(state)  # after each `state.update_state()`
+        recorder.end()          # after game ended
+    """
+    def __init__(self, path, width, height, keyframe_interval=1024):
+        self._w = width
+        self._h = height
+        self._keyframe_interval = keyframe_interval
+        self._f = open(path, mode="wb")
+        self._f.write(_FILE_HEADER.pack(_MAGIC, _VERSION, width, height, keyframe_interval))
+        self._seed = None
+        self._directions = bytearray()
+        self._step_num = 0
+        self._keyframes = []
+
+    def begin(self, game_state: ssm.SnakeStateMachine):
+        """begin recording a new game"""
+        if (game_state.state_width, game_state.state_height) != (self._w, self._h):
+            raise ValueError("game board size is different from the recorder")
+        self._seed = game_state.game_seed
+        self._directions = bytearray()
+        self._step_num = 0
+        self._keyframes = []
+
+    def record(self, game_state: ssm.SnakeStateMachine):
+        """record the latest step.
+        the direction after updating is recorded, it is always effective and
+        leads to the same state when replaying.
+        """
+        if game_state.steps == self._step_num:
+            # state not updated (game has ended)
+            return
+        step_idx = self._step_num
+        if step_idx % 4 == 0:
+            self._directions.append(0)
+        self._directions[-1] |= int(game_state.direction) << (step_idx % 4 * 2)
+        self._step_num += 1
+        if self._step_num % self._keyframe_interval == 0 and game_state.is_state_ok():
+            self._keyframes.append(_pack_keyframe(game_state.export_frame()))
+
+    def end(self):
+        """write the game"""
+        keyframe_offset = (_GAME_HEADER.size + 4 * len(self._keyframes) + len(self._directions))
+        offsets = []
+        for keyframe in self._keyframes:
+            offsets.append(keyframe_offset)
+            keyframe_offset += len(keyframe)
+        payload = [
+            _GAME_HEADER.pack(self._seed, self._step_num, len(self._keyframes)),
+            struct.pack(f"<{len(offsets)}I", *offsets),
+            bytes(self._directions)
+        ]
+        payload.extend(self._keyframes)
+        payload = b"".join(payload)
+        self._f.write(_RECORD_SIZE.pack(len(payload)))
+        self._f.write(payload)
+        self._seed = None
+
+    def close(self):
+        """close file"""
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+
+class GameReplayer(object):
+    """replay games from the recorded file
+    """
+    def __init__(self, path):
+        with open(path, mode="rb") as f:
+            # page in only the accessed games
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, self._w, self._h, self._keyframe_interval) = _FILE_HEADER.unpack_from(self._data)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError(f"not a valid game record file: {path}")
+        # scan the game offsets, only read the size of each record
+        self._game_offsets = []
+        offset = _FILE_HEADER.size
+        while offset < len(self._data):
+            (size,) = _RECORD_SIZE.unpack_from(self._data, offset)
+            offset += _RECORD_SIZE.size
+            self._game_offsets.append(offset)
+            offset += size
+
+    def __len__(self):
+        return len(self._game_offsets)
+
+    def game(self, idx) -> 'ReplayedGame':
+        """get the idx-th game"""
+        return ReplayedGame(self._data, self._game_offsets[idx], self._w, self._h, self._keyframe_interval)
+
+    def close(self):
+        """close file"""
+        self._data.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+
+class ReplayedGame(object):
+    """a recorded game, which can rebuild the state of any step
+    """
+    def __init__(self, data, offset, width, height, keyframe_interval):
+        self._data = data
+        self._offset = offset
+        self._w = width
+        self._h = height
+        (self.seed, self.step_num, keyframe_num) = _GAME_HEADER.unpack_from(data, offset)
+        self._keyframe_offsets = struct.unpack_from(f"<{keyframe_num}I", data, offset + _GAME_HEADER.size)
+        self._keyframe_steps = [(i + 1) * keyframe_interval for i in range(keyframe_num)]
+        self._directions_offset = offset + _GAME_HEADER.size + 4 * keyframe_num
+
+    def direction(self, step_idx) -> ssm.Direction:
+        """direction of the step_idx-th step (0 based)"""
+        v = self._data[self._directions_offset + step_idx // 4] >> (step_idx % 4 * 2) & 0b11
+        return ssm.Direction(v)
+
+    def state_at(self, step: int) -> ssm.SnakeStateMachine:
+        """rebuild the state after `step` steps, from the nearest keyframe.
+        """
+        if not 0 <= step <= self.step_num:
+            raise ValueError(f"step must in [0, {self.step_num}], got {step}")
+        state = ssm.SnakeStateMachine(self._w, self._h)
+        keyframe_idx = bisect.bisect_right(self._keyframe_steps, step) - 1
+        if keyframe_idx >= 0:
+            frame = _unpack_keyframe(self._data, self._offset + self._keyframe_offsets[keyframe_idx])
+            state.load_frame(frame)
+            state.game_seed = self.seed
+        else:
+            state.new_state(self.seed)
+        for step_idx in range(state.steps, step):
+            state.update_state(self.direction(step_idx))
+        return state
+
+    def replay(self):
+        """iterate state of every step (the same state object is yielded)"""
+        state = ssm.SnakeStateMachine(self._w, self._h)
+        state.new_state(self.seed)
+        yield state
+        for step_idx in range(self.step_num):
+            state.update_state(self.direction(step_idx))
+            yield state
+
+
+def _pack_keyframe(frame) -> bytes:
+    (steps, score, remaining_steps, direction, status, food_cell, body_cells, rng_state) = frame
+    (_, mt_state, _) = rng_state
+    return b"".join([
+        _KEYFRAME_HEADER.pack(steps, score, remaining_steps, direction, status, food_cell, len(body_cells)),
+        struct.pack(f"<{len(body_cells)}I", *body_cells),
+        _RNG_STATE.pack(*mt_state)
+    ])
+
+
+def _unpack_keyframe(data, offset) -> tuple:
+    (steps, score, remaining_steps, direction, status, food_cell, body_len) = _KEYFRAME_HEADER.unpack_from(
+        data, offset)
+    offset += _KEYFRAME_HEADER.size
+    body_cells = list(struct.unpack_from(f"<{body_len}I", data, offset))
+    offset += 4 * body_len
+    rng_state = (_RNG_VERSION, _RNG_STATE.unpack_from(data, offset), None)
+    return (steps, score, remaining_steps, direction, status, food_cell, body_cells, rng_state)
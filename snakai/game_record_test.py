@@ -0,0 +1,36 @@
+# -*- coding: utf8 -*-
+"""test (pytest)
+"""
+import random
+
+from . import snake_state_machine as ssm
+from . import game_record
+
+
+def test_record_and_replay(tmp_path):
+    path = tmp_path / "games.bin"
+    state = ssm.SnakeStateMachine(width=12, height=10, seed=1234)
+    rng = random.Random(4321)
+    directions = list(ssm.Direction)
+    games_frames = []
+    with game_record.GameRecorder(path, 12, 10, keyframe_interval=7) as recorder:
+        for _ in range(10):
+            state.new_state()
+            recorder.begin(state)
+            frames = [state.export_frame()]
+            while state.is_state_ok():
+                state.update_state(rng.choice(directions))
+                recorder.record(state)
+                frames.append(state.export_frame())
+            recorder.end()
+            games_frames.append(frames)
+
+    with game_record.GameReplayer(path) as replayer:
+        assert len(replayer) == len(games_frames)
+        for (game_idx, frames) in enumerate(games_frames):
+            game = replayer.game(game_idx)
+            assert game.step_num == len(frames) - 1
+            replayed_frames = [s.export_frame() for s in game.replay()]
+            assert replayed_frames == frames
+            for step in range(game.step_num, -1, -1):
+                assert game.state_at(step).export_frame() == frames[step]
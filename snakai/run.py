@@ -5,6 +5,7 @@
 import argparse
 import logging
 
+from snakai import game_record
 from snakai import strategy as strategy_module
 from snakai.curses_game import exe
 from snakai.util import logger as logger_module
@@ -15,9 +16,13 @@ def main():
     logger_module.init_logger("snakai", level=logging.DEBUG, fpath="/dev/shm/snake_run.log")
     args = _parse_args()
     game_exe = exe.CursesSnakeGameExe(win_width=args.width, win_height=args.height, 
-        speed=args.speed)
+        speed=args.speed, seed=args.seed)
     strategy = strategy_module.init_strategy(args.strategy, args)    
-    game_exe.run(strategy)
+    if args.record_path:
+        with game_record.GameRecorder(args.record_path, args.width, args.height) as recorder:
+            game_exe.run(strategy, recorder)
+    else:
+        game_exe.run(strategy)
 
 
 def _parse_args():
@@ -29,6 +34,8 @@ def _parse_args():
     parser.add_argument("--speed", default=exe.GameSpeed.NORMAL.name, choices=exe.GameSpeed.names(), 
         help="curses game speed")
     parser.add_argument("--model_path", help="path to model")
+    parser.add_argument("--seed", type=int, help="random seed of the game")
+    parser.add_argument("--record_path", help="record the game into this file if set")
     return parser.parse_args()
 
 
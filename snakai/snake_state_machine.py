@@ -1,10 +1,12 @@
 # -*- coding: utf-8 -*-
 """snake game state definitions
 """
+import array
+import bisect
 import enum
+import functools
 import logging
 import collections
-import itertools
 import random
 
 logger = logging.getLogger("snakai")
@@ -22,6 +24,32 @@ class Direction(enum.IntEnum):
 Point = collections.namedtuple('Point', "x, y")
 
 
+class StepOutcome(enum.IntEnum):
+    """outcome of a `SnakeStateMachine.update_state` step.
+    MOVED, ATE => game is still running; others => game ended.
+    """
+    MOVED = 0
+    ATE = 1
+    DIED_WALL = 2
+    DIED_BODY = 3
+    STARVED = 4
+    SUCCEEDED = 5
+    # not updated: game is not running
+    NONE = 6
+
+# undo log entry: direction, remaining-steps, status, score, food-cell,
+#   head-free-pos, tail-cell, tail-free-pos, last-outcome, last-removed-tail-cell
+_UNDO_ENTRY_SIZE = 10
+
+# flat lookup tables indexed by direction (int value)
+_DIRECTIONS = tuple(Direction)
+_DIRECTION_DX = (-1, 1, 0, 0, 0)
+_DIRECTION_DY = (0, 0, -1, 1, 0)
+# NONE has no opposite direction, use -1 so it never equals to a direction
+_OPPOSITE_DIRECTION = (Direction.RIGHT, Direction.LEFT, Direction.DOWN, Direction.UP, -1)
+_IS_EFFECTIVE_DIRECTION = (True, True, True, True, False)
+
+
 class SnakeStateMachine(object):
     """snake-state-machine
     only keep inner status, the IO logic should be impl in the other class. 
@@ -43,6 +71,10 @@ class SnakeStateMachine(object):
         if food not eaten while remaining-steps == 0, then game over.
         else if food has been eaten, the remaining steps will be refilled.
         This is used to avoid `circle` operations.
+
+    inner representation: each point in the board is a flat cell index `y * w + x`.
+    the snake body is kept in a fixed-capacity ring buffer of cells, 
+    `snake` / `head` / `food` are the `Point` views for compatibility.
     """
     class InnerStatus(object):
         """inner status"""
@@ -51,13 +83,19 @@ class SnakeStateMachine(object):
         SUCCESS = 2
         UN_INIT = 3
 
-    def __init__(self, width, height):
+    __slots__ = ("direction", "steps", "remaining_steps", "score", "game_seed",
+        "last_outcome", "last_removed_tail_cell", "_hooks",
+        "_w", "_h", "_status", "_rng", "_neighbors",
+        "_body", "_head_pos", "_body_len", "_out_head", "_snake_view", "_food", "_food_cell",
+        "_occupancy", "_free_cells", "_free_cell_pos", "_free_cnt", "_row2xs", "_col2ys",
+        "_undo_log", "_undo_rng_states", "_bitboard")
+
+    def __init__(self, width, height, seed=None):
         """init 
+        seed: seed for the random generator. None means using system randomness.
+            each game in `new_state` is re-seeded by a game seed drawn from it,
+            so every game can be reproduced by its `game_seed`.
         """
-        # type: collections.deque
-        self.snake = None
-        # type: Point
-        self.food = None
         self.direction = Direction.NONE
         # type: int
         self.steps = None
@@ -65,11 +103,53 @@ class SnakeStateMachine(object):
         self.remaining_steps = None
         # type: float
         self.score = None
+        # type: int
+        self.game_seed = None
+        # outcome of the last `update_state`, and the tail cell removed in it (-1 if not removed)
+        self.last_outcome = StepOutcome.NONE
+        self.last_removed_tail_cell = -1
+        # step outcome subscribers
+        self._hooks = ()
                 
         self._w = width
         self._h = height
         self._status = self.InnerStatus.UN_INIT
-        self._rng = random.Random()
+        self._rng = random.Random(seed)
+        self._neighbors = get_neighbor_table(width, height)
+
+        cell_num = width * height
+        # use uint16 for cell when possible, to save memory.
+        cell_typecode = "H" if cell_num <= 0xFFFF else "i"
+        # snake body: ring buffer of cells. 
+        # head is at `_head_pos`, the k-th body is at `(_head_pos + k) % capacity`
+        self._body = array.array(cell_typecode, [0]) * cell_num
+        self._head_pos = 0
+        self._body_len = 0
+        # the head out of board (collide on the edge) can't be a cell, keep it as a Point.
+        self._out_head = None
+        self._snake_view = SnakeBodyView(self)
+        # type: Point
+        self._food = None
+        self._food_cell = -1
+        # board occupancy, indexed by cell. value is the body count on the cell,
+        # so collision check is O(1) rather than scanning the snake.
+        self._occupancy = bytearray(cell_num)
+        # free-cell index: the first `_free_cnt` items of `_free_cells` are the cells not occupied,
+        # `_free_cell_pos` maps cell -> position in `_free_cells`. 
+        # so food spawning is a single uniform draw however full the board is.
+        self._free_cells = array.array(cell_typecode, range(cell_num))
+        self._free_cell_pos = array.array(cell_typecode, range(cell_num))
+        self._free_cnt = cell_num
+        # sorted body x-positions of each row, and sorted body y-positions of each column.
+        # so the nearest body in the 4 directions can be found by bisect.
+        self._row2xs = [[] for _ in range(height)]
+        self._col2ys = [[] for _ in range(width)]
+        # undo log for snapshot/restore, flat array with `_UNDO_ENTRY_SIZE` items per step. 
+        # None means not recording.
+        self._undo_log = None
+        self._undo_rng_states = None
+        # optional bitboard view, see `enable_bitboard`
+        self._bitboard = None
 
     def is_state_ok(self) -> bool:
         """query whether current state is ok
@@ -86,81 +166,88 @@ class SnakeStateMachine(object):
         ---------
         Boolean
             whether game is ok.
+            the detail of this step is exposed by `last_outcome` and `last_removed_tail_cell`.
         """
-        def _udpate_direction():
-            if not DirectionUtil.is_effective(d) or DirectionUtil.is_opposite(d, self.direction):
-                return
-            self.direction = d
-
-        def _add_snake_head():
-            current_head_p = self.head
-            d = self.direction
-            new_head = gen_next_step_point(current_head_p, d)
-            # no need to check collision
-            self.snake.appendleft(new_head)         
-
-        def _is_new_head_collide():
-            new_head = self.head
-            # case1: new-head collide on the edge
-            if new_head.x in [-1, self._w] or new_head.y in [-1, self._h]:
-                return True
-            # case2: new-head collide on self body
-            for test_point in itertools.islice(self.snake, 1, len(self.snake)):
-                if new_head == test_point:
-                    return True
+        if self._status != self.InnerStatus.RUNNING:
+            self.last_outcome = StepOutcome.NONE
+            self.last_removed_tail_cell = -1
             return False
-        
-        def _is_exceed_max_steps():
-            return self.remaining_steps <= 0
 
-        def _has_eaten_food():
-            new_head = self.head
-            return new_head == self.food
+        w = self._w
+        undo_log = self._undo_log
+        if undo_log is not None:
+            # record previous state, the free-cell positions and tail are filled after moving
+            undo_base = len(undo_log)
+            undo_log.extend((self.direction, self.remaining_steps, self._status, self.score,
+                self._food_cell, -1, -1, -1, self.last_outcome, self.last_removed_tail_cell))
 
-        def _has_succeeded():
-            return len(self.snake) == self._h * self._w
+        self.steps += 1
+        self.remaining_steps -= 1
+        # update direction
+        if _IS_EFFECTIVE_DIRECTION[d] and d != _OPPOSITE_DIRECTION[self.direction]:
+            self.direction = d
 
-        def _update_food():
-            # if snake is too long and occupies almost all space, 
-            # this logic may dramatically costly
-            while True:
-                x = self._rng.randrange(0, self._w)
-                y = self._rng.randrange(0, self._h)
-                new_food = Point(x, y)
-                if new_food in self.snake:
-                    continue
-                else:
-                    break
-            self.food = new_food
+        # add snake head. no need to check collision
+        head_cell = self._body[self._head_pos]
+        new_head_cell = self._neighbors[head_cell * 4 + self.direction]
+        tail_cell = -1
+        if new_head_cell >= 0:
+            head_free_pos = self._push_head(new_head_cell)
+            if undo_log is not None:
+                undo_log[undo_base + 5] = head_free_pos
+            # new-head collide on self body => the cell is occupied by head and another body
+            outcome = StepOutcome.DIED_BODY if self._occupancy[new_head_cell] > 1 else StepOutcome.MOVED
+        else:
+            # new-head collide on the edge
+            self._out_head = gen_next_step_point(self.cell2point(head_cell), self.direction)
+            outcome = StepOutcome.DIED_WALL
 
-        if not self.is_state_ok():
-            return False
+        if outcome == StepOutcome.MOVED and self.remaining_steps <= 0:
+            outcome = StepOutcome.STARVED
 
-        self.steps += 1
-        self.remaining_steps -= 1
-        _udpate_direction()
-        
-        _add_snake_head()
-        if _is_new_head_collide() or _is_exceed_max_steps():
+        if outcome != StepOutcome.MOVED:
             self._status = self.InnerStatus.FAIL
-            return False
-
-        if _has_eaten_food():
+        elif new_head_cell == self._food_cell:
             logger.debug("eat food! score = %s", self.score)
             self.score += 1
             self.remaining_steps = _calc_max_remaining_steps(self)
-            if _has_succeeded():
+            if self._body_len == self._h * w:
                 self._status = self.InnerStatus.SUCCESS
-                return False
-            _update_food()
+                outcome = StepOutcome.SUCCEEDED
+            else:
+                outcome = StepOutcome.ATE
+                if undo_log is not None:
+                    # make the food drawing replayable after restore
+                    self._undo_rng_states.append(self._rng.getstate())
+                self._spawn_food()
         else:
             # remove tail to make a moving illusion
-            self.snake.pop()
+            (tail_cell, tail_free_pos) = self._pop_tail()
+            if undo_log is not None:
+                undo_log[undo_base + 6] = tail_cell
+                undo_log[undo_base + 7] = tail_free_pos
+
+        self.last_outcome = outcome
+        self.last_removed_tail_cell = tail_cell
+        if self._hooks:
+            for hook in self._hooks:
+                hook(self, outcome)
+        return outcome <= StepOutcome.ATE
+
+    def subscribe(self, hook):
+        """subscribe the step outcome. `hook(state, outcome: StepOutcome)` is called after each step.
+        no cost if no hook subscribed.
+        """
+        self._hooks = self._hooks + (hook,)
 
-        return True
+    def unsubscribe(self, hook):
+        """unsubscribe the hook"""
+        self._hooks = tuple(h for h in self._hooks if h is not hook)
 
-    def new_state(self):
-        
+    def new_state(self, seed=None):
+        """init a new game.
+        seed: the game seed. None means drawing one from the state random generator.
+        """
         SNAKE_LENGTH = 3
         
         def _random_snake_head():
@@ -189,12 +276,17 @@ class SnakeStateMachine(object):
         def _init_snake(snake_head, direction):
             # in init, only left/right direction
             tail_x_offset = -1 if direction == Direction.RIGHT else 1
-            snake = collections.deque([snake_head])
+            snake = [snake_head]
             for i in range(1, SNAKE_LENGTH):
                 tail = Point(snake_head.x + tail_x_offset * i, snake_head.y)
                 snake.append(tail)
             return snake
 
+        if seed is None:
+            seed = self._rng.getrandbits(63)
+        self._rng.seed(seed)
+        self.game_seed = seed
+
         snake_head = _random_snake_head()
         food = _random_food(snake_head)
         direction = _get_direction(snake_head, food)
@@ -207,6 +299,68 @@ class SnakeStateMachine(object):
         self.steps = 0
         self.remaining_steps = _calc_max_remaining_steps(self)
         self._status = self.InnerStatus.RUNNING
+        self.last_outcome = StepOutcome.NONE
+        self.last_removed_tail_cell = -1
+
+    def snapshot(self) -> int:
+        """take a snapshot for lookahead (search-based strategy), return a token for `restore`.
+        after the first snapshot, each `update_state` is recorded in an undo log, 
+        so restoring costs O(1) per move, and the food drawing is replayed the same after restore.
+        the undo log is kept until `drop_snapshots`, `new_state` or setting the snake.
+        """
+        if self._undo_log is None:
+            self._undo_log = array.array("q")
+            self._undo_rng_states = []
+        return len(self._undo_log)
+
+    def restore(self, token: int):
+        """rewind the state to the snapshot of token
+        """
+        if self._undo_log is None or token > len(self._undo_log):
+            raise ValueError(f"invalid snapshot token [{token}]")
+        while len(self._undo_log) > token:
+            self._undo_step()
+
+    def drop_snapshots(self):
+        """drop all snapshots and stop recording undo log
+        """
+        self._undo_log = None
+        self._undo_rng_states = None
+
+    def export_frame(self) -> tuple:
+        """export the full game state (including the random generator state) as a frame.
+        frame = (steps, score, remaining_steps, direction, status, food_cell, body_cells, rng_state)
+        body_cells is head first, and the out-of-board head is not included.
+        """
+        return (self.steps, self.score, self.remaining_steps, int(self.direction), self._status,
+            self._food_cell, list(self.body_cells()), self._rng.getstate())
+
+    def load_frame(self, frame: tuple):
+        """load state from the frame of `export_frame`
+        """
+        (steps, score, remaining_steps, direction, status, food_cell, body_cells, rng_state) = frame
+        self._set_body_cells(body_cells)
+        self.food = self.cell2point(food_cell)
+        self.steps = steps
+        self.score = score
+        self.remaining_steps = remaining_steps
+        self.direction = Direction(direction)
+        self._status = status
+        self._rng.setstate(rng_state)
+
+    def enable_bitboard(self) -> 'bitboard.Bitboard':
+        """enable the bitboard view (body, food and walls as int bitmasks), 
+        it will be kept up to date incrementally. 
+        """
+        from . import bitboard
+        if self._bitboard is None:
+            self._bitboard = bitboard.Bitboard.from_state(self)
+        return self._bitboard
+
+    @property
+    def bitboard(self) -> 'bitboard.Bitboard':
+        """bitboard view, None if not enabled"""
+        return self._bitboard
 
     def is_success(self):
         """whether SUCCESS
@@ -222,10 +376,43 @@ class SnakeStateMachine(object):
         """whether collide to the snake body?
         here we don't consider the window-edge.
         """
-        for test_point in self.snake:
-            if test_point == p:
-                return True
-        return False
+        if not (0 <= p.x < self._w and 0 <= p.y < self._h):
+            return False
+        return self._occupancy[p.y * self._w + p.x] > 0
+
+    def is_cell_collide2snake(self, cell: int) -> bool:
+        """whether the (in-board) cell is occupied by the snake body"""
+        return self._occupancy[cell] > 0
+
+    @property
+    def snake(self) -> 'SnakeBodyView':
+        """snake body (Point view), head in the left"""
+        return self._snake_view
+
+    @snake.setter
+    def snake(self, snake):
+        """set the whole snake body by Points, head first. the board index will be rebuilt.
+        """
+        if not all(self._is_in_board(p) for p in snake):
+            raise ValueError(f"invalid snake body: {snake}")
+        self._set_body_cells([p.y * self._w + p.x for p in snake])
+
+    @property
+    def food(self) -> Point:
+        """food"""
+        return self._food
+
+    @food.setter
+    def food(self, p: Point):
+        self._food = p
+        self._food_cell = p.y * self._w + p.x
+        if self._bitboard is not None:
+            self._bitboard.set_food(self._food_cell)
+
+    @property
+    def food_cell(self) -> int:
+        """food cell"""
+        return self._food_cell
 
     @property
     def state_width(self):
@@ -237,33 +424,259 @@ class SnakeStateMachine(object):
         """get height"""
         return self._h
 
+    def row_body_xs(self, y: int) -> list:
+        """sorted x of the body points in row y. don't modify it."""
+        return self._row2xs[y]
+
+    def col_body_ys(self, x: int) -> list:
+        """sorted y of the body points in column x. don't modify it."""
+        return self._col2ys[x]
+
+    @property
+    def neighbors(self) -> array.array:
+        """neighbor table of the board, see `get_neighbor_table`"""
+        return self._neighbors
+
     @property
-    def head(self):
+    def head(self) -> Point:
         """head"""
-        return self.snake[0]
+        if self._out_head is not None:
+            return self._out_head
+        return self.cell2point(self._body[self._head_pos])
+
+    @property
+    def last_removed_tail(self) -> Point:
+        """the tail removed in the last step, None if not removed"""
+        if self.last_removed_tail_cell < 0:
+            return None
+        return self.cell2point(self.last_removed_tail_cell)
+
+    @property
+    def head_cell(self) -> int:
+        """head cell. undefined if head is out of board."""
+        return self._body[self._head_pos]
+
+    def body_cells(self):
+        """iterate the in-board body cells, head first"""
+        body = self._body
+        capacity = len(body)
+        head_pos = self._head_pos
+        for i in range(self._body_len):
+            yield body[(head_pos + i) % capacity]
+
+    def cell2point(self, cell: int) -> Point:
+        """cell -> Point"""
+        return Point(cell % self._w, cell // self._w)
 
     def __str__(self):
         return f"food={self.food}, snake={self.snake}, step={self.steps}, score={self.score}"
 
+    def _is_in_board(self, p: Point) -> bool:
+        return 0 <= p.x < self._w and 0 <= p.y < self._h
+
+    def _push_head(self, cell: int) -> int:
+        """add a new (in-board) head. 
+        Returns: the swapped position in free-cell index, -1 if not swapped. (used by undo)
+        """
+        self._head_pos = (self._head_pos - 1) % len(self._body)
+        self._body[self._head_pos] = cell
+        self._body_len += 1
+        self._add_axis_index(cell)
+        self._occupancy[cell] += 1
+        if self._occupancy[cell] != 1:
+            return -1
+        if self._bitboard is not None:
+            self._bitboard.add_body(cell)
+        # swap-remove from the free part
+        pos = self._free_cell_pos[cell]
+        self._free_cnt -= 1
+        self._swap_free_cells(pos, self._free_cnt)
+        return pos
+
+    def _pop_tail(self) -> (int, int):
+        """remove the tail.
+        Returns: (tail cell, the swapped position in free-cell index or -1)
+        """
+        self._body_len -= 1
+        cell = self._body[(self._head_pos + self._body_len) % len(self._body)]
+        self._remove_axis_index(cell)
+        self._occupancy[cell] -= 1
+        if self._occupancy[cell] != 0:
+            return (cell, -1)
+        if self._bitboard is not None:
+            self._bitboard.remove_body(cell)
+        # cells in `[_free_cnt, w*h)` are all occupied, so just swap the cell to the boundary.
+        pos = self._free_cell_pos[cell]
+        self._swap_free_cells(pos, self._free_cnt)
+        self._free_cnt += 1
+        return (cell, pos)
+
+    def _unpush_head(self, free_pos: int):
+        """exact inverse of `_push_head`"""
+        if self._out_head is not None:
+            self._out_head = None
+            return
+        cell = self._body[self._head_pos]
+        self._head_pos = (self._head_pos + 1) % len(self._body)
+        self._body_len -= 1
+        self._remove_axis_index(cell)
+        self._occupancy[cell] -= 1
+        if free_pos >= 0:
+            self._swap_free_cells(free_pos, self._free_cnt)
+            self._free_cnt += 1
+            if self._bitboard is not None:
+                self._bitboard.remove_body(cell)
+
+    def _unpop_tail(self, cell: int, free_pos: int):
+        """exact inverse of `_pop_tail`"""
+        self._body[(self._head_pos + self._body_len) % len(self._body)] = cell
+        self._body_len += 1
+        self._add_axis_index(cell)
+        self._occupancy[cell] += 1
+        if free_pos >= 0:
+            self._free_cnt -= 1
+            self._swap_free_cells(free_pos, self._free_cnt)
+            if self._bitboard is not None:
+                self._bitboard.add_body(cell)
+
+    def _add_axis_index(self, cell: int):
+        (y, x) = divmod(cell, self._w)
+        bisect.insort(self._row2xs[y], x)
+        bisect.insort(self._col2ys[x], y)
+
+    def _remove_axis_index(self, cell: int):
+        (y, x) = divmod(cell, self._w)
+        xs = self._row2xs[y]
+        del xs[bisect.bisect_left(xs, x)]
+        ys = self._col2ys[x]
+        del ys[bisect.bisect_left(ys, y)]
+
+    def _undo_step(self):
+        log = self._undo_log
+        undo_base = len(log) - _UNDO_ENTRY_SIZE
+        (direction, remaining_steps, status, score, food_cell, 
+            head_free_pos, tail_cell, tail_free_pos, last_outcome, last_removed_tail_cell) = log[undo_base:]
+        del log[undo_base:]
+        if tail_cell >= 0:
+            self._unpop_tail(tail_cell, tail_free_pos)
+        self._unpush_head(head_free_pos)
+        if self._food_cell != food_cell:
+            # food changed => rng has been used
+            self._rng.setstate(self._undo_rng_states.pop())
+            self.food = self.cell2point(food_cell)
+        self.direction = Direction(direction)
+        self.remaining_steps = remaining_steps
+        self._status = status
+        self.score = score
+        self.steps -= 1
+        self.last_outcome = StepOutcome(last_outcome)
+        self.last_removed_tail_cell = last_removed_tail_cell
+
+    def _swap_free_cells(self, pos_a: int, pos_b: int):
+        cells = self._free_cells
+        (cell_a, cell_b) = (cells[pos_a], cells[pos_b])
+        (cells[pos_a], cells[pos_b]) = (cell_b, cell_a)
+        self._free_cell_pos[cell_a] = pos_b
+        self._free_cell_pos[cell_b] = pos_a
+
+    def _spawn_food(self):
+        """uniformly choose a food position from the free cells.
+        """
+        self.food = self.cell2point(self._free_cells[self._rng.randrange(self._free_cnt)])
+
+    def _set_body_cells(self, cells: list):
+        if len(cells) > len(self._body):
+            raise ValueError(f"snake body is too long: {len(cells)}")
+        self._body[:len(cells)] = array.array(self._body.typecode, cells)
+        self._head_pos = 0
+        self._body_len = len(cells)
+        self._out_head = None
+        self._rebuild_body_index()
+        self.drop_snapshots()
+
+    def _rebuild_body_index(self):
+        occupancy = bytearray(self._w * self._h)
+        self._row2xs = [[] for _ in range(self._h)]
+        self._col2ys = [[] for _ in range(self._w)]
+        for cell in self.body_cells():
+            occupancy[cell] += 1
+            self._add_axis_index(cell)
+        self._occupancy = occupancy
+        free_cells = [cell for (cell, cnt) in enumerate(occupancy) if cnt == 0]
+        self._free_cnt = len(free_cells)
+        free_cells.extend(cell for (cell, cnt) in enumerate(occupancy) if cnt > 0)
+        self._free_cells = array.array(self._free_cells.typecode, free_cells)
+        self._free_cell_pos = array.array(self._free_cells.typecode, [0]) * len(free_cells)
+        for (pos, cell) in enumerate(free_cells):
+            self._free_cell_pos[cell] = pos
+        if self._bitboard is not None:
+            self._bitboard.load_state(self)
+
+
+class SnakeBodyView(object):
+    """read-only `Point` sequence view of the snake body, head first.
+    it supports `len`, index (including negative), iteration and `in`,
+    so it can be used like the previous `collections.deque` of Points.
+    """
+    __slots__ = ("_s",)
+
+    def __init__(self, state: SnakeStateMachine):
+        self._s = state
+
+    def __len__(self):
+        s = self._s
+        return s._body_len + (s._out_head is not None)
+
+    def __getitem__(self, idx: int) -> Point:
+        s = self._s
+        if idx < 0:
+            idx += len(self)
+        if s._out_head is not None:
+            if idx == 0:
+                return s._out_head
+            idx -= 1
+        if not 0 <= idx < s._body_len:
+            raise IndexError("snake body index out of range")
+        return s.cell2point(s._body[(s._head_pos + idx) % len(s._body)])
+
+    def __iter__(self):
+        s = self._s
+        if s._out_head is not None:
+            yield s._out_head
+        for cell in s.body_cells():
+            yield s.cell2point(cell)
+
+    def __contains__(self, p: Point) -> bool:
+        return self._s.is_outer_point_collide2snake(p) or p == self._s._out_head
+
+    def __repr__(self):
+        return f"SnakeBody({list(self)})"
+
 
 def gen_next_step_point(p: Point, direction: Direction) -> Point:
     """generate next step point according to current point and direction
     """
-    if not DirectionUtil.is_effective(direction):
+    if not _IS_EFFECTIVE_DIRECTION[direction]:
         raise ValueError(f"not effective direction {direction}")
-    
-    x = p.x
-    y = p.y
-    if direction == Direction.LEFT:
-        return Point(x - 1, y)
-    elif direction == Direction.RIGHT:
-        return Point(x + 1, y)
-    elif direction == Direction.UP:
-        return Point(x, y - 1)
-    elif direction == Direction.DOWN:
-        return Point(x, y + 1)
-    
-    raise ValueError(f"impossible direction [{direction}], something must wrong.")
+    return Point(p.x + _DIRECTION_DX[direction], p.y + _DIRECTION_DY[direction])
+
+
+@functools.lru_cache(maxsize=None)
+def get_neighbor_table(width: int, height: int) -> array.array:
+    """precomputed neighbor table of a board.
+    table[cell * 4 + direction] = the neighbor cell in the (effective) direction, or -1 for the wall.
+    the table is cached and shared between the boards with the same size, don't modify it.
+    """
+    table = array.array("i", [-1]) * (width * height * 4)
+    for y in range(height):
+        for x in range(width):
+            base = (y * width + x) * 4
+            for d in _DIRECTIONS[:4]:
+                nx = x + _DIRECTION_DX[d]
+                ny = y + _DIRECTION_DY[d]
+                if 0 <= nx < width and 0 <= ny < height:
+                    table[base + d] = ny * width + nx
+    return table
 
 
 class DirectionUtil(object):
@@ -280,16 +693,15 @@ class DirectionUtil(object):
     def get_opposite(cls, d: Direction):
         """get opposite direction
         """
-        opposite_direction_dict = cls._OPPOSITE_DIRECTION_MAP
-        if d not in opposite_direction_dict:
+        if not _IS_EFFECTIVE_DIRECTION[d]:
             raise ValueError(f"not effective action: {d}")
-        return opposite_direction_dict[d]
+        return _OPPOSITE_DIRECTION[d]
 
     @classmethod
     def is_opposite(cls, a: Direction, b: Direction) -> bool:
         """whether a and b are the opposite directions 
         """
-        return (a, b) in cls._OPPOSITE_DIRECTION_SET
+        return _OPPOSITE_DIRECTION[a] == b
     
     @classmethod
     def is_valid(cls, d: Direction) -> bool:
@@ -307,7 +719,7 @@ class DirectionUtil(object):
     def is_effective(cls, d: Direction) -> bool:
         """whether d is a effective direction
         """
-        return d in cls.get_effective()
+        return _IS_EFFECTIVE_DIRECTION[d]
 
 
 def _calc_max_remaining_steps(game_state: SnakeStateMachine):
@@ -317,9 +729,16 @@ def _calc_max_remaining_steps(game_state: SnakeStateMachine):
         2. for a snake line, the head need to bypass the body, most at `snake-body`
         3. duplicated operations, at most 1.2 -> 2 times (when body short, duplicated op should be less)
     """
-    _dist_base = game_state.state_width + game_state.state_height
-    _body_len_base = len(game_state.snake)
-    _multiplier =  1.2 + 0.8 * (_body_len_base / (game_state.state_width * game_state.state_height))
-    _max_val = (_dist_base + _body_len_base) * _multiplier
-    _max_val = int(_max_val)
-    return _max_val
\ No newline at end of file
+    return calc_max_remaining_steps(game_state.state_width, game_state.state_height, len(game_state.snake))
+
+
+def calc_max_remaining_steps(width: int, height: int, body_len):
+    """Calc max remaing steps by the board size and body length.
+    body_len can be an int, or a numpy int array (for the batched state machine).
+    """
+    _dist_base = width + height
+    _multiplier =  1.2 + 0.8 * (body_len / (width * height))
+    _max_val = (_dist_base + body_len) * _multiplier
+    if isinstance(_max_val, float):
+        return int(_max_val)
+    return _max_val.astype(int)
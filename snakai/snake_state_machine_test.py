@@ -0,0 +1,143 @@
+# -*- coding: utf8 -*-
+"""test (pytest)
+"""
+import collections
+import random
+
+from . import snake_state_machine as ssm
+
+
+def _run_random_games(state, game_num, seed=1234):
+    """run random games, yield state after every updating"""
+    rng = random.Random(seed)
+    directions = list(ssm.DirectionUtil.get_effective())
+    for _ in range(game_num):
+        state.new_state()
+        while state.is_state_ok():
+            state.update_state(rng.choice(directions))
+            yield state
+
+
+def test_collision_by_occupancy():
+    state = ssm.SnakeStateMachine(width=12, height=10)
+    for s in _run_random_games(state, game_num=30):
+        if not s.is_state_ok():
+            continue
+        body = set(s.snake)
+        for x in range(-1, s.state_width + 1):
+            for y in range(-1, s.state_height + 1):
+                p = ssm.Point(x, y)
+                assert s.is_outer_point_collide2snake(p) == (p in body)
+
+
+def test_collide_self_body():
+    state = ssm.SnakeStateMachine(width=20, height=20)
+    state.new_state()
+    _P = ssm.Point
+    # a hook: head will turn back to the body
+    state.snake = collections.deque([_P(5, 5), _P(6, 5), _P(6, 6), _P(5, 6), _P(4, 6)])
+    state.direction = ssm.Direction.LEFT
+    assert state.update_state(ssm.Direction.DOWN) is False
+    assert state.is_fail()
+
+
+def test_free_cell_index():
+    state = ssm.SnakeStateMachine(width=10, height=9)
+    for s in _run_random_games(state, game_num=30):
+        free_cells = set(s._free_cells[:s._free_cnt])
+        body_cells = set(p.y * s.state_width + p.x for p in s.snake if s._is_in_board(p))
+        assert len(free_cells) == s._free_cnt
+        assert free_cells.isdisjoint(body_cells)
+        assert len(free_cells) + len(body_cells) == s.state_width * s.state_height
+        for (pos, cell) in enumerate(s._free_cells):
+            assert s._free_cell_pos[cell] == pos
+        if s.is_state_ok():
+            assert s.food not in s.snake
+
+
+def _full_state(s):
+    return (list(s.snake), s.food, s.direction, s.steps, s.score, s.remaining_steps, s._status,
+        s.last_outcome, s.last_removed_tail_cell,
+        bytes(s._occupancy), s._free_cells.tobytes(), s._free_cnt, s._rng.getstate(),
+        [list(xs) for xs in s._row2xs], [list(ys) for ys in s._col2ys])
+
+
+def test_snapshot_restore():
+    state = ssm.SnakeStateMachine(width=10, height=10)
+    rng = random.Random(4321)
+    directions = list(ssm.Direction)
+    for _ in range(20):
+        state.new_state()
+        while state.is_state_ok():
+            token = state.snapshot()
+            before = _full_state(state)
+            moves = [rng.choice(directions) for _ in range(rng.randrange(1, 30))]
+            foods = []
+            for d in moves:
+                state.update_state(d)
+                foods.append(state.food)
+            state.restore(token)
+            assert _full_state(state) == before
+            # replay: food drawing should be the same
+            replay_foods = []
+            for d in moves:
+                state.update_state(d)
+                replay_foods.append(state.food)
+            assert replay_foods == foods
+            state.restore(token)
+            state.update_state(rng.choice(directions))
+        state.drop_snapshots()
+
+
+def test_snake_body_view():
+    state = ssm.SnakeStateMachine(width=10, height=10)
+    state.new_state()
+    _P = ssm.Point
+    state.snake = collections.deque([_P(0, 1), _P(1, 1), _P(2, 1)])
+    state.direction = ssm.Direction.LEFT
+    assert len(state.snake) == 3
+    assert state.snake[-1] == _P(2, 1)
+    assert _P(1, 1) in state.snake and _P(3, 1) not in state.snake
+    # collide on the edge, the out-of-board head is still in the view
+    assert state.update_state(ssm.Direction.NONE) is False
+    assert state.head == _P(-1, 1)
+    assert list(state.snake) == [_P(-1, 1), _P(0, 1), _P(1, 1), _P(2, 1)]
+
+
+def test_neighbor_table():
+    (w, h) = (7, 5)
+    table = ssm.get_neighbor_table(w, h)
+    for y in range(h):
+        for x in range(w):
+            for d in ssm.DirectionUtil.get_effective():
+                p = ssm.gen_next_step_point(ssm.Point(x, y), d)
+                expected = p.y * w + p.x if (0 <= p.x < w and 0 <= p.y < h) else -1
+                assert table[(y * w + x) * 4 + d] == expected
+
+
+def test_axis_index():
+    state = ssm.SnakeStateMachine(width=10, height=12)
+    for s in _run_random_games(state, game_num=20):
+        body = [p for p in s.snake if s._is_in_board(p)]
+        for y in range(s.state_height):
+            assert s.row_body_xs(y) == sorted(p.x for p in body if p.y == y)
+        for x in range(s.state_width):
+            assert s.col_body_ys(x) == sorted(p.y for p in body if p.x == x)
+
+
+def test_step_outcome():
+    state = ssm.SnakeStateMachine(width=10, height=10, seed=1)
+    outcomes = []
+    state.subscribe(lambda s, outcome: outcomes.append(outcome))
+    for s in _run_random_games(state, game_num=30):
+        outcome = s.last_outcome
+        assert outcome == outcomes[-1]
+        assert s.is_state_ok() == (outcome in (ssm.StepOutcome.MOVED, ssm.StepOutcome.ATE))
+        assert (s.last_removed_tail is not None) == (outcome == ssm.StepOutcome.MOVED)
+        if outcome == ssm.StepOutcome.DIED_WALL:
+            assert not s._is_in_board(s.head)
+        elif outcome == ssm.StepOutcome.DIED_BODY:
+            assert s.head in list(s.snake)[1:]
+        elif outcome == ssm.StepOutcome.STARVED:
+            assert s.remaining_steps <= 0
+    assert ssm.StepOutcome.ATE in outcomes
@@ -1,17 +1,22 @@
 # -*- coding: utf-8 -*-
 """util for ssm
 """
-import itertools
+import bisect
 
 from . import snake_state_machine as ssm
 
 class DistanceCalc(object):
     """distance calculator
+    the barrier distances are bisect queries on the row/column body index
+    maintained by the state machine, so no per-call preparation is needed.
     """
     def __init__(self, state: ssm.SnakeStateMachine):
         self._s = state
-        # used for distance calculation helper
-        self._key_points = self._prepare_key_points()
+
+    @property
+    def state(self) -> ssm.SnakeStateMachine:
+        """the state to calculate on"""
+        return self._s
 
     def barrier_up_dist(self):
         """get barrier up distance
@@ -20,59 +25,49 @@ class DistanceCalc(object):
         """
         if self._s.direction == ssm.Direction.DOWN:
             return -1
-        head = self._s.head
-        x_axis_points = self._key_points["x_axis_same2head"] 
-        if not x_axis_points:
-            # body all not in same x-axis, should calc to edge
-            return head.y - 0
-        up_points = [p for p in x_axis_points if p.y <= head.y]
-        if not up_points:
-            return head.y - 0
-        most_lower_point = max(up_points, key=lambda p: p.y)
-        return head.y - most_lower_point.y
+        (head_y, head_x) = divmod(self._s.head_cell, self._s.state_width)
+        ys = self._s.col_body_ys(head_x)
+        # the last y <= head.y is the head itself, the one before it is the most lower body
+        idx = bisect.bisect_right(ys, head_y) - 2
+        if idx < 0:
+            # no body in upper side, should calc to edge
+            return head_y - 0
+        return head_y - ys[idx]
 
     def barrier_down_dist(self):
         if self._s.direction == ssm.Direction.UP:
             return -1
-        head = self._s.head
-        x_axis_points = self._key_points["x_axis_same2head"]
-        if not x_axis_points:
-            return self._s.state_height - head.y
-        down_points = [p for p in x_axis_points if p.y >= head.y]
-        if not down_points:
-            return self._s.state_height - head.y
-        most_upper_point = min(down_points, key=lambda p: p.y)
-        return most_upper_point.y - head.y
+        (head_y, head_x) = divmod(self._s.head_cell, self._s.state_width)
+        ys = self._s.col_body_ys(head_x)
+        # the first y >= head.y is the head itself
+        idx = bisect.bisect_left(ys, head_y) + 1
+        if idx >= len(ys):
+            return self._s.state_height - head_y
+        return ys[idx] - head_y
 
     def barrier_left_dist(self):
         if self._s.direction == ssm.Direction.RIGHT:
             return -1
-        head = self._s.head
-        y_axis_points = self._key_points["y_axis_same2head"]
-        if not y_axis_points:
-            return head.x - 0
-        left_points = [p for p in y_axis_points if p.x <= head.x]
-        if not left_points:
-            return head.x - 0
-        most_right_point = max(left_points, key=lambda p: p.x)
-        return head.x - most_right_point.x
+        (head_y, head_x) = divmod(self._s.head_cell, self._s.state_width)
+        xs = self._s.row_body_xs(head_y)
+        idx = bisect.bisect_right(xs, head_x) - 2
+        if idx < 0:
+            return head_x - 0
+        return head_x - xs[idx]
 
     def barrier_right_dist(self):
         if self._s.direction == ssm.Direction.LEFT:
             return -1
-        head = self._s.head
-        y_axis_points = self._key_points["y_axis_same2head"]
-        if not y_axis_points:
-            return self._s.state_width - head.x
-        right_points = [p for p in y_axis_points if p.x >= head.x]
-        if not right_points:
-            return self._s.state_width - head.x
-        most_left_point = min(right_points, key=lambda p: p.x)
-        return most_left_point.x - head.x
-    
+        (head_y, head_x) = divmod(self._s.head_cell, self._s.state_width)
+        xs = self._s.row_body_xs(head_y)
+        idx = bisect.bisect_left(xs, head_x) + 1
+        if idx >= len(xs):
+            return self._s.state_width - head_x
+        return xs[idx] - head_x
+
     def food_dist_with_sign(self):
         """head to food distance
-        for distinguish 
+        for distinguish
             food <---- head
             head -----> food
         we use the `+-` sign.
@@ -80,25 +75,8 @@ class DistanceCalc(object):
         Returns:
             (x-dist-with-sign, y-dist-with-sign)
         """
-        food = self._s.food
-        head = self._s.head
-        x_dist = head.x - food.x
-        y_dist = head.y - food.y
+        (head_y, head_x) = divmod(self._s.head_cell, self._s.state_width)
+        (food_y, food_x) = divmod(self._s.food_cell, self._s.state_width)
+        x_dist = head_x - food_x
+        y_dist = head_y - food_y
         return (x_dist, y_dist)
-
-    def _prepare_key_points(self):
-        snake = self._s.snake
-        head = snake[0]
-        # you can't use islice(x, 1, stop=None) because islice is c-impl function
-        # not python, so can't use keyword arguments. same as `range`
-        # see https://stackoverflow.com/questions/28926633/
-        #     why-i-cannot-use-keyword-argument-on-range-function
-        same_x_axis_points = [p for p in itertools.islice(snake, 1, None)
-            if p.x == head.x]
-        same_y_axis_points = [p for p in itertools.islice(snake, 1, None)
-            if p.y == head.y]
-
-        return {
-            "x_axis_same2head": same_x_axis_points,
-            "y_axis_same2head": same_y_axis_points
-        }
@@ -1,8 +1,25 @@
 # -*- coding: utf-8 -*-
 """strategy inialization.
+
+strategies are declared up front with their module and factory,
+the module is only imported when the strategy is selected,
+so listing the names (e.g. for argparse choices) doesn't import numpy, curses, etc.
 """
+import importlib
 
 _name2startegy_cls = {}
+# name -> (module name relative to this package, factory(cls, args) -> strategy)
+_name2declaration = {}
+
+
+def declare(name, module, factory):
+    """declare a strategy: `module` registers the strategy class by `register(name)` when imported,
+    `factory(cls, args)` creates the strategy from the class and the command line args.
+    """
+    if name in _name2declaration:
+        raise ValueError(f"dup-declare. strategy [{name}] has already been declared!")
+    _name2declaration[name] = (module, factory)
+
 
 def register(name):
     if name in _name2startegy_cls:
@@ -10,6 +27,9 @@ def register(name):
 
     def _decorator_fn(cls):
         _name2startegy_cls[name] = cls
+        if name not in _name2declaration:
+            # registered without declaration, init without args
+            _name2declaration[name] = (None, _init_without_args)
         return cls
 
     return _decorator_fn
@@ -18,28 +38,43 @@ def register(name):
 def get_names():
     """get strategy names
     """
-    return list(_name2startegy_cls.keys())
+    return list(_name2declaration.keys())
 
 
 def get_strategy_cls(name):
     """name 2 strategy cls
     """
+    if name not in _name2startegy_cls:
+        (module, _) = _name2declaration[name]
+        importlib.import_module(f".{module}", __name__)
     return _name2startegy_cls[name]
 
 
 def init_strategy(name, args):
     """init strategy
     """
+    if name not in _name2declaration:
+        raise ValueError(f"strategy {name} has not been declared")
     cls = get_strategy_cls(name)
-    if name == "manual":
-        return cls()
-    elif name == "rule_based":
-        return cls()
-    elif name == "qlearning":
-        return cls(is_infer=True, infer_args=args, train_args=None)
-    raise ValueError(f"strategy class {name} has not proper initialization")
-
-
-from . import manual
-from . import rule_based
-from . import qlearning
\ No newline at end of file
+    (_, factory) = _name2declaration[name]
+    return factory(cls, args)
+
+
+def _init_without_args(cls, _args):
+    return cls()
+
+
+def _init_infer(cls, args):
+    return cls(is_infer=True, infer_args=args, train_args=None)
+
+
+def _init_lookup(cls, args):
+    return cls(model_path=args.model_path)
+
+
+declare("manual", "manual", _init_without_args)
+declare("rule_based", "rule_based", _init_without_args)
+declare("qlearning", "qlearning", _init_infer)
+declare("dqn", "dqn", _init_infer)
+declare("lookup", "lookup", _init_lookup)
+declare("astar", "astar", _init_without_args)
@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+"""A* path-finding strategy
+"""
+import array
+import heapq
+
+from . import base
+from . import register
+from .. import snake_state_machine as ssm
+
+_EFFECTIVE_DIRECTIONS = (ssm.Direction.LEFT, ssm.Direction.RIGHT, ssm.Direction.UP, ssm.Direction.DOWN)
+# take the food path even if the tail is not reachable after eating,
+# when the remaining steps are no more than the path length + margin
+_STARVING_MARGIN = 2
+
+
+@register("astar")
+class AStar(base.Strategy):
+    """A* strategy: go to the food by the shortest path, if the tail is still reachable after eating
+    (or the snake is going to starve). otherwise take one step to the neighbor with the longest way to the tail,
+    then search again. if the tail is unreachable, take the neighbor with the largest free space.
+
+    the food path is cached and followed step by step. it's searched again only when the food moves,
+    the next cell is blocked, or the head is not where the path expects (e.g. a new game).
+
+    searching works on flat cell ids, the arrays are preallocated for the board and reused between searches:
+    an entry is valid only if its stamp equals the current search generation, so nothing is cleared.
+    a body cell is passable if the snake tail has left it when the path arrives
+    (the i-th cell from the tail is left after i + 1 moves, and the current tail is still a collision).
+    """
+    def __init__(self, reuse_path=True):
+        """reuse_path: follow the cached path, False means searching every move (for benchmark)"""
+        self._reuse_path = reuse_path
+        self._board = None
+        self._gen = 0
+        # cached food path, reversed: the next cell is the last
+        self._path = []
+        self._path_food = -1
+        self._path_head = -1
+        self.search_cnt = 0
+
+    def gen_next_action(self, game_state: ssm.SnakeStateMachine, _) -> base.Action:
+        """next step of the path"""
+        head = game_state.head_cell
+        path = self._path
+        if (self._reuse_path and path and self._path_food == game_state.food_cell and self._path_head == head
+                and not game_state.is_cell_collide2snake(path[-1])):
+            next_cell = path.pop()
+        else:
+            next_cell = self._plan(game_state)
+            if next_cell < 0:
+                # no way out, just go ahead...
+                return base.Action.IDLE
+        self._path_head = next_cell
+        neighbors = game_state.neighbors
+        for d in _EFFECTIVE_DIRECTIONS:
+            if neighbors[head * 4 + d] == next_cell:
+                return base.Action.effective_direction2action(d)
+        raise ValueError(f"cell {next_cell} is not a neighbor of head {head}")
+
+    def clear4next(self, _game_state):
+        self._path = []
+        self._path_head = -1
+
+    def _plan(self, game_state) -> int:
+        """search and cache the food path.
+        if eating is not safe, take the neighbor with the longest way to the tail,
+        at last the neighbor with the largest free space.
+        Returns
+        ---------
+        next cell, -1 if no way
+        """
+        self._prepare(game_state)
+        body = list(game_state.body_cells())
+        self._index_body(body)
+        (head, food) = (body[0], game_state.food_cell)
+        path = self._search(game_state, head, food)
+        # when going to starve, the risky food path is the only chance
+        if path is not None and (self._is_tail_reachable(game_state, body, path)
+                or game_state.remaining_steps <= len(path) + _STARVING_MARGIN):
+            self._path = path
+            self._path_food = food
+            return path.pop()
+        self._path = []
+        # the current tail is still a collision, so the tail is reached 2 moves later at least
+        candidates = self._free_neighbors(game_state, head)
+        (next_cell, max_len) = (-1, -1)
+        for cell in candidates:
+            tail_path = self._search(game_state, cell, body[-1], start_g=1)
+            if tail_path is not None and len(tail_path) > max_len:
+                (next_cell, max_len) = (cell, len(tail_path))
+        if next_cell >= 0:
+            return next_cell
+        # at least don't die in this step, and keep the most space
+        max_space = -1
+        for cell in candidates:
+            space = self._count_space(game_state, cell)
+            if space > max_space:
+                (next_cell, max_space) = (cell, space)
+        return next_cell
+
+    def _free_neighbors(self, game_state, cell: int) -> list:
+        neighbors = game_state.neighbors
+        return [next_cell for next_cell in (neighbors[cell * 4 + d] for d in _EFFECTIVE_DIRECTIONS)
+            if next_cell >= 0 and not game_state.is_cell_collide2snake(next_cell)]
+
+    def _prepare(self, game_state):
+        """allocate the arrays for the board"""
+        (w, h) = (game_state.state_width, game_state.state_height)
+        if self._board == (w, h):
+            return
+        self._board = (w, h)
+        cell_num = w * h
+        self._xs = array.array("i", (cell % w for cell in range(cell_num)))
+        self._ys = array.array("i", (cell // w for cell in range(cell_num)))
+        self._g_score = array.array("i", [0]) * cell_num
+        self._came_from = array.array("i", [0]) * cell_num
+        self._seen_gen = array.array("q", [0]) * cell_num
+        self._body_order = array.array("i", [0]) * cell_num
+        self._body_gen = array.array("q", [0]) * cell_num
+        self._blocked_gen = array.array("q", [0]) * cell_num
+        self._queue = array.array("i", [0]) * cell_num
+        self._gen = 0
+        self._cur_body_gen = 0
+
+    def _index_body(self, body: list):
+        """body cell -> moves until the tail leaves it (the order from the tail)"""
+        self._gen += 1
+        (gen, body_gen, body_order) = (self._gen, self._body_gen, self._body_order)
+        body_len = len(body)
+        for (i, cell) in enumerate(body):
+            body_gen[cell] = gen
+            body_order[cell] = body_len - 1 - i
+        self._cur_body_gen = gen
+
+    def _search(self, game_state, start: int, goal: int, start_g: int = 0):
+        """A* from start to goal.
+        start_g: moves already taken before the start (for the body passability)
+        Returns
+        ---------
+        path (reversed, without start), None if unreachable
+        """
+        self.search_cnt += 1
+        self._gen += 1
+        gen = self._gen
+        (xs, ys, g_score, came_from) = (self._xs, self._ys, self._g_score, self._came_from)
+        seen_gen = self._seen_gen
+        (body_gen, body_order, cur_body_gen) = (self._body_gen, self._body_order, self._cur_body_gen)
+        neighbors = game_state.neighbors
+        (goal_x, goal_y) = (xs[goal], ys[goal])
+        seen_gen[start] = gen
+        g_score[start] = start_g
+        # (f, -g, cell): prefer the deeper one if f is the same
+        heap = [(start_g + abs(xs[start] - goal_x) + abs(ys[start] - goal_y), -start_g, start)]
+        while heap:
+            (_, neg_g, cell) = heapq.heappop(heap)
+            g = -neg_g
+            if g > g_score[cell]:
+                # stale entry
+                continue
+            if cell == goal:
+                path = []
+                while cell != start:
+                    path.append(cell)
+                    cell = came_from[cell]
+                return path
+            next_g = g + 1
+            base_idx = cell * 4
+            for d in range(4):
+                next_cell = neighbors[base_idx + d]
+                if next_cell < 0 or (seen_gen[next_cell] == gen and g_score[next_cell] <= next_g):
+                    continue
+                if body_gen[next_cell] == cur_body_gen and next_g < body_order[next_cell] + 2:
+                    continue
+                seen_gen[next_cell] = gen
+                g_score[next_cell] = next_g
+                came_from[next_cell] = cell
+                heapq.heappush(heap, (next_g + abs(xs[next_cell] - goal_x) + abs(ys[next_cell] - goal_y),
+                    -next_g, next_cell))
+        return None
+
+    def _is_tail_reachable(self, game_state, body: list, path: list) -> bool:
+        """whether the head can reach the tail after eating the food through the path"""
+        # the snake after eating = the last (len + 1) cells of (body from tail to head, then the path)
+        new_len = len(body) + 1
+        new_body = (body[::-1] + path[::-1])[-new_len:]
+        (new_tail, new_head) = (new_body[0], new_body[-1])
+        self._gen += 1
+        gen = self._gen
+        (blocked_gen, seen_gen, queue) = (self._blocked_gen, self._seen_gen, self._queue)
+        for cell in new_body[1:]:
+            blocked_gen[cell] = gen
+        # BFS
+        neighbors = game_state.neighbors
+        seen_gen[new_head] = gen
+        queue[0] = new_head
+        (q_head, q_tail) = (0, 1)
+        while q_head < q_tail:
+            cell = queue[q_head]
+            q_head += 1
+            base_idx = cell * 4
+            for d in range(4):
+                next_cell = neighbors[base_idx + d]
+                if next_cell == new_tail:
+                    return True
+                if next_cell < 0 or seen_gen[next_cell] == gen or blocked_gen[next_cell] == gen:
+                    continue
+                seen_gen[next_cell] = gen
+                queue[q_tail] = next_cell
+                q_tail += 1
+        return False
+
+    def _count_space(self, game_state, start: int) -> int:
+        """number of the free cells reachable from start (BFS, the body is blocked)"""
+        self._gen += 1
+        gen = self._gen
+        (seen_gen, queue) = (self._seen_gen, self._queue)
+        neighbors = game_state.neighbors
+        seen_gen[start] = gen
+        queue[0] = start
+        (q_head, q_tail) = (0, 1)
+        while q_head < q_tail:
+            cell = queue[q_head]
+            q_head += 1
+            base_idx = cell * 4
+            for d in range(4):
+                next_cell = neighbors[base_idx + d]
+                if next_cell < 0 or seen_gen[next_cell] == gen or game_state.is_cell_collide2snake(next_cell):
+                    continue
+                seen_gen[next_cell] = gen
+                queue[q_tail] = next_cell
+                q_tail += 1
+        return q_tail
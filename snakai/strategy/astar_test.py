@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""test (pytest)
+"""
+from . import astar
+from . import base
+from .. import snake_state_machine as ssm
+
+
+def _play(strategy, state, game_num):
+    scores = []
+    outcomes = []
+    for _ in range(game_num):
+        state.new_state()
+        while state.is_state_ok():
+            action = strategy.gen_next_action(state, None)
+            state.update_state(ssm.Direction.NONE if action == base.Action.IDLE else action.to_direction())
+        strategy.clear4next(state)
+        scores.append(state.score)
+        outcomes.append(state.last_outcome)
+    return (scores, outcomes)
+
+
+def _load(state, body, direction, food):
+    """body: points from head to tail"""
+    state.new_state()
+    w = state.state_width
+    rng_state = state.export_frame()[-1]
+    state.load_frame((0, 0, 1000, int(direction), ssm.SnakeStateMachine.InnerStatus.RUNNING,
+        food.y * w + food.x, [p.y * w + p.x for p in body], rng_state))
+
+
+def test_path_reuse():
+    (reuse, no_reuse) = (astar.AStar(), astar.AStar(reuse_path=False))
+    (reuse_scores, _) = _play(reuse, ssm.SnakeStateMachine(12, 10, seed=1), 5)
+    (no_reuse_scores, _) = _play(no_reuse, ssm.SnakeStateMachine(12, 10, seed=1), 5)
+    assert min(reuse_scores) > 10 and min(no_reuse_scores) > 10
+    assert reuse.search_cnt < no_reuse.search_cnt / 2
+
+
+def test_path_through_leaving_body():
+    state = ssm.SnakeStateMachine(10, 10, seed=1)
+    # the food at (0, 0) is enclosed by the tail (1, 0) and (0, 1),
+    # it can only be reached through the cells the tail has left
+    body = [ssm.Point(0, 3), ssm.Point(0, 2), ssm.Point(0, 1), ssm.Point(1, 1), ssm.Point(1, 0)]
+    _load(state, body, ssm.Direction.DOWN, ssm.Point(0, 0))
+    strategy = astar.AStar()
+    for _ in range(5):
+        action = strategy.gen_next_action(state, None)
+        assert state.update_state(action.to_direction())
+    assert state.score == 1
+
+
+def test_no_path_fallback():
+    state = ssm.SnakeStateMachine(10, 10, seed=1)
+    # rows 0 - 2 are filled by the body (tail at (9, 0)), then row 3 till x = 4 and down to the head (4, 9).
+    # left of the head is a pocket with the food, right is more space, and the tail is reachable from neither.
+    body = ([ssm.Point(x, 0) for x in range(9, -1, -1)] + [ssm.Point(x, 1) for x in range(10)]
+        + [ssm.Point(x, 2) for x in range(9, -1, -1)] + [ssm.Point(x, 3) for x in range(5)]
+        + [ssm.Point(4, y) for y in range(4, 10)])[::-1]
+    _load(state, body, ssm.Direction.DOWN, ssm.Point(1, 8))
+    strategy = astar.AStar()
+    # going ahead (down) hits the wall, left is the pocket
+    assert strategy.gen_next_action(state, None) == base.Action.MOVE_RIGHT
+
+
+def test_not_starved():
+    (_, outcomes) = _play(astar.AStar(), ssm.SnakeStateMachine(10, 10, seed=1), 10)
+    assert ssm.StepOutcome.STARVED not in outcomes
@@ -47,25 +47,21 @@ class Action(enum.Enum):
     def effective_direction2action(cls, d: ssm.Direction) -> 'Action':
         """direction -> action
         """
-        _D = ssm.Direction
-        _m = {
-            _D.LEFT: cls.MOVE_LEFT,
-            _D.RIGHT: cls.MOVE_RIGHT,
-            _D.UP: cls.MOVE_UP,
-            _D.DOWN: cls.MOVE_DOWN
-        }
-        if d not in _m:
+        if not ssm.DirectionUtil.is_effective(d):
             raise ValueError(f"[{d}] not supported for direction->action")
-        return _m[d]
+        return _DIRECTION2ACTION[d]
 
     def to_direction(self) -> ssm.Direction:
         """action to direction"""
-        _D = ssm.Direction
-        _m = {
-            Action.MOVE_LEFT: _D.LEFT,
-            Action.MOVE_RIGHT: _D.RIGHT,
-            Action.MOVE_UP: _D.UP,
-            Action.MOVE_DOWN: _D.DOWN
-        }
-        # if no valid, just raise exception
-        return _m[self]
+        d = _ACTION_VALUE2DIRECTION[self._value_]
+        if d is None:
+            # if no valid, just raise exception
+            raise KeyError(self)
+        return d
+
+
+# flat lookup tables, built once. indexed by direction / action value
+_DIRECTION2ACTION = (Action.MOVE_LEFT, Action.MOVE_RIGHT, Action.MOVE_UP, Action.MOVE_DOWN)
+_ACTION_VALUE2DIRECTION = [None] * (max(a.value for a in Action) + 1)
+for (_d, _a) in enumerate(_DIRECTION2ACTION):
+    _ACTION_VALUE2DIRECTION[_a.value] = ssm.Direction(_d)
@@ -0,0 +1,5 @@
+#! -*- coding: utf-8 -*-
+"""dqn init
+"""
+
+from . import strategy
\ No newline at end of file
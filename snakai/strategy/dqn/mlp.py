@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""a small multi-layer perceptron in numpy (float32).
+
+hidden layers are ReLU, the output layer is linear.
+the input is batched: (batch_size, input_size) -> (batch_size, output_size),
+so many games are evaluated with one matrix multiply per layer.
+"""
+import numpy as np
+
+_DTYPE = np.float32
+
+
+class MLP(object):
+    """multi-layer perceptron
+    layer_sizes: [input_size, hidden_size..., output_size]
+    """
+    def __init__(self, layer_sizes, seed=None):
+        if len(layer_sizes) < 2:
+            raise ValueError(f"need at least input and output size, got {layer_sizes}")
+        self._layer_sizes = tuple(int(v) for v in layer_sizes)
+        rng = np.random.default_rng(seed)
+        # He initialization for ReLU
+        self.weights = [(rng.standard_normal((n_in, n_out)) * np.sqrt(2. / n_in)).astype(_DTYPE)
+            for (n_in, n_out) in zip(self._layer_sizes[:-1], self._layer_sizes[1:])]
+        self.biases = [np.zeros(n_out, dtype=_DTYPE) for n_out in self._layer_sizes[1:]]
+
+    @property
+    def layer_sizes(self) -> tuple:
+        """[input_size, hidden_size..., output_size]"""
+        return self._layer_sizes
+
+    @property
+    def params(self) -> list:
+        """weights and biases, in the order of `backward` grads"""
+        return self.weights + self.biases
+
+    def forward(self, x: np.ndarray) -> np.ndarray:
+        """x: (batch_size, input_size). Returns (batch_size, output_size)"""
+        last = len(self.weights) - 1
+        for (i, (w, b)) in enumerate(zip(self.weights, self.biases)):
+            x = x @ w
+            x += b
+            if i != last:
+                np.maximum(x, 0, out=x)
+        return x
+
+    def forward_train(self, x: np.ndarray):
+        """forward and keep the layer inputs for `backward`.
+        Returns
+        ---------
+        (output, layer_inputs)
+        """
+        layer_inputs = []
+        last = len(self.weights) - 1
+        for (i, (w, b)) in enumerate(zip(self.weights, self.biases)):
+            layer_inputs.append(x)
+            x = x @ w
+            x += b
+            if i != last:
+                np.maximum(x, 0, out=x)
+        return (x, layer_inputs)
+
+    def backward(self, layer_inputs: list, grad_output: np.ndarray) -> list:
+        """gradients of the params (see `params`) given d(loss)/d(output)"""
+        n = len(self.weights)
+        (grad_weights, grad_biases) = ([None] * n, [None] * n)
+        grad = grad_output
+        for i in range(n - 1, -1, -1):
+            grad_weights[i] = layer_inputs[i].T @ grad
+            grad_biases[i] = grad.sum(axis=0)
+            if i > 0:
+                grad = grad @ self.weights[i].T
+                # layer input of i is the relu output of i - 1
+                grad *= layer_inputs[i] > 0
+        return grad_weights + grad_biases
+
+    def copy_from(self, other: 'MLP'):
+        """copy params in place (e.g. to sync the target network)"""
+        if other.layer_sizes != self._layer_sizes:
+            raise ValueError(f"layer sizes mismatch: {other.layer_sizes} vs {self._layer_sizes}")
+        for (dst, src) in zip(self.params, other.params):
+            np.copyto(dst, src)
+
+    def state_dict(self) -> dict:
+        """params as named arrays, for `np.savez`"""
+        arrays = {"layer_sizes": np.array(self._layer_sizes, dtype=np.int64)}
+        for (i, (w, b)) in enumerate(zip(self.weights, self.biases)):
+            arrays[f"w{i}"] = w
+            arrays[f"b{i}"] = b
+        return arrays
+
+    @classmethod
+    def from_state_dict(cls, arrays) -> 'MLP':
+        """inverse of `state_dict`"""
+        mlp = cls(arrays["layer_sizes"].tolist())
+        for i in range(len(mlp.weights)):
+            mlp.weights[i] = np.ascontiguousarray(arrays[f"w{i}"], dtype=_DTYPE)
+            mlp.biases[i] = np.ascontiguousarray(arrays[f"b{i}"], dtype=_DTYPE)
+        return mlp
+
+
+class Adam(object):
+    """Adam optimizer, updates the params in place. the moments are preallocated."""
+    def __init__(self, params: list, learning_rate=1e-3, beta1=0.9, beta2=0.999, eps=1e-8):
+        self._params = params
+        self._lr = learning_rate
+        (self._beta1, self._beta2, self._eps) = (beta1, beta2, eps)
+        self._m = [np.zeros_like(p) for p in params]
+        self._v = [np.zeros_like(p) for p in params]
+        self._t = 0
+
+    def step(self, grads: list):
+        """apply one update"""
+        self._t += 1
+        (beta1, beta2) = (self._beta1, self._beta2)
+        lr = self._lr * np.sqrt(1. - beta2 ** self._t) / (1. - beta1 ** self._t)
+        for (p, g, m, v) in zip(self._params, grads, self._m, self._v):
+            m *= beta1
+            m += (1. - beta1) * g
+            v *= beta2
+            v += (1. - beta2) * g * g
+            p -= (lr * m / (np.sqrt(v) + self._eps)).astype(p.dtype, copy=False)
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+"""test (pytest)
+"""
+import numpy as np
+
+from . import mlp as mlp_module
+
+
+def test_backward_numerically():
+    net = mlp_module.MLP([5, 8, 3], seed=1)
+    # float64 for the finite difference
+    net.weights = [w.astype(np.float64) for w in net.weights]
+    net.biases = [b.astype(np.float64) for b in net.biases]
+    rng = np.random.default_rng(2)
+    x = rng.standard_normal((4, 5))
+    coef = rng.standard_normal((4, 3))
+
+    def _loss():
+        return float((net.forward(x) * coef).sum())
+
+    (out, layer_inputs) = net.forward_train(x)
+    assert np.allclose(out, net.forward(x))
+    grads = net.backward(layer_inputs, coef)
+    eps = 1e-6
+    for (param, grad) in zip(net.params, grads):
+        idx = tuple(rng.integers(0, n) for n in param.shape)
+        origin = param[idx]
+        param[idx] = origin + eps
+        loss_plus = _loss()
+        param[idx] = origin - eps
+        loss_minus = _loss()
+        param[idx] = origin
+        assert np.isclose((loss_plus - loss_minus) / (2 * eps), grad[idx], rtol=1e-4, atol=1e-6)
+
+
+def test_state_dict():
+    net = mlp_module.MLP([5, 8, 3], seed=1)
+    loaded = mlp_module.MLP.from_state_dict(net.state_dict())
+    assert loaded.layer_sizes == net.layer_sizes
+    x = np.ones((2, 5), dtype=np.float32)
+    assert np.array_equal(loaded.forward(x), net.forward(x))
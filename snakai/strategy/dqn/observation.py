@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""feature observation of the game state for DQN.
+
+a float32 vector of `OBS_SIZE`, the same for the scalar and the batched state machine:
+    [0:4]   danger: the next cell in the direction is the wall or the snake body
+    [4:8]   barrier distance in the direction (see `DistanceCalc`) / max(width, height), 0 for the opposite
+    [8:12]  current direction, one-hot
+    [12:14] food x / y distance with sign (head - food), / width and / height
+the directions of [0:4], [4:8], [8:12] are in `Direction` value order (LEFT, RIGHT, UP, DOWN).
+"""
+import numpy as np
+
+from ... import snake_state_machine as ssm
+from ... import snake_state_machine_util as ssm_util
+
+OBS_SIZE = 14
+_DANGER = slice(0, 4)
+_DIST = slice(4, 8)
+# (up, down, left, right) of `dist_features` -> direction value order
+_DIST_FEATURE_ORDER = [2, 3, 0, 1]
+
+
+def observe(state: ssm.SnakeStateMachine) -> np.ndarray:
+    """observation of a running scalar state"""
+    (w, h) = (state.state_width, state.state_height)
+    obs = np.zeros(OBS_SIZE, dtype=np.float32)
+    neighbors = state.neighbors
+    base = state.head_cell * 4
+    for d in range(4):
+        cell = neighbors[base + d]
+        obs[d] = cell < 0 or state.is_cell_collide2snake(cell)
+    calc = ssm_util.DistanceCalc(state)
+    dists = (calc.barrier_left_dist(), calc.barrier_right_dist(), calc.barrier_up_dist(),
+        calc.barrier_down_dist())
+    obs[_DIST] = np.maximum(dists, 0) / max(w, h)
+    obs[8 + state.direction] = 1.
+    (food_x, food_y) = calc.food_dist_with_sign()
+    obs[12] = food_x / w
+    obs[13] = food_y / h
+    return obs
+
+
+def observe_batch(batch_state) -> np.ndarray:
+    """observations of `BatchSnakeStateMachine`, shape (batch_size, OBS_SIZE)"""
+    (w, h) = (batch_state.state_width, batch_state.state_height)
+    n = batch_state.batch_size
+    obs = np.zeros((n, OBS_SIZE), dtype=np.float32)
+    rows = np.arange(n)
+    neighbors = _neighbor_array(w, h)[batch_state.heads()]
+    occupied = batch_state.occupancy[rows[:, None], np.maximum(neighbors, 0)] > 0
+    obs[:, _DANGER] = (neighbors < 0) | occupied
+    features = batch_state.dist_features()
+    obs[:, _DIST] = np.maximum(features[:, _DIST_FEATURE_ORDER], 0) / max(w, h)
+    direction = batch_state.direction.astype(np.int64)
+    obs[rows, 8 + direction] = 1.
+    obs[:, 12] = features[:, 4] / w
+    obs[:, 13] = features[:, 5] / h
+    return obs
+
+
+def _neighbor_array(width, height) -> np.ndarray:
+    """`get_neighbor_table` as (cell_num, 4) array"""
+    return np.frombuffer(ssm.get_neighbor_table(width, height), dtype=np.int32).reshape(-1, 4)
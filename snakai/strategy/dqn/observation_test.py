@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+"""test (pytest)
+"""
+import numpy as np
+
+from . import observation
+from ... import batch_snake_state_machine as bssm
+
+
+def test_batch_same_as_scalar():
+    batch_state = bssm.BatchSnakeStateMachine(16, 12, 10, seed=1)
+    batch_state.new_state()
+    rng = np.random.default_rng(1)
+    for _ in range(30):
+        obs = observation.observe_batch(batch_state)
+        assert obs.shape == (16, observation.OBS_SIZE)
+        for i in range(batch_state.batch_size):
+            assert np.allclose(obs[i], observation.observe(batch_state.to_state_machine(i)))
+        batch_state.update_state(rng.integers(0, 4, size=16))
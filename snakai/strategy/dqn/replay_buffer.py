@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""experience replay buffer of observations.
+the same ring buffer as `qlearning.replay_buffer`, but the states are float observation vectors.
+all arrays (including the sampled minibatch) are preallocated.
+"""
+import numpy as np
+
+
+class ReplayBuffer(object):
+    """ring buffer of transitions (obs, action, reward, next_obs, done).
+    when full, the oldest transition is overwritten.
+    """
+    def __init__(self, capacity: int, obs_size: int, batch_size: int, seed=None):
+        if capacity <= 0:
+            raise ValueError(f"capacity should be > 0, got {capacity}")
+        self._capacity = capacity
+        self.obs = np.zeros((capacity, obs_size), dtype=np.float32)
+        self.actions = np.zeros(capacity, dtype=np.int64)
+        self.rewards = np.zeros(capacity, dtype=np.float32)
+        self.next_obs = np.zeros((capacity, obs_size), dtype=np.float32)
+        self.dones = np.zeros(capacity, dtype=bool)
+        self._pos = 0
+        self._size = 0
+        self.added_cnt = 0
+        self._rng = np.random.default_rng(seed)
+        # minibatch output
+        self._batch = (np.zeros((batch_size, obs_size), dtype=np.float32), np.zeros(batch_size, dtype=np.int64),
+            np.zeros(batch_size, dtype=np.float32), np.zeros((batch_size, obs_size), dtype=np.float32),
+            np.zeros(batch_size, dtype=bool))
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def capacity(self):
+        """get capacity"""
+        return self._capacity
+
+    def add_batch(self, obs, actions, rewards, next_obs, dones):
+        """add transitions in arrays, e.g. one step of the batched state machine"""
+        n = len(actions)
+        if n > self._capacity:
+            raise ValueError(f"batch {n} is larger than the capacity {self._capacity}")
+        pos = self._pos
+        end = pos + n
+        if end <= self._capacity:
+            dst = slice(pos, end)
+            for (arr, v) in ((self.obs, obs), (self.actions, actions), (self.rewards, rewards),
+                    (self.next_obs, next_obs), (self.dones, dones)):
+                arr[dst] = v
+        else:
+            idx = np.arange(pos, end) % self._capacity
+            for (arr, v) in ((self.obs, obs), (self.actions, actions), (self.rewards, rewards),
+                    (self.next_obs, next_obs), (self.dones, dones)):
+                arr[idx] = v
+        self._pos = end % self._capacity
+        self._size = min(self._size + n, self._capacity)
+        self.added_cnt += n
+
+    def sample(self):
+        """sample a minibatch uniformly (with replacement).
+        the returned arrays are reused by the next `sample`.
+        Returns
+        ----------
+        (obs, actions, rewards, next_obs, dones) arrays
+        """
+        if self._size == 0:
+            raise ValueError("can't sample from an empty replay buffer")
+        (obs, actions, rewards, next_obs, dones) = self._batch
+        idx = self._rng.integers(0, self._size, size=len(actions))
+        np.take(self.obs, idx, axis=0, out=obs)
+        np.take(self.actions, idx, out=actions)
+        np.take(self.rewards, idx, out=rewards)
+        np.take(self.next_obs, idx, axis=0, out=next_obs)
+        np.take(self.dones, idx, out=dones)
+        return self._batch
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""snake executor strategy based on Deep Q-Network (numpy only, CPU)
+"""
+import argparse
+import logging
+import pathlib
+import typing
+
+import numpy as np
+
+from . import mlp as mlp_module
+from . import observation
+from . import replay_buffer as replay_buffer_module
+from .. import base as strategy_base
+from .. import register
+from ... import snake_state_machine as ssm
+
+logger = logging.getLogger("snakai")
+
+# the network outputs a Q value for each effective direction, action id == direction value
+_ACTION_SIZE = 4
+# direction value -> the direction values which are not opposite to it
+_VALID_ACTIONS = np.array([[d for d in range(_ACTION_SIZE) if not ssm.DirectionUtil.is_opposite(d, cur)]
+    for cur in range(_ACTION_SIZE)], dtype=np.int64)
+_OPPOSITE = np.array([ssm.DirectionUtil.get_opposite(d) for d in range(_ACTION_SIZE)], dtype=np.int64)
+
+
+@register("dqn")
+class DQNStrategy(strategy_base.Strategy):
+    """Deep Q-Network strategy
+    online network + target network, learning from the experience replay.
+    it both has training & infer api.
+    """
+    def __init__(self,
+            is_infer: bool,
+            train_args: typing.Optional[argparse.Namespace],
+            infer_args: typing.Optional[argparse.Namespace]):
+        """init strategy.
+        """
+        if is_infer:
+            model_path = infer_args.model_path
+            if not model_path:
+                model_path = pathlib.Path(__file__).absolute().parent / "output" / "dqn_strategy.npz"
+            with np.load(model_path) as arrays:
+                self._net = mlp_module.MLP.from_state_dict(arrays)
+            if self._net.layer_sizes[0] != observation.OBS_SIZE or self._net.layer_sizes[-1] != _ACTION_SIZE:
+                raise ValueError(f"model {model_path} has layer sizes {self._net.layer_sizes}, "
+                    f"expect input {observation.OBS_SIZE} and output {_ACTION_SIZE}")
+            self._target_net = None
+            self._optimizer = None
+            self._replay_buffer = None
+            self._rng = None
+        else:
+            hidden_sizes = [int(v) for v in train_args.hidden_sizes.split(",") if v]
+            layer_sizes = [observation.OBS_SIZE] + hidden_sizes + [_ACTION_SIZE]
+            self._net = mlp_module.MLP(layer_sizes, seed=train_args.seed)
+            self._target_net = mlp_module.MLP(layer_sizes)
+            self._target_net.copy_from(self._net)
+            self._optimizer = mlp_module.Adam(self._net.params, learning_rate=train_args.learning_rate)
+            self._discount = train_args.discount
+            self._replay_buffer = replay_buffer_module.ReplayBuffer(train_args.replay_capacity,
+                observation.OBS_SIZE, train_args.replay_batch_size, seed=train_args.seed)
+            self._rng = np.random.default_rng(train_args.seed)
+        self._is_infer = is_infer
+
+    def gen_next_action(self, game_state: ssm.SnakeStateMachine, _) -> strategy_base.Action:
+        """greedy action of the game state"""
+        obs = observation.observe(game_state)
+        direction = self.act_batch(obs[None, :], np.array([game_state.direction]))[0]
+        return strategy_base.Action.effective_direction2action(ssm.Direction(int(direction)))
+
+    def act_batch(self, obs: np.ndarray, directions: np.ndarray, exploration_rate: float = 0.) -> np.ndarray:
+        """actions of many games in one forward pass.
+        Parameters
+        ------------
+        obs: (n, OBS_SIZE) observations
+        directions: (n,) current direction values
+        exploration_rate: probability of a random (but valid) action
+
+        Returns
+        ---------
+        (n,) direction values, never the opposite of the current direction
+        """
+        directions = np.asarray(directions, dtype=np.int64)
+        q = self._net.forward(obs)
+        rows = np.arange(len(q))
+        q[rows, _OPPOSITE[directions]] = -np.inf
+        actions = q.argmax(axis=1)
+        if exploration_rate > 0:
+            is_random = self._rng.random(len(actions)) < exploration_rate
+            k = np.count_nonzero(is_random)
+            if k:
+                choices = self._rng.integers(0, _VALID_ACTIONS.shape[1], size=k)
+                actions[is_random] = _VALID_ACTIONS[directions[is_random], choices]
+        return actions
+
+    def learn(self, obs, actions, rewards, next_obs, dones) -> float:
+        """one gradient step on a minibatch (Huber loss of the TD error).
+        Returns
+        ---------
+        the mean loss
+        """
+        next_q = self._target_net.forward(next_obs).max(axis=1)
+        q_targets = rewards + self._discount * np.where(dones, 0., next_q)
+        (q, layer_inputs) = self._net.forward_train(obs)
+        rows = np.arange(len(actions))
+        td_error = q[rows, actions] - q_targets
+        abs_error = np.abs(td_error)
+        loss = np.where(abs_error <= 1., 0.5 * td_error * td_error, abs_error - 0.5).mean()
+        grad_output = np.zeros_like(q)
+        grad_output[rows, actions] = np.clip(td_error, -1., 1.) / len(actions)
+        self._optimizer.step(self._net.backward(layer_inputs, grad_output))
+        return float(loss)
+
+    def learn_from_replay(self) -> float:
+        """one gradient step on a minibatch sampled from the replay buffer"""
+        return self.learn(*self._replay_buffer.sample())
+
+    def sync_target(self):
+        """copy the online network to the target network"""
+        self._target_net.copy_from(self._net)
+
+    @property
+    def replay_buffer(self) -> replay_buffer_module.ReplayBuffer:
+        """experience replay buffer, None in infer"""
+        return self._replay_buffer
+
+    def save(self, model_path):
+        """save the online network, for infer"""
+        with open(model_path, mode="wb") as f:
+            np.savez(f, **self._net.state_dict())
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+"""test (pytest)
+"""
+import argparse
+
+import numpy as np
+
+from . import observation
+from . import strategy as strategy_module
+from . import train
+from ... import batch_snake_state_machine as bssm
+from ... import snake_state_machine as ssm
+
+
+def _train_args(**kwargs):
+    args = argparse.Namespace(win_width=10, win_height=10, batch_games=8, total_steps=200, hidden_sizes="16",
+        learning_rate=1e-3, discount=0.9, init_exploration_rate=1., final_exploration_rate=0.1,
+        exploration_decay_steps=100, replay_capacity=1000, replay_batch_size=32, learning_starts=64,
+        train_interval=1, target_sync_interval=50, seed=1)
+    vars(args).update(kwargs)
+    return args
+
+
+def test_act_batch_is_valid():
+    dqn_strategy = strategy_module.DQNStrategy(is_infer=False, train_args=_train_args(), infer_args=None)
+    batch_state = bssm.BatchSnakeStateMachine(64, 10, 10, seed=1)
+    batch_state.new_state()
+    obs = observation.observe_batch(batch_state)
+    for exploration_rate in (0., 1.):
+        actions = dqn_strategy.act_batch(obs, batch_state.direction, exploration_rate)
+        assert not any(ssm.DirectionUtil.is_opposite(a, d) for (a, d) in zip(actions, batch_state.direction))
+
+
+def test_train_save_and_infer(tmp_path):
+    dqn_strategy = train.train(_train_args())
+    assert dqn_strategy.replay_buffer.added_cnt == 200 * 8
+    model_path = tmp_path / "dqn_strategy.npz"
+    dqn_strategy.save(model_path)
+    infer_strategy = strategy_module.DQNStrategy(is_infer=True, train_args=None,
+        infer_args=argparse.Namespace(model_path=model_path))
+    state = ssm.SnakeStateMachine(10, 10, seed=1)
+    state.new_state()
+    obs = observation.observe(state)[None, :]
+    assert np.array_equal(infer_strategy._net.forward(obs), dqn_strategy._net.forward(obs))
+    action = infer_strategy.gen_next_action(state, None)
+    assert not ssm.DirectionUtil.is_opposite(action.to_direction(), state.direction)
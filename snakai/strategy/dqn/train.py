@@ -0,0 +1,109 @@
+#!python3
+# -*- coding: utf-8 -*-
+"""train DQN strategy
+many games run in `BatchSnakeStateMachine`, so the actions of all games come from one forward pass.
+"""
+import argparse
+import logging
+import pathlib
+
+import numpy as np
+import tqdm
+
+from snakai import batch_snake_state_machine as bssm
+from snakai.strategy.dqn import observation
+from snakai.strategy.dqn import strategy
+from snakai.strategy.qlearning import training_stats as training_stats_module
+from snakai.util import logger as logger_module
+
+logger = logging.getLogger("snakai")
+
+_REWARD_ATE = 1.
+_REWARD_FAIL = -1.
+_REWARD_SUCCESS = 10.
+
+
+def calc_rewards(batch_state: bssm.BatchSnakeStateMachine, pre_score: np.ndarray, is_ok: np.ndarray) -> np.ndarray:
+    """rewards of the last `update_state` (auto reset), pre_score: score before the step"""
+    is_ended = ~is_ok
+    score = np.where(is_ended, batch_state.done_score, batch_state.score)
+    rewards = np.where(score > pre_score, _REWARD_ATE, 0.).astype(np.float32)
+    done_status = batch_state.done_status
+    rewards[is_ended & (done_status == bssm.BatchSnakeStateMachine.InnerStatus.FAIL)] = _REWARD_FAIL
+    rewards[is_ended & (done_status == bssm.BatchSnakeStateMachine.InnerStatus.SUCCESS)] = _REWARD_SUCCESS
+    return rewards
+
+
+def train(args) -> strategy.DQNStrategy:
+    """train and return the strategy"""
+    dqn_strategy = strategy.DQNStrategy(is_infer=False, train_args=args, infer_args=None)
+    batch_state = bssm.BatchSnakeStateMachine(args.batch_games, args.win_width, args.win_height,
+        auto_reset=True, seed=args.seed)
+    batch_state.new_state()
+    replay_buffer = dqn_strategy.replay_buffer
+    stats = training_stats_module.TrainingStats()
+    exploration_delta = ((args.init_exploration_rate - args.final_exploration_rate)
+        / max(args.exploration_decay_steps, 1))
+    exploration_rate = args.init_exploration_rate
+    obs = observation.observe_batch(batch_state)
+    loss = 0.
+    for step in tqdm.tqdm(range(args.total_steps)):
+        actions = dqn_strategy.act_batch(obs, batch_state.direction, exploration_rate)
+        pre_score = batch_state.score.copy()
+        is_ok = batch_state.update_state(actions)
+        rewards = calc_rewards(batch_state, pre_score, is_ok)
+        next_obs = observation.observe_batch(batch_state)
+        # next_obs of the ended games is the reset game, it's ignored by `done`
+        replay_buffer.add_batch(obs, actions, rewards, next_obs, ~is_ok)
+        obs = next_obs
+        for i in np.flatnonzero(~is_ok).tolist():
+            stats.add_episode(int(batch_state.done_score[i]), int(batch_state.done_steps[i]))
+
+        if len(replay_buffer) >= args.learning_starts and step % args.train_interval == 0:
+            loss = dqn_strategy.learn_from_replay()
+        if (step + 1) % args.target_sync_interval == 0:
+            dqn_strategy.sync_target()
+        exploration_rate = max(exploration_rate - exploration_delta, args.final_exploration_rate)
+        if (step + 1) % 1000 == 0:
+            logger.info("train step %d, episodes: %d, avg score: %.2f, avg steps: %.1f, max score: %d, "
+                "loss: %.4f, exploration rate: %.3f", step, stats.episode_cnt, stats.score.mean,
+                stats.steps.mean, stats.score.max_ever, loss, exploration_rate)
+    return dqn_strategy
+
+
+def main():
+    """main process for train"""
+    parser = argparse.ArgumentParser(description="train dqn strategy")
+    parser.add_argument("--win_width", type=int, help="window width", default=60)
+    parser.add_argument("--win_height", type=int, help="window height", default=20)
+    parser.add_argument("--batch_games", type=int, default=64, help="games played together")
+    parser.add_argument("--total_steps", "-ts", type=int, default=20000,
+        help="training steps, every step moves all the games")
+    parser.add_argument("--hidden_sizes", default="64,64", help="comma separated hidden layer sizes")
+    parser.add_argument("--learning_rate", "-lr", type=float, help="learning rate", default=1e-3)
+    parser.add_argument("--discount", type=float, help="discount", default=0.95)
+    parser.add_argument("--init_exploration_rate", type=float, help="initial exporation rate", default=1.)
+    parser.add_argument("--final_exploration_rate", type=float, help="final exporation rate", default=0.02)
+    parser.add_argument("--exploration_decay_steps", type=int, default=10000,
+        help="how many steps the exploration rate decays to the final")
+    parser.add_argument("--replay_capacity", type=int, default=200000, help="experience replay buffer capacity")
+    parser.add_argument("--replay_batch_size", type=int, help="minibatch size of experience replay", default=256)
+    parser.add_argument("--learning_starts", type=int, default=2000,
+        help="start learning after the replay buffer has this many transitions")
+    parser.add_argument("--train_interval", type=int, default=1, help="do one minibatch update every N steps")
+    parser.add_argument("--target_sync_interval", type=int, default=500,
+        help="copy the online network to the target network every N steps")
+    parser.add_argument("--seed", type=int, help="random seed", default=1234)
+    parser.add_argument("--model_save_path", "-o", help="where to save model", required=True)
+    parser.add_argument("--log_level", help="log level", choices=["warning", "info", "debug"], default="info")
+    args = parser.parse_args()
+
+    logger_module.init_logger(name="snakai", fpath="/dev/shm/snakai_dqn_train_log.log",
+        level=args.log_level.upper())
+    dqn_strategy = train(args)
+    pathlib.Path(args.model_save_path).parent.mkdir(parents=True, exist_ok=True)
+    dqn_strategy.save(args.model_save_path)
+
+
+if __name__ == "__main__":
+    main()
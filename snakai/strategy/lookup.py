@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""lookup strategy
+the action of each `StateEncoder` state is precomputed (see `lookup_compile`),
+so a move is one state encoding plus one array indexing.
+
+file: npz of
+    actions: int8 array with shape (state_size,), the action id (`ActionEncoder`) of each state, -1 for unknown
+    spec: json str of {"state_encoder": {"name", "radices"}, "actions": [action values], "source": str}
+"""
+import json
+import pathlib
+
+import numpy as np
+
+from . import base
+from . import register
+from .qlearning import action_encoder as action_encoder_module
+from .qlearning import state_encoder as state_encoder_module
+from .. import snake_state_machine as ssm
+
+UNKNOWN_ACTION = -1
+
+
+@register("lookup")
+class LookupStrategy(base.Strategy):
+    """lookup strategy: state id -> action id
+    for the unknown state (or the action opposite to the current direction), keep the current direction.
+    """
+    def __init__(self, model_path=None):
+        if not model_path:
+            model_path = pathlib.Path(__file__).absolute().parent / "output" / "lookup_policy.npz"
+        self._state_encoder = state_encoder_module.StateEncoder()
+        self._action_encoder = action_encoder_module.ActionEncoder()
+        self._actions = load_policy(model_path, self._state_encoder, self._action_encoder)
+
+    def gen_next_action(self, game_state: ssm.SnakeStateMachine, _) -> base.Action:
+        """action of the encoded state"""
+        aid = self._actions[self._state_encoder.encode(game_state)]
+        if aid == UNKNOWN_ACTION:
+            return base.Action.IDLE
+        action = self._action_encoder.decode(aid)
+        if ssm.DirectionUtil.is_opposite(action.to_direction(), game_state.direction):
+            return base.Action.IDLE
+        return action
+
+    def clear4next(self, _game_state):
+        self._state_encoder.clear()
+
+    @property
+    def actions(self) -> np.ndarray:
+        """state id -> action id"""
+        return self._actions
+
+
+def save_policy(path, actions: np.ndarray, state_encoder: state_encoder_module.StateEncoder,
+        action_encoder: action_encoder_module.ActionEncoder, source=""):
+    """save the compiled policy with its encoder spec"""
+    actions = np.asarray(actions, dtype=np.int8)
+    if actions.shape != (state_encoder.size,):
+        raise ValueError(f"policy shape {actions.shape} doesn't match the state size {state_encoder.size}")
+    spec = _encoder_spec(state_encoder, action_encoder)
+    spec["source"] = source
+    with open(path, mode="wb") as f:
+        np.savez(f, actions=actions, spec=np.array(json.dumps(spec)))
+
+
+def load_policy(path, state_encoder: state_encoder_module.StateEncoder,
+        action_encoder: action_encoder_module.ActionEncoder) -> np.ndarray:
+    """load the compiled policy (state id -> action id).
+    raise ValueError if the file is not compatible with the encoders.
+    """
+    with np.load(path) as arrays:
+        spec = json.loads(str(arrays["spec"]))
+        actions = arrays["actions"]
+    expect = _encoder_spec(state_encoder, action_encoder)
+    if {k: spec.get(k) for k in expect} != expect:
+        raise ValueError(f"encoders of policy {path} is {spec}, not compatible with current {expect}")
+    return actions
+
+
+def _encoder_spec(state_encoder, action_encoder) -> dict:
+    return {
+        "state_encoder": {"name": type(state_encoder).__name__, "radices": list(state_encoder.radices)},
+        "actions": [a.value for a in action_encoder.actions],
+    }
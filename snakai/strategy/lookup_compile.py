@@ -0,0 +1,107 @@
+#!python3
+# -*- coding: utf-8 -*-
+"""compile a strategy into a lookup policy (see `lookup`).
+
+- qlearning: the policy only depends on the state, so all the states are enumerated from the Q table.
+- others (e.g. rule_based): sample the states by playing games, record the action the strategy chooses
+    in each state, and take the most voted action (the strategy may decide by more than the encoded state).
+"""
+import argparse
+import logging
+
+import numpy as np
+import tqdm
+
+from snakai import snake_state_machine as ssm
+from snakai import strategy as strategy_module
+from snakai.strategy import lookup
+from snakai.strategy.qlearning import action_encoder as action_encoder_module
+from snakai.strategy.qlearning import state_encoder as state_encoder_module
+
+logger = logging.getLogger("snakai")
+
+
+def compile_by_sampling(strategy, game_num, width, height, exploration_rate=0.1, seed=None):
+    """play `game_num` games and vote the action of each visited state.
+    with `exploration_rate`, a random valid direction is taken instead of the strategy's choice
+    (which is still voted), to visit more states.
+    Returns
+    ---------
+    (actions, votes): int8 array of action ids (unknown state is -1), int array of (state_size, action_size)
+    """
+    state_encoder = state_encoder_module.StateEncoder()
+    action_encoder = action_encoder_module.ActionEncoder()
+    votes = np.zeros((state_encoder.size, action_encoder.size), dtype=np.int64)
+    rng = np.random.default_rng(seed)
+    state = ssm.SnakeStateMachine(width, height, seed=seed)
+    for _ in tqdm.tqdm(range(game_num)):
+        state.new_state()
+        while state.is_state_ok():
+            state_id = state_encoder.encode(state)
+            direction = _action2direction(strategy.gen_next_action(state, None))
+            if direction == ssm.Direction.NONE or ssm.DirectionUtil.is_opposite(direction, state.direction):
+                # the game keeps the current direction
+                direction = state.direction
+            votes[state_id, action_encoder.encode_direction(direction)] += 1
+            if rng.random() < exploration_rate:
+                valid_ids = action_encoder.valid_ids(state.direction)
+                direction = action_encoder.decode_direction(valid_ids[rng.integers(len(valid_ids))])
+            state.update_state(direction)
+        strategy.clear4next(state)
+        state_encoder.clear()
+    return (_vote(votes), votes)
+
+
+def compile_qlearning(ql_strategy) -> np.ndarray:
+    """the greedy action of every state in the Q table, the state with all zero scores is unknown (-1).
+    decided by the scores (not the update counts), so it also works for the memmap model (see `model_io`).
+    """
+    weights = ql_strategy._qtable.to_dense().weights
+    actions = weights.argmax(axis=1).astype(np.int8)
+    actions[~weights.any(axis=1)] = lookup.UNKNOWN_ACTION
+    return actions
+
+
+def _vote(votes: np.ndarray) -> np.ndarray:
+    actions = votes.argmax(axis=1).astype(np.int8)
+    actions[votes.sum(axis=1) == 0] = lookup.UNKNOWN_ACTION
+    return actions
+
+
+def _action2direction(action) -> ssm.Direction:
+    """direction of the move action, NONE for the others (IDLE etc.)"""
+    try:
+        return action.to_direction()
+    except KeyError:
+        return ssm.Direction.NONE
+
+
+def main():
+    """compile strategy"""
+    parser = argparse.ArgumentParser(description="compile a strategy into a lookup policy")
+    parser.add_argument("--strategy", "-s", required=True,
+        choices=[n for n in strategy_module.get_names() if n not in ("manual", "lookup")])
+    parser.add_argument("--model_path", help="model of the strategy (for qlearning, dqn)")
+    parser.add_argument("--games", type=int, default=2000, help="games to sample the states")
+    parser.add_argument("--width", type=int, default=60, help="board width to sample the states")
+    parser.add_argument("--height", type=int, default=20, help="board height to sample the states")
+    parser.add_argument("--exploration_rate", type=float, default=0.1,
+        help="probability of a random move when sampling, to visit more states")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--output", "-o", required=True, help="policy path, e.g. output/lookup_policy.npz")
+    args = parser.parse_args()
+
+    strategy = strategy_module.init_strategy(args.strategy, args)
+    if args.strategy == "qlearning":
+        actions = compile_qlearning(strategy)
+    else:
+        (actions, _) = compile_by_sampling(strategy, args.games, args.width, args.height,
+            exploration_rate=args.exploration_rate, seed=args.seed)
+    known = np.count_nonzero(actions != lookup.UNKNOWN_ACTION)
+    print(f"known states: {known}/{len(actions)} ({known / len(actions):.2%})")
+    lookup.save_policy(args.output, actions, state_encoder_module.StateEncoder(),
+        action_encoder_module.ActionEncoder(), source=args.strategy)
+
+
+if __name__ == "__main__":
+    main()
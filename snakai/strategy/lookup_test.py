@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""test (pytest)
+"""
+import argparse
+
+import numpy as np
+import pytest
+
+from . import lookup
+from . import lookup_compile
+from . import rule_based
+from .qlearning import action_encoder as action_encoder_module
+from .qlearning import state_encoder as state_encoder_module
+from .qlearning import strategy as ql_strategy_module
+from .. import snake_state_machine as ssm
+
+
+def test_compile_save_and_play(tmp_path):
+    (actions, votes) = lookup_compile.compile_by_sampling(rule_based.RuleBased(), game_num=20, width=12, height=10,
+        seed=1)
+    assert actions.dtype == np.int8
+    known = votes.sum(axis=1) > 0
+    assert known.any()
+    assert np.array_equal(actions[known], votes[known].argmax(axis=1))
+    assert np.all(actions[~known] == lookup.UNKNOWN_ACTION)
+
+    policy_path = tmp_path / "policy.npz"
+    lookup.save_policy(policy_path, actions, state_encoder_module.StateEncoder(),
+        action_encoder_module.ActionEncoder(), source="rule_based")
+    lookup_strategy = lookup.LookupStrategy(policy_path)
+    assert np.array_equal(lookup_strategy.actions, actions)
+    state = ssm.SnakeStateMachine(12, 10, seed=2)
+    state.new_state()
+    while state.is_state_ok():
+        action = lookup_strategy.gen_next_action(state, None)
+        state.update_state(ssm.Direction.NONE if action == lookup.base.Action.IDLE else action.to_direction())
+    lookup_strategy.clear4next(state)
+
+
+def test_incompatible_policy(tmp_path, monkeypatch):
+    policy_path = tmp_path / "policy.npz"
+    state_encoder = state_encoder_module.StateEncoder()
+    lookup.save_policy(policy_path, np.zeros(state_encoder.size, dtype=np.int8), state_encoder,
+        action_encoder_module.ActionEncoder())
+    monkeypatch.setattr(state_encoder_module.StateEncoder, "radices", property(lambda self: [1, 2, 3]))
+    with pytest.raises(ValueError):
+        lookup.LookupStrategy(policy_path)
+
+
+def test_warm_start_qtable(tmp_path):
+    train_args = argparse.Namespace(learning_rate=0.1, discount=0.9, init_exploration_rate=0.,
+        exploration_decay_iter=10, seed=1, replay_capacity=0, replay_batch_size=0, replay_interval=0,
+        qtable_backend="sparse")
+    ql_strategy = ql_strategy_module.QLearningStrategy(is_infer=False, train_args=train_args, infer_args=None)
+    policy = np.full(ql_strategy._state_encoder.size, lookup.UNKNOWN_ACTION, dtype=np.int8)
+    policy[[3, 10, 42]] = [1, 2, 3]
+    assert ql_strategy.warm_start(policy, score=0.5) == 3
+    # the warm started Q table compiles back to the same policy
+    assert np.array_equal(lookup_compile.compile_qlearning(ql_strategy), policy)
+    # and so does the memmap model, which has no update counts
+    model_path = tmp_path / "ql_strategy.qtable"
+    ql_strategy.export_model(model_path)
+    infer_strategy = ql_strategy_module.QLearningStrategy(is_infer=True, train_args=None,
+        infer_args=argparse.Namespace(model_path=model_path))
+    assert np.array_equal(lookup_compile.compile_qlearning(infer_strategy), policy)
@@ -2,20 +2,33 @@
 """action encoder: Game Action <-> id
 """
 
+from snakai import snake_state_machine as ssm
 from snakai.strategy import base as S
 
+_ACTIONS = [
+    S.Action.MOVE_UP,
+    S.Action.MOVE_DOWN,
+    S.Action.MOVE_LEFT,
+    S.Action.MOVE_RIGHT
+]
+
+# flat lookup tables: action value -> id, id -> direction, direction -> id
+_ACTION_VALUE2ID = [None] * (max(a.value for a in S.Action) + 1)
+for (_idx, _act) in enumerate(_ACTIONS):
+    _ACTION_VALUE2ID[_act.value] = _idx
+_ID2DIRECTION = tuple(act.to_direction() for act in _ACTIONS)
+_DIRECTION2ID = tuple(_ID2DIRECTION.index(d) for d in sorted(_ID2DIRECTION))
+# direction -> ids of the actions except the opposite one (for NONE, all actions)
+_DIRECTION2VALID_IDS = tuple(
+    tuple(_i for (_i, _d) in enumerate(_ID2DIRECTION) if not ssm.DirectionUtil.is_opposite(_d, d))
+    for d in ssm.Direction)
+
+
 class ActionEncoder(object):
     """action encoder.
     from inner action (idx) to game action
     """
-    _ACTIONS = [
-        S.Action.MOVE_UP,
-        S.Action.MOVE_DOWN,
-        S.Action.MOVE_LEFT,
-        S.Action.MOVE_RIGHT
-    ]
-
-    _ACTION2ID = dict((act, idx) for (idx, act) in enumerate(_ACTIONS))
+    _ACTIONS = _ACTIONS
 
     @classmethod
     def decode(cls, aid) -> S.Action:
@@ -25,7 +38,25 @@ class ActionEncoder(object):
     @classmethod
     def encode(cls, action) -> int:
         """action to id"""
-        return cls._ACTION2ID[action]
+        aid = _ACTION_VALUE2ID[action.value]
+        if aid is None:
+            raise KeyError(action)
+        return aid
+
+    @classmethod
+    def decode_direction(cls, aid) -> ssm.Direction:
+        """inner action id to direction"""
+        return _ID2DIRECTION[aid]
+
+    @classmethod
+    def encode_direction(cls, d: ssm.Direction) -> int:
+        """effective direction to action id"""
+        return _DIRECTION2ID[d]
+
+    @classmethod
+    def valid_ids(cls, d: ssm.Direction) -> tuple:
+        """ids of the actions which is not opposite to the current direction"""
+        return _DIRECTION2VALID_IDS[d]
 
     @property
     def actions(self):
@@ -36,4 +67,4 @@ class ActionEncoder(object):
     def size(self):
         """get action size
         """
-        return len(self._ACTIONS)
\ No newline at end of file
+        return len(self._ACTIONS)
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""batched Q-learning training.
+
+`args.batch_games` games run in one `BatchSnakeStateMachine` (auto reset), every step
+    1. encodes the states of all the games by `StateEncoder.encode_batch`,
+    2. chooses the actions by `QLearningStrategy.act_batch`, moves all the games by one `update_state`,
+    3. learns the transitions by `QLearningStrategy.learn_batch` (`QTable.update_batch`).
+so a step of all the games is a few numpy ops instead of a python loop over the games.
+"""
+import logging
+import pathlib
+import pickle
+
+import numpy as np
+import tqdm
+
+from . import action_encoder as action_encoder_module
+from . import strategy
+from ... import batch_snake_state_machine as bssm
+
+logger = logging.getLogger("snakai")
+
+# action id -> direction value
+_ACTION_ID2DIRECTION = np.array([action_encoder_module.ActionEncoder.decode_direction(i)
+    for i in range(action_encoder_module.ActionEncoder().size)], dtype=np.int8)
+
+
+class BatchHeadHistory(object):
+    """is-repeat feature of every game, the same as `IsRepeatEncoder` of each game:
+    whether the head has been visited since the last food eaten (or the game started).
+    """
+    def __init__(self, batch_state: bssm.BatchSnakeStateMachine):
+        cell_num = batch_state.state_width * batch_state.state_height
+        self._visited = np.zeros((batch_state.batch_size, cell_num), dtype=bool)
+        self._score = np.full(batch_state.batch_size, -1, dtype=np.int64)
+        self._rows = np.arange(batch_state.batch_size)
+
+    def update(self, batch_state: bssm.BatchSnakeStateMachine, is_reset=None) -> np.ndarray:
+        """visit the current heads.
+        is_reset: bool array, the games which are new since the last update
+        Returns
+        ---------
+        bool array, whether the head has been visited
+        """
+        score = batch_state.score
+        is_cleared = score != self._score
+        if is_reset is not None:
+            is_cleared |= is_reset
+        if is_cleared.any():
+            self._visited[is_cleared] = False
+            self._score[is_cleared] = score[is_cleared]
+        heads = batch_state.heads()
+        is_repeat = self._visited[self._rows, heads]
+        self._visited[self._rows, heads] = True
+        return is_repeat
+
+
+def train_batch(args):
+    """train with `args.batch_games` games in a batch"""
+    ql_strategy = strategy.QLearningStrategy(is_infer=False, train_args=args, infer_args=None)
+    state_encoder = ql_strategy._state_encoder
+    reward_calc = ql_strategy._reward_calc
+    batch_state = bssm.BatchSnakeStateMachine(args.batch_games, args.win_width, args.win_height,
+        auto_reset=True, seed=args.seed)
+    batch_state.new_state()
+    head_history = BatchHeadHistory(batch_state)
+    state_ids = state_encoder.encode_batch([batch_state.dist_features(), head_history.update(batch_state)])
+
+    finished_iter = 0
+    with tqdm.tqdm(total=args.total_iter) as pbar:
+        while finished_iter < args.total_iter:
+            action_ids = ql_strategy.act_batch(state_ids, batch_state.direction)
+            pre_score = batch_state.score.copy()
+            pre_remaining_steps = batch_state.remaining_steps.copy()
+            is_ok = batch_state.update_state(_ACTION_ID2DIRECTION[action_ids])
+            rewards = reward_calc.calc_batch(batch_state, is_ok, pre_score, pre_remaining_steps)
+            # the ended games have been reset, their next states are ignored in learning
+            next_state_ids = state_encoder.encode_batch([batch_state.dist_features(),
+                head_history.update(batch_state, is_reset=~is_ok)])
+            ql_strategy.learn_batch(state_ids, action_ids, rewards, next_state_ids, ~is_ok)
+            state_ids = next_state_ids
+
+            ended_idx = np.flatnonzero(~is_ok)[:args.total_iter - finished_iter]
+            if len(ended_idx) == 0:
+                continue
+            ql_strategy.add_batch_episodes(batch_state.done_score[ended_idx].tolist(),
+                batch_state.done_steps[ended_idx].tolist())
+            pre_finished_iter = finished_iter
+            finished_iter += len(ended_idx)
+            pbar.update(len(ended_idx))
+            if finished_iter // 500 > pre_finished_iter // 500:
+                stats = ql_strategy.training_stats
+                logger.info("train iter %d, avg score: %.2f, avg steps: %.1f, max score: %d, "
+                    "table-filling ratio: %.2f%%", finished_iter, stats.score.mean, stats.steps.mean,
+                    stats.score.max_ever, ql_strategy.table_filling_ratio() * 100)
+
+    ql_strategy.clear4next(None)
+    pathlib.Path(args.model_save_path).parent.mkdir(parents=True, exist_ok=True)
+    with open(args.model_save_path, mode="wb") as outputf:
+        pickle.dump(obj=ql_strategy, file=outputf)
+    (_ratio, _fill_cnt, _state_cnt) = ql_strategy._qtable.table_filling_ratio(return_detail=True)
+    print(f"table filling ratio: {_ratio:.2%}({_fill_cnt}/{_state_cnt})")
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""test (pytest)
+"""
+import argparse
+import pickle
+
+import numpy as np
+
+from . import batch_train
+from . import reward
+from .state_encoder import StateEncoder
+from ... import batch_snake_state_machine as bssm
+from ... import snake_state_machine as ssm
+
+
+def test_encode_batch_same_as_scalar():
+    batch_state = bssm.BatchSnakeStateMachine(16, width=10, height=10, seed=1)
+    batch_state.new_state()
+    head_history = batch_train.BatchHeadHistory(batch_state)
+    batch_encoder = StateEncoder()
+    encoders = [StateEncoder() for _ in range(batch_state.batch_size)]
+    rng = np.random.default_rng(2)
+    is_ok = np.ones(batch_state.batch_size, dtype=bool)
+    repeat_cnt = 0
+    for _ in range(300):
+        is_repeat = head_history.update(batch_state, is_reset=~is_ok)
+        state_ids = batch_encoder.encode_batch([batch_state.dist_features(), is_repeat])
+        for (i, encoder) in enumerate(encoders):
+            if not is_ok[i]:
+                encoder.clear()
+            assert state_ids[i] == encoder.encode(batch_state.to_state_machine(i))
+        repeat_cnt += np.count_nonzero(is_repeat)
+        is_ok = batch_state.update_state(rng.integers(0, 4, size=batch_state.batch_size))
+    assert repeat_cnt > 0
+
+
+def test_calc_batch_reward():
+    batch_state = bssm.BatchSnakeStateMachine(4, width=10, height=10, auto_reset=False, seed=1)
+    batch_state.new_state()
+    # 0: starved; 1: collides with the last step; 2, 3: collide
+    batch_state.remaining_steps[0] = 1
+    calc = reward.NaiveRewardCalc()
+    rewards = np.zeros(batch_state.batch_size, dtype=np.float32)
+    while (batch_state.status == ssm.SnakeStateMachine.InnerStatus.RUNNING).any():
+        # keep going straight, the food is never in the same row at the start
+        head_x = batch_state.heads() % batch_state.state_width
+        at_edge = np.where(batch_state.direction == ssm.Direction.LEFT, head_x == 0,
+            head_x == batch_state.state_width - 1)
+        if at_edge[1]:
+            batch_state.remaining_steps[1] = 1
+        is_running = batch_state.status == ssm.SnakeStateMachine.InnerStatus.RUNNING
+        (pre_score, pre_remaining_steps) = (batch_state.score.copy(), batch_state.remaining_steps.copy())
+        is_ok = batch_state.update_state(batch_state.direction)
+        step_rewards = calc.calc_batch(batch_state, is_ok, pre_score, pre_remaining_steps)
+        rewards[is_running] = step_rewards[is_running]
+    assert rewards.tolist() == [-1., -1., -5., -5.]
+
+
+def test_train_batch(tmp_path):
+    args = argparse.Namespace(win_width=10, win_height=10, learning_rate=0.1, discount=0.9,
+        init_exploration_rate=0.5, exploration_decay_iter=200, seed=1, total_iter=300, batch_games=32,
+        replay_capacity=0, replay_batch_size=32, replay_interval=8, qtable_backend="dense",
+        model_save_path=str(tmp_path / "model.pickle"))
+    batch_train.train_batch(args)
+    with open(args.model_save_path, mode="rb") as f:
+        ql_strategy = pickle.load(f)
+    assert ql_strategy.training_stats.episode_cnt == 300
+    assert ql_strategy._exploration_rate < 0.5
+    assert ql_strategy.table_filling_ratio() > 0
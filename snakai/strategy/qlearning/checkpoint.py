@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""training checkpoint.
+
+the snapshot (strategy with Q table, exploration rate, random states, replay buffer,
+the game state machine frame and the next iteration) is pickled into bytes in the training thread,
+then a background thread writes it to a temp file and atomically replaces the checkpoint by `os.replace`.
+so the training loop only pays for the in-memory copy, and the checkpoint file is always complete.
+"""
+import logging
+import os
+import pickle
+import threading
+import time
+
+from ... import snake_state_machine as ssm
+
+logger = logging.getLogger("snakai")
+
+_VERSION = 1
+
+
+def dumps(ql_strategy, game_state: ssm.SnakeStateMachine, next_iter: int) -> bytes:
+    """snapshot to bytes, should be called between episodes"""
+    return pickle.dumps({
+        "version": _VERSION,
+        "strategy": ql_strategy,
+        # replay buffer is not pickled with the strategy (see `QLearningStrategy.__getstate__`)
+        "replay_buffer": ql_strategy._replay_buffer,
+        "game_frame": game_state.export_frame(),
+        "next_iter": next_iter,
+    }, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def load(path, game_state: ssm.SnakeStateMachine):
+    """load checkpoint, restore the game state machine in place.
+    Returns
+    ---------
+    (ql_strategy, next_iter)
+    """
+    with open(path, mode="rb") as f:
+        snapshot = pickle.load(f)
+    if snapshot["version"] != _VERSION:
+        raise ValueError(f"unsupported checkpoint version {snapshot['version']}, expect {_VERSION}")
+    ql_strategy = snapshot["strategy"]
+    ql_strategy._replay_buffer = snapshot["replay_buffer"]
+    game_state.load_frame(snapshot["game_frame"])
+    return (ql_strategy, snapshot["next_iter"])
+
+
+class Checkpointer(object):
+    """save checkpoint every `interval_iter` iterations or `interval_seconds` seconds (0 to disable either).
+    only the latest snapshot is kept if the writing is slower than snapshotting.
+    """
+    def __init__(self, path, interval_iter=0, interval_seconds=0.):
+        self._path = str(path)
+        self._interval_iter = interval_iter
+        self._interval_seconds = interval_seconds
+        self._last_iter = None
+        self._last_time = time.monotonic()
+
+        self._cond = threading.Condition()
+        self._pending = None
+        self._is_closed = False
+        self._writer = threading.Thread(target=self._write_loop, name="checkpoint-writer", daemon=True)
+        self._writer.start()
+
+    def maybe_save(self, next_iter: int, ql_strategy, game_state: ssm.SnakeStateMachine) -> bool:
+        """snapshot if it's due. next_iter: the iteration to start from when resuming"""
+        if self._last_iter is None:
+            self._last_iter = next_iter - 1
+        is_due = ((self._interval_iter > 0 and next_iter - self._last_iter >= self._interval_iter)
+            or (self._interval_seconds > 0 and time.monotonic() - self._last_time >= self._interval_seconds))
+        if not is_due:
+            return False
+        self.save(next_iter, ql_strategy, game_state)
+        return True
+
+    def save(self, next_iter: int, ql_strategy, game_state: ssm.SnakeStateMachine):
+        """snapshot now, write in background"""
+        data = dumps(ql_strategy, game_state, next_iter)
+        self._last_iter = next_iter
+        self._last_time = time.monotonic()
+        with self._cond:
+            self._pending = data
+            self._cond.notify()
+
+    def close(self):
+        """wait for the pending snapshot written and stop the writer"""
+        with self._cond:
+            self._is_closed = True
+            self._cond.notify()
+        self._writer.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def _write_loop(self):
+        while True:
+            with self._cond:
+                while self._pending is None and not self._is_closed:
+                    self._cond.wait()
+                (data, self._pending) = (self._pending, None)
+                if data is None:
+                    return
+            try:
+                _atomic_write(self._path, data)
+            except OSError:
+                logger.exception("failed to write checkpoint %s", self._path)
+
+
+def _atomic_write(path, data: bytes):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, mode="wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+"""test (pytest)
+"""
+import argparse
+import pickle
+
+import numpy as np
+
+from . import train
+
+
+def _train_args(tmp_path, **kwargs):
+    args = argparse.Namespace(win_width=10, win_height=10, learning_rate=0.1, discount=0.9,
+        init_exploration_rate=0.5, exploration_decay_iter=20, seed=1, total_iter=30,
+        replay_capacity=1000, replay_batch_size=32, replay_interval=8, qtable_backend="dense",
+        model_save_path=str(tmp_path / "model.pickle"), checkpoint_path=None, checkpoint_iter=0,
+        checkpoint_seconds=0., resume=False, warm_start_policy=None, warm_start_score=1.)
+    vars(args).update(kwargs)
+    return args
+
+
+def _load_model(args):
+    with open(args.model_save_path, mode="rb") as f:
+        return pickle.load(f)
+
+
+def test_resume_exactly(tmp_path):
+    # checkpoint at iter 20 (of 30)
+    args = _train_args(tmp_path, checkpoint_iter=20)
+    train.train_without_ui(args)
+    uninterrupted = _load_model(args)
+    args = _train_args(tmp_path, resume=True)
+    train.train_without_ui(args)
+    resumed = _load_model(args)
+
+    assert resumed.training_stats.episode_cnt == 30
+    assert np.array_equal(resumed._qtable.weights, uninterrupted._qtable.weights)
+    assert resumed._exploration_rate == uninterrupted._exploration_rate
+    assert list(resumed.training_stats.score._values) == list(uninterrupted.training_stats.score._values)
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""memory-mappable Q-Learning model format.
+
+only the Q table is saved (no training state), and it can be opened by `np.memmap` without reading it,
+so loading is independent of the model size and processes loading the same model share the page cache.
+
+file layout:
+    magic(4s) version(B) header_size(I)        -- little endian
+    header: utf-8 json, padded with spaces to `_ALIGNMENT`
+        {"state_encoder": {"name", "radices"}, "actions": [action values],
+         "shape": [state_size, action_size], "dtype": numpy dtype str}
+    payload: Q table in C order
+"""
+import argparse
+import json
+import pickle
+import struct
+
+import numpy as np
+
+from . import action_encoder as action_encoder_module
+from . import state_encoder as state_encoder_module
+from . import qtable as qtable_module
+
+_MAGIC = b"SNKQ"
+_VERSION = 1
+_PREFIX = struct.Struct("<4sBI")
+_ALIGNMENT = 64
+
+
+def is_model_file(path) -> bool:
+    """whether the file is in this format (otherwise, it may be a pickled strategy)"""
+    with open(path, mode="rb") as f:
+        return f.read(len(_MAGIC)) == _MAGIC
+
+
+def save_qtable(path, qtable: qtable_module.QTable, state_encoder: state_encoder_module.StateEncoder,
+        action_encoder: action_encoder_module.ActionEncoder):
+    """save the Q table with its encoder spec"""
+    weights = np.ascontiguousarray(qtable.weights)
+    header = {
+        "state_encoder": _state_encoder_spec(state_encoder),
+        "actions": [a.value for a in action_encoder.actions],
+        "shape": list(weights.shape),
+        "dtype": weights.dtype.str,
+    }
+    header = json.dumps(header).encode("utf-8")
+    payload_offset = -(-(_PREFIX.size + len(header)) // _ALIGNMENT) * _ALIGNMENT
+    header = header.ljust(payload_offset - _PREFIX.size, b" ")
+    with open(path, mode="wb") as f:
+        f.write(_PREFIX.pack(_MAGIC, _VERSION, len(header)))
+        f.write(header)
+        f.write(weights.tobytes())
+
+
+def load_qtable(path, state_encoder: state_encoder_module.StateEncoder,
+        action_encoder: action_encoder_module.ActionEncoder) -> qtable_module.QTable:
+    """open the Q table read-only by memmap.
+    raise ValueError if the file is not compatible with the encoders.
+    """
+    (header, payload_offset) = _read_header(path)
+    if header["state_encoder"] != _state_encoder_spec(state_encoder):
+        raise ValueError(f"state encoder of model {path} is {header['state_encoder']}, "
+            f"not compatible with current {_state_encoder_spec(state_encoder)}")
+    if header["actions"] != [a.value for a in action_encoder.actions]:
+        raise ValueError(f"actions of model {path} is {header['actions']}, not compatible with current")
+    weights = np.memmap(path, dtype=np.dtype(header["dtype"]), mode="r", offset=payload_offset,
+        shape=tuple(header["shape"]))
+    return qtable_module.QTable.from_weights(weights)
+
+
+def convert_pickle(pickle_path, model_path):
+    """convert a pickled `QLearningStrategy` to this format"""
+    with open(pickle_path, mode="rb") as f:
+        ql_strategy = pickle.load(f)
+    save_qtable(model_path, ql_strategy._qtable.to_dense(), ql_strategy._state_encoder,
+        ql_strategy._action_encoder)
+
+
+def _read_header(path):
+    with open(path, mode="rb") as f:
+        (magic, version, header_size) = _PREFIX.unpack(f.read(_PREFIX.size))
+        if magic != _MAGIC:
+            raise ValueError(f"not a q-learning model file: {path}")
+        if version != _VERSION:
+            raise ValueError(f"unsupported model version {version}, expect {_VERSION}")
+        header = json.loads(f.read(header_size).decode("utf-8"))
+    return (header, _PREFIX.size + header_size)
+
+
+def _state_encoder_spec(state_encoder) -> dict:
+    return {"name": type(state_encoder).__name__, "radices": list(state_encoder.radices)}
+
+
+def main():
+    """convert pickled strategy to memmap model"""
+    parser = argparse.ArgumentParser(description="convert pickled q-learning strategy to memmap model")
+    parser.add_argument("pickle_path", help="pickled strategy, e.g. output/ql_strategy.pickle")
+    parser.add_argument("model_path", help="output model path, e.g. output/ql_strategy.qtable")
+    args = parser.parse_args()
+    convert_pickle(args.pickle_path, args.model_path)
+
+
+if __name__ == "__main__":
+    main()
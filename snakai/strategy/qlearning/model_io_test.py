@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""test (pytest)
+"""
+import argparse
+import pickle
+
+import numpy as np
+import pytest
+
+from . import model_io
+from . import strategy as strategy_module
+from .state_encoder import StateEncoder
+from ... import snake_state_machine as ssm
+
+
+def test_convert_and_load(tmp_path):
+    train_args = argparse.Namespace(learning_rate=0.1, discount=0.9, init_exploration_rate=0.5,
+        exploration_decay_iter=10, seed=1, replay_capacity=0, replay_batch_size=0, replay_interval=0,
+        qtable_backend="dense")
+    ql_strategy = strategy_module.QLearningStrategy(is_infer=False, train_args=train_args, infer_args=None)
+    state = ssm.SnakeStateMachine(width=10, height=10, seed=1)
+    for _ in range(5):
+        state.new_state()
+        while state.is_state_ok():
+            state.update_state(ql_strategy.gen_next_action(state, None).to_direction())
+            ql_strategy.update(state)
+        ql_strategy.clear4next(state)
+    pickle_path = tmp_path / "ql_strategy.pickle"
+    with open(pickle_path, mode="wb") as f:
+        pickle.dump(ql_strategy, f)
+    model_path = tmp_path / "ql_strategy.qtable"
+    model_io.convert_pickle(pickle_path, model_path)
+    assert model_io.is_model_file(model_path)
+    assert not model_io.is_model_file(pickle_path)
+
+    infer_strategy = strategy_module.QLearningStrategy(is_infer=True, train_args=None,
+        infer_args=argparse.Namespace(model_path=model_path))
+    assert isinstance(infer_strategy._qtable.weights, np.memmap)
+    assert np.array_equal(infer_strategy._qtable.weights, ql_strategy._qtable.weights)
+    state.new_state()
+    infer_strategy.gen_next_action(state, None)
+
+
+def test_incompatible_encoder(tmp_path, monkeypatch):
+    state_encoder = StateEncoder()
+    ql_strategy_cls = strategy_module.QLearningStrategy
+    qtable = strategy_module.qtable_module.QTable(state_encoder.size, 4)
+    model_path = tmp_path / "m.qtable"
+    model_io.save_qtable(model_path, qtable, state_encoder, strategy_module.action_encoder.ActionEncoder())
+    monkeypatch.setattr(StateEncoder, "radices", property(lambda self: [3, 2]))
+    with pytest.raises(ValueError):
+        ql_strategy_cls(is_infer=True, train_args=None, infer_args=argparse.Namespace(model_path=model_path))
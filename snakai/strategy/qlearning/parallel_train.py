@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+"""multi-process Q-learning training.
+
+every worker process holds its own `QLearningStrategy` and `SnakeStateMachine` (with distinct seeds),
+and trains `sync_interval` games per round from the latest broadcasted Q table.
+after a round, the worker sends its Q table delta of the updated entries back,
+the coordinator merges the deltas (update-count weighted mean) and broadcasts the merged table.
+
+exploration rate of worker i follows the Ape-X schedule: eps ** (1 + alpha * i / (N - 1)),
+so some workers explore a lot while others are nearly greedy.
+
+with `hogwild`, there is no synchronization: the Q table lives in shared memory,
+all the workers update it in place without lock and the coordinator only monitors it.
+"""
+import argparse
+import copy
+import logging
+import multiprocessing
+import pathlib
+import pickle
+import time
+import traceback
+
+import numpy as np
+import tqdm
+
+from . import action_encoder
+from . import state_encoder
+from . import strategy
+from . import qtable as qtable_module
+from ... import snake_state_machine as ssm
+
+logger = logging.getLogger("snakai")
+
+_APEX_ALPHA = 7.
+
+
+def worker_exploration_rate(init_rate: float, worker_idx: int, worker_num: int) -> float:
+    """Ape-X style exploration rate of each worker"""
+    if worker_num <= 1:
+        return init_rate
+    return init_rate ** (1. + _APEX_ALPHA * worker_idx / (worker_num - 1))
+
+
+def train_parallel(args):
+    """train with `args.workers` processes"""
+    worker_num = args.workers
+    ql_strategy = strategy.QLearningStrategy(is_infer=False, train_args=args, infer_args=None)
+    qtable = ql_strategy._qtable
+
+    ctx = multiprocessing.get_context()
+    conns = []
+    procs = []
+    for worker_idx in range(worker_num):
+        (conn, worker_conn) = ctx.Pipe()
+        proc = ctx.Process(target=_worker_loop, args=(worker_conn, _worker_args(args, worker_idx)), daemon=True)
+        proc.start()
+        worker_conn.close()
+        conns.append(conn)
+        procs.append(proc)
+
+    try:
+        with tqdm.tqdm(total=args.total_iter) as pbar:
+            remaining_iter = args.total_iter
+            while remaining_iter > 0:
+                round_iters = _split_iters(min(remaining_iter, worker_num * args.sync_interval), worker_num)
+                weights = qtable.weights
+                for (conn, proc, iter_num) in zip(conns, procs, round_iters):
+                    try:
+                        conn.send((weights, iter_num))
+                    except (BrokenPipeError, OSError):
+                        # the worker has exited, raise with its error
+                        _recv_result(conn, proc)
+                        raise
+                results = [_recv_result(conn, proc) for (conn, proc) in zip(conns, procs)]
+                _merge_deltas(qtable, results)
+                remaining_iter -= sum(round_iters)
+                pbar.update(sum(round_iters))
+                (scores, steps) = (sum(r[3] for r in results), sum(r[4] for r in results))
+                logger.info("remaining iter %d, avg score: %.2f, avg steps: %.1f, table-filling ratio: %.2f%%",
+                    remaining_iter, scores / sum(round_iters), steps / sum(round_iters),
+                    qtable.table_filling_ratio() * 100)
+    except BaseException:
+        # the other workers may be blocked on sending their results
+        for proc in procs:
+            proc.terminate()
+        raise
+    finally:
+        for (conn, proc) in zip(conns, procs):
+            if not proc.is_alive():
+                continue
+            try:
+                conn.send(None)
+            except (BrokenPipeError, OSError):
+                # exited in the meantime
+                pass
+        for proc in procs:
+            proc.join()
+
+    # the coordinator strategy only holds the merged table, no training state
+    ql_strategy.clear4next(None)
+    pathlib.Path(args.model_save_path).parent.mkdir(parents=True, exist_ok=True)
+    with open(args.model_save_path, mode="wb") as outputf:
+        pickle.dump(obj=ql_strategy, file=outputf)
+    (_ratio, _fill_cnt, _state_cnt) = qtable.table_filling_ratio(return_detail=True)
+    print(f"table filling ratio: {_ratio:.2%}({_fill_cnt}/{_state_cnt})")
+
+
+def train_hogwild(args):
+    """train with `args.workers` processes, updating one shared Q table asynchronously"""
+    worker_num = args.workers
+    table_shape = (state_encoder.StateEncoder().size, action_encoder.ActionEncoder().size)
+    shared_qtable = qtable_module.QTable.create_shared(*table_shape)
+
+    ctx = multiprocessing.get_context()
+    finished_iter = ctx.Value("q", 0)
+    procs = []
+    try:
+        for (worker_idx, iter_num) in enumerate(_split_iters(args.total_iter, worker_num)):
+            proc = ctx.Process(target=_hogwild_worker, daemon=True,
+                args=(_worker_args(args, worker_idx), shared_qtable.shared_name, table_shape, iter_num,
+                    finished_iter))
+            proc.start()
+            procs.append(proc)
+        with tqdm.tqdm(total=args.total_iter) as pbar:
+            while any(proc.is_alive() for proc in procs):
+                time.sleep(1.)
+                pbar.update(finished_iter.value - pbar.n)
+                logger.info("finished iter %d, table-filling ratio: %.2f%%", finished_iter.value,
+                    shared_qtable.table_filling_ratio() * 100)
+            pbar.update(finished_iter.value - pbar.n)
+        for proc in procs:
+            proc.join()
+    finally:
+        # copy out from the shared memory, then destroy the block
+        shared_qtable.unlink()
+    failed = [(i, proc.exitcode) for (i, proc) in enumerate(procs) if proc.exitcode != 0]
+    if failed:
+        raise RuntimeError(f"hogwild workers failed, (worker, exit code): {failed}")
+    ql_strategy = strategy.QLearningStrategy(is_infer=False, train_args=args, infer_args=None,
+        qtable=shared_qtable)
+
+    ql_strategy.clear4next(None)
+    pathlib.Path(args.model_save_path).parent.mkdir(parents=True, exist_ok=True)
+    with open(args.model_save_path, mode="wb") as outputf:
+        pickle.dump(obj=ql_strategy, file=outputf)
+    (_ratio, _fill_cnt, _state_cnt) = shared_qtable.table_filling_ratio(return_detail=True)
+    print(f"table filling ratio: {_ratio:.2%}({_fill_cnt}/{_state_cnt})")
+
+
+def _worker_args(args, worker_idx: int) -> argparse.Namespace:
+    worker_args = copy.copy(args)
+    worker_args.seed = args.seed + worker_idx + 1
+    worker_args.init_exploration_rate = worker_exploration_rate(args.init_exploration_rate, worker_idx,
+        args.workers)
+    # each worker plays about 1 / N of the games
+    worker_args.exploration_decay_iter = max(1, args.exploration_decay_iter // args.workers)
+    return worker_args
+
+
+def _split_iters(iter_num: int, worker_num: int) -> list:
+    (q, r) = divmod(iter_num, worker_num)
+    return [q + 1 if i < r else q for i in range(worker_num)]
+
+
+def _worker_loop(conn, args):
+    """train the rounds sent by the coordinator, until None.
+    a failure is sent back as the traceback string, so the coordinator can raise with the cause.
+    """
+    try:
+        ql_strategy = strategy.QLearningStrategy(is_infer=False, train_args=args, infer_args=None)
+        qtable = ql_strategy._qtable
+        state = ssm.SnakeStateMachine(width=args.win_width, height=args.win_height, seed=args.seed)
+        while True:
+            task = conn.recv()
+            if task is None:
+                break
+            (weights, iter_num) = task
+            qtable.weights[...] = weights
+            qtable.reset_update_cnt()
+            (score_sum, step_sum) = (0, 0)
+            for _ in range(iter_num):
+                ql_strategy.train_episode(state)
+                score_sum += state.score
+                step_sum += state.steps
+            # only send the updated entries
+            updated_idx = np.flatnonzero(qtable.update_cnt)
+            delta = qtable.weights.ravel()[updated_idx] - weights.ravel()[updated_idx]
+            conn.send((updated_idx, delta, qtable.update_cnt.ravel()[updated_idx], score_sum, step_sum))
+    except Exception:
+        conn.send(traceback.format_exc())
+    conn.close()
+
+
+def _recv_result(conn, proc) -> tuple:
+    """receive the round result of a worker, raise if the worker failed"""
+    try:
+        result = conn.recv()
+    except EOFError:
+        proc.join()
+        raise RuntimeError(f"worker {proc.name} exited unexpectedly, exit code: {proc.exitcode}") from None
+    if isinstance(result, str):
+        raise RuntimeError(f"worker {proc.name} failed:\n{result}")
+    return result
+
+
+def _hogwild_worker(args, shm_name, table_shape, iter_num, finished_iter):
+    ql_strategy = strategy.QLearningStrategy(is_infer=False, train_args=args, infer_args=None,
+        qtable=qtable_module.QTable.attach_shared(shm_name, *table_shape))
+    state = ssm.SnakeStateMachine(width=args.win_width, height=args.win_height, seed=args.seed)
+    for _ in range(iter_num):
+        ql_strategy.train_episode(state)
+        with finished_iter.get_lock():
+            finished_iter.value += 1
+    ql_strategy._qtable.close()
+
+
+def _merge_deltas(qtable, results):
+    """merge worker deltas into qtable.
+    each entry moves by the update-count weighted mean of the worker deltas.
+    """
+    size = qtable.weights.size
+    delta_sum = np.zeros(size, dtype=np.float64)
+    cnt_sum = np.zeros(size, dtype=np.int64)
+    for (updated_idx, delta, cnt, _, _) in results:
+        delta_sum[updated_idx] += delta * cnt
+        cnt_sum[updated_idx] += cnt
+    updated_idx = np.flatnonzero(cnt_sum)
+    qtable.apply_delta(updated_idx, delta_sum[updated_idx] / cnt_sum[updated_idx], cnt_sum[updated_idx])
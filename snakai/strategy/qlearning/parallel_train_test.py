@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""test (pytest)
+"""
+import argparse
+import pathlib
+import pickle
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from . import parallel_train
+from . import qtable as qtable_module
+
+
+def _train_args(tmp_path, **kwargs):
+    args = argparse.Namespace(win_width=10, win_height=10, learning_rate=0.1, discount=0.9,
+        init_exploration_rate=0.5, exploration_decay_iter=20, seed=1, total_iter=8, workers=2,
+        sync_interval=2, replay_capacity=0, replay_batch_size=32, replay_interval=8, qtable_backend="dense",
+        warm_start_policy=None, warm_start_score=1., model_save_path=str(tmp_path / "model.pickle"))
+    vars(args).update(kwargs)
+    return args
+
+
+def test_worker_exploration_rate():
+    rates = [parallel_train.worker_exploration_rate(0.4, i, 8) for i in range(8)]
+    assert rates[0] == 0.4
+    assert np.isclose(rates[-1], 0.4 ** 8)
+    assert rates == sorted(rates, reverse=True)
+    assert parallel_train.worker_exploration_rate(0.4, 0, 1) == 0.4
+
+
+def test_merge_deltas():
+    table = qtable_module.QTable(state_size=2, action_size=2)
+    table.weights[...] = 1.
+    results = [
+        (np.array([0, 3]), np.array([1., 2.]), np.array([1, 1]), 0, 0),
+        (np.array([0]), np.array([4.]), np.array([3]), 0, 0),
+    ]
+    parallel_train._merge_deltas(table, results)
+    assert np.allclose(table.weights, [[1. + (1. + 4. * 3) / 4, 1.], [1., 3.]])
+    assert table.update_cnt.tolist() == [[4, 0], [0, 1]]
+
+
+def test_train_parallel_worker_error(tmp_path):
+    # the workers fail on the board (the coordinator doesn't play)
+    args = _train_args(tmp_path, win_width=1)
+    with pytest.raises(RuntimeError, match="ValueError"):
+        parallel_train.train_parallel(args)
+
+
+def test_train_hogwild_worker_error(tmp_path):
+    args = _train_args(tmp_path, win_width=1)
+    with pytest.raises(RuntimeError, match="exit code"):
+        parallel_train.train_hogwild(args)
+
+
+def test_train_hogwild_unlinks_shared_block(tmp_path, monkeypatch):
+    created = []
+    create_shared = qtable_module.QTable.create_shared
+
+    def _create_shared(*args, **kwargs):
+        qtable = create_shared(*args, **kwargs)
+        created.append(qtable.shared_name)
+        return qtable
+    monkeypatch.setattr(qtable_module.QTable, "create_shared", _create_shared)
+    args = _train_args(tmp_path)
+    parallel_train.train_hogwild(args)
+
+    from multiprocessing import shared_memory
+    assert len(created) == 1
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=created[0])
+    with open(args.model_save_path, mode="rb") as f:
+        ql_strategy = pickle.load(f)
+    assert ql_strategy._qtable.shared_name is None
+    assert ql_strategy._qtable.update_cnt.sum() > 0
+
+
+def test_train_hogwild_resource_tracker_clean(tmp_path):
+    # the resource tracker reports in its own process, so run in a fresh interpreter and check its stderr
+    code = "\n".join([
+        "import multiprocessing",
+        "import pathlib",
+        "from snakai.strategy.qlearning import parallel_train",
+        "from snakai.strategy.qlearning import parallel_train_test",
+        "if __name__ == '__main__':",
+        "    multiprocessing.set_start_method('fork')",
+        f"    parallel_train.train_hogwild(parallel_train_test._train_args(pathlib.Path({str(tmp_path)!r})))",
+    ])
+    root = pathlib.Path(__file__).absolute().parents[3]
+    result = subprocess.run([sys.executable, "-c", code], cwd=root, capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+    assert "KeyError" not in result.stderr
+    assert "resource_tracker" not in result.stderr
@@ -4,6 +4,16 @@ it includes state, action, state2action-value-sheet(QTable)
 """
 import numpy as np
 
+_TABLE_DTYPE = np.float32
+_CNT_DTYPE = np.int32
+_ARRAY_ATTRS = ("_stats", "_state_visit_cnt", "_table", "_debug_table_update_cnt")
+# statistics maintained incrementally: [filled (state, action) count, total visits, histogram buckets...]
+_STAT_FILLED = 0
+_STAT_VISITS = 1
+_STAT_HIST_OFFSET = 2
+_HIST_BUCKET_NUM = 64
+_STAT_SIZE = _STAT_HIST_OFFSET + _HIST_BUCKET_NUM
+
 
 class QTable(object):
     """Q table
@@ -14,12 +24,114 @@ class QTable(object):
 
         state mapping or action mapping is controlled in outter.
         QTable only has index view.
+
+    the table can also be backed by a shared memory block (`create_shared` / `attach_shared`),
+    then processes attached to the same block update it in place without any lock (Hogwild).
     """
     def __init__(self, state_size, action_size):
         """init q table
         """
-        self._table = np.zeros((state_size, action_size), dtype=np.float32)
-        self._debug_table_update_cnt = np.zeros((state_size, action_size), dtype=np.int32)
+        for (attr, dtype, shape) in _array_layout(state_size, action_size):
+            setattr(self, attr, np.zeros(shape, dtype=dtype))
+        self._init_stats()
+        self._shm = None
+
+    @classmethod
+    def from_weights(cls, weights: np.ndarray) -> 'QTable':
+        """make a table on the given score table (not copied, e.g. a read-only memmap for infer).
+        the update counts start from zero.
+        """
+        qtable = cls.__new__(cls)
+        qtable._shm = None
+        for (attr, dtype, shape) in _array_layout(*weights.shape):
+            if attr == "_table":
+                qtable._table = weights
+            else:
+                # zero pages are not committed until written
+                setattr(qtable, attr, np.zeros(shape, dtype=dtype))
+        qtable._init_stats()
+        return qtable
+
+    @classmethod
+    def create_shared(cls, state_size, action_size, name=None) -> 'QTable':
+        """create a zero table in a new shared memory block.
+        the creator should `unlink` it when all the processes have done.
+        """
+        # python >= 3.8, imported here so the plain table still works on older versions
+        from multiprocessing import shared_memory
+        nbytes = sum(np.dtype(dtype).itemsize * int(np.prod(shape))
+            for (_, dtype, shape) in _array_layout(state_size, action_size))
+        shm = shared_memory.SharedMemory(name=name, create=True, size=nbytes)
+        qtable = cls._from_shm(shm, state_size, action_size)
+        for (attr, _, _) in _array_layout(state_size, action_size):
+            getattr(qtable, attr)[...] = 0
+        qtable._init_stats()
+        return qtable
+
+    @classmethod
+    def attach_shared(cls, name, state_size, action_size) -> 'QTable':
+        """attach to a table created by `create_shared`"""
+        import multiprocessing
+        from multiprocessing import resource_tracker
+        from multiprocessing import shared_memory
+        shm = shared_memory.SharedMemory(name=name)
+        # the block is owned by the creator. the processes started by multiprocessing (any start method)
+        # share the creator's resource tracker, unregistering there would drop the creator's registration.
+        # only a process with its own tracker should unregister, or the tracker destroys the block at exit.
+        if multiprocessing.parent_process() is None:
+            resource_tracker.unregister(shm._name, "shared_memory")
+        return cls._from_shm(shm, state_size, action_size)
+
+    @classmethod
+    def _from_shm(cls, shm, state_size, action_size) -> 'QTable':
+        qtable = cls.__new__(cls)
+        qtable._shm = shm
+        offset = 0
+        for (attr, dtype, shape) in _array_layout(state_size, action_size):
+            arr = np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=offset)
+            setattr(qtable, attr, arr)
+            offset += arr.nbytes
+        return qtable
+
+    @property
+    def shared_name(self):
+        """name of the shared memory block, None if not shared"""
+        return self._shm.name if getattr(self, "_shm", None) is not None else None
+
+    def close(self):
+        """detach from the shared memory block. the table becomes a private copy.
+        no-op if not shared.
+        """
+        shm = getattr(self, "_shm", None)
+        if shm is None:
+            return
+        for attr in _ARRAY_ATTRS:
+            setattr(self, attr, getattr(self, attr).copy())
+        self._shm = None
+        shm.close()
+
+    def unlink(self):
+        """close and destroy the shared memory block"""
+        shm = getattr(self, "_shm", None)
+        if shm is None:
+            return
+        self.close()
+        shm.unlink()
+
+    def __getstate__(self):
+        # pickle the data, not the shared memory handle
+        state = self.__dict__.copy()
+        if state.get("_shm") is not None:
+            for attr in _ARRAY_ATTRS:
+                state[attr] = getattr(self, attr).copy()
+        state["_shm"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if "_stats" not in state:
+            # pickled before the stats were added
+            self._rebuild_stats()
 
     def get_action_of_max_score(self, state_id: int) -> int:
         """get action with max score of current game-state
@@ -33,14 +145,156 @@ class QTable(object):
 
     def update_score(self, state_id: int, action_id: int, score: float):
         """update score"""
-        self._table[state_id, action_id] = score
-        self._debug_table_update_cnt[state_id, action_id] += 1
+        row = self._write_row(state_id)
+        self._table[row, action_id] = score
+        cnt = self._debug_table_update_cnt
+        if cnt[row, action_id] == 0:
+            self._stats[_STAT_FILLED] += 1
+        cnt[row, action_id] += 1
+        self._stats[_STAT_VISITS] += 1
+        state_visit = int(self._state_visit_cnt[row])
+        self._state_visit_cnt[row] = state_visit + 1
+        if state_visit & (state_visit + 1) == 0:
+            # visit count reaches 2^k => move to the next histogram bucket
+            bucket = state_visit.bit_length()
+            self._stats[_STAT_HIST_OFFSET + bucket] -= 1
+            self._stats[_STAT_HIST_OFFSET + bucket + 1] += 1
+
+    @property
+    def weights(self) -> np.ndarray:
+        """the score table with shape (state_size, action_size)"""
+        return self._table
+
+    @property
+    def update_cnt(self) -> np.ndarray:
+        """update count of each (state, action)"""
+        return self._debug_table_update_cnt
+
+    def apply_delta(self, flat_idx: np.ndarray, delta: np.ndarray, cnt: np.ndarray):
+        """add delta (and update count) to entries at flat index `state_id * action_size + action_id`"""
+        (state_ids, action_ids) = np.divmod(flat_idx, self.action_size)
+        flat_idx = self._write_rows(state_ids) * self.action_size + action_ids
+        self._table.reshape(-1)[flat_idx] += delta.astype(self._table.dtype, copy=False)
+        self._count_updates(flat_idx, cnt)
+
+    def reset_update_cnt(self):
+        """clear the update counts and statistics, keep the scores"""
+        self._debug_table_update_cnt[...] = 0
+        self._state_visit_cnt[...] = 0
+        self._init_stats()
+
+    def max_scores(self, state_ids: np.ndarray) -> np.ndarray:
+        """get the max action score of each state in state_ids (vectorized gather)"""
+        return self._table[state_ids].max(axis=1)
+
+    def actions_of_max_score(self, state_ids: np.ndarray) -> np.ndarray:
+        """get the action with max score of each state in state_ids (vectorized `get_action_of_max_score`)"""
+        return self._table[state_ids].argmax(axis=1)
+
+    def update_batch(self, state_ids: np.ndarray, action_ids: np.ndarray, targets: np.ndarray,
+            learning_rate: float):
+        """move Q(s, a) towards the targets for a minibatch:
+            Q(s, a) += learning_rate * (target - Q(s, a))
+        all the deltas are computed from the table before updating, and are scatter-added,
+        so repeated (s, a) pairs in the batch accumulate their deltas.
+        """
+        rows = self._write_rows(state_ids)
+        q_predict = self._table[rows, action_ids]
+        delta = (learning_rate * (targets - q_predict)).astype(self._table.dtype, copy=False)
+        np.add.at(self._table, (rows, action_ids), delta)
+        flat_idx = rows * self.action_size + action_ids
+        self._count_updates(flat_idx, np.ones(len(flat_idx), dtype=np.int64))
 
     def table_filling_ratio(self, return_detail=False):
-        """get table filling ratio"""
-        filled_cnt = np.count_nonzero(self._debug_table_update_cnt)
-        ratio =  filled_cnt / self._debug_table_update_cnt.size
+        """get table filling ratio, O(1)"""
+        filled_cnt = int(self._stats[_STAT_FILLED])
+        table_size = self.state_size * self.action_size
+        ratio =  filled_cnt / table_size
         if return_detail:
-            return (ratio, filled_cnt, self._debug_table_update_cnt.size)
+            return (ratio, filled_cnt, table_size)
         else:
-            return ratio
\ No newline at end of file
+            return ratio
+
+    @property
+    def state_size(self) -> int:
+        """get state size"""
+        return self._table.shape[0]
+
+    @property
+    def action_size(self) -> int:
+        """get action size"""
+        return self._table.shape[1]
+
+    def to_dense(self) -> 'QTable':
+        """the dense table of this table (itself)"""
+        return self
+
+    @property
+    def visit_cnt(self) -> int:
+        """total update count of the table"""
+        return int(self._stats[_STAT_VISITS])
+
+    def state_visit_cnt(self, state_id: int) -> int:
+        """update count of a state (all actions)"""
+        return int(self._state_visit_cnt[state_id])
+
+    def state_visit_histogram(self) -> np.ndarray:
+        """histogram of the state visit counts in log2 buckets:
+            bucket 0 is the unvisited states, bucket k (k > 0) is the states visited [2^(k-1), 2^k) times.
+        """
+        return self._stats[_STAT_HIST_OFFSET:].copy()
+
+    def _init_stats(self):
+        self._stats[...] = 0
+        self._stats[_STAT_HIST_OFFSET] = self.state_size
+
+    def _write_row(self, state_id: int) -> int:
+        """row in the arrays to write for the state"""
+        return state_id
+
+    def _write_rows(self, state_ids: np.ndarray) -> np.ndarray:
+        """vectorized `_write_row`"""
+        return state_ids
+
+    def _rebuild_stats(self):
+        """rebuild the statistics from the update counts"""
+        self._state_visit_cnt = self._debug_table_update_cnt.sum(axis=1, dtype=np.int64)
+        self._stats = np.zeros(_STAT_SIZE, dtype=np.int64)
+        self._stats[_STAT_FILLED] = np.count_nonzero(self._debug_table_update_cnt)
+        self._stats[_STAT_VISITS] = self._state_visit_cnt.sum()
+        self._stats[_STAT_HIST_OFFSET:] = np.bincount(_bit_length(self._state_visit_cnt),
+            minlength=_HIST_BUCKET_NUM)
+
+    def _count_updates(self, flat_idx: np.ndarray, nums: np.ndarray):
+        """add update counts (and statistics) at flat index `row * action_size + action_id`,
+        flat_idx may be repeated"""
+        (flat_idx, inverse) = np.unique(flat_idx, return_inverse=True)
+        nums = np.bincount(inverse, weights=nums).astype(np.int64)
+        cnt = self._debug_table_update_cnt.reshape(-1)
+        self._stats[_STAT_FILLED] += np.count_nonzero((cnt[flat_idx] == 0) & (nums > 0))
+        cnt[flat_idx] += nums.astype(cnt.dtype)
+        self._stats[_STAT_VISITS] += nums.sum()
+
+        (rows, inverse) = np.unique(flat_idx // self.action_size, return_inverse=True)
+        row_nums = np.bincount(inverse, weights=nums).astype(np.int64)
+        prev = self._state_visit_cnt[rows]
+        cur = prev + row_nums
+        self._state_visit_cnt[rows] = cur
+        hist = self._stats[_STAT_HIST_OFFSET:]
+        np.add.at(hist, _bit_length(prev), -1)
+        np.add.at(hist, _bit_length(cur), 1)
+
+
+def _array_layout(state_size, action_size) -> list:
+    """(attribute, dtype, shape) of the table arrays, in the shared memory order"""
+    return [
+        ("_stats", np.int64, (_STAT_SIZE,)),
+        ("_state_visit_cnt", np.int64, (state_size,)),
+        ("_table", _TABLE_DTYPE, (state_size, action_size)),
+        ("_debug_table_update_cnt", _CNT_DTYPE, (state_size, action_size)),
+    ]
+
+
+def _bit_length(v: np.ndarray) -> np.ndarray:
+    """vectorized int.bit_length for non-negative ints (< 2^53)"""
+    return np.frexp(v.astype(np.float64))[1]
\ No newline at end of file
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""test (pytest)
+"""
+import pickle
+
+import numpy as np
+
+from . import qtable as qtable_module
+
+
+def test_shared_qtable():
+    qtable = qtable_module.QTable.create_shared(state_size=4, action_size=3)
+    try:
+        attached = qtable_module.QTable.attach_shared(qtable.shared_name, 4, 3)
+        attached.update_score(2, 1, 0.5)
+        attached.update_batch(np.array([3, 3]), np.array([0, 0]), np.array([1., 1.]), learning_rate=0.5)
+        assert qtable.get_score(2, 1) == 0.5
+        assert qtable.get_score(3, 0) == 1.
+        assert qtable.table_filling_ratio(return_detail=True)[1] == 2
+        # pickle copies the data out
+        loaded = pickle.loads(pickle.dumps(qtable))
+        assert loaded.shared_name is None
+        assert np.array_equal(loaded.weights, qtable.weights)
+        attached.close()
+        assert attached.shared_name is None
+        assert attached.get_score(2, 1) == 0.5
+    finally:
+        qtable.unlink()
+    assert qtable.get_score(3, 0) == 1.
+
+
+def test_incremental_stats():
+    rng = np.random.default_rng(1)
+    qtable = qtable_module.QTable(state_size=50, action_size=3)
+    for _ in range(200):
+        qtable.update_score(int(rng.integers(50)), int(rng.integers(3)), 1.)
+    state_ids = rng.integers(50, size=300)
+    qtable.update_batch(state_ids, rng.integers(3, size=300), np.ones(300), learning_rate=0.1)
+    qtable.apply_delta(np.array([0, 7, 149]), np.zeros(3), np.array([2, 0, 5]))
+    cnt = qtable.update_cnt
+    assert qtable.table_filling_ratio(return_detail=True)[1] == np.count_nonzero(cnt)
+    assert qtable.visit_cnt == cnt.sum()
+    state_visit = cnt.sum(axis=1)
+    assert qtable.state_visit_cnt(49) == state_visit[49]
+    expected_hist = np.bincount([int(v).bit_length() for v in state_visit], minlength=64)
+    assert np.array_equal(qtable.state_visit_histogram(), expected_hist)
+    # rebuilt from counts (e.g. loading an old model) gives the same stats
+    stats = qtable._stats.copy()
+    qtable._rebuild_stats()
+    assert np.array_equal(qtable._stats, stats)
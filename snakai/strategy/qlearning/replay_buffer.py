@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""experience replay buffer
+transitions are kept in preallocated numpy arrays (ring buffer), so
+adding is O(1) and sampling a minibatch is a vectorized gather.
+"""
+import numpy as np
+
+
+class ReplayBuffer(object):
+    """ring buffer of transitions (state_id, action_id, reward, next_state_id, done).
+    when full, the oldest transition is overwritten.
+    `next_state_id` is meaningless if `done` is True (set to 0 when adding).
+    """
+    def __init__(self, capacity: int, seed=None):
+        if capacity <= 0:
+            raise ValueError(f"capacity should be > 0, got {capacity}")
+        self._capacity = capacity
+        self.state_ids = np.zeros(capacity, dtype=np.int64)
+        self.action_ids = np.zeros(capacity, dtype=np.int64)
+        self.rewards = np.zeros(capacity, dtype=np.float32)
+        self.next_state_ids = np.zeros(capacity, dtype=np.int64)
+        self.dones = np.zeros(capacity, dtype=bool)
+        # next position to write
+        self._pos = 0
+        self._size = 0
+        # total added transitions
+        self.added_cnt = 0
+        self._rng = np.random.default_rng(seed)
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def capacity(self):
+        """get capacity"""
+        return self._capacity
+
+    def add(self, state_id: int, action_id: int, reward: float, next_state_id, done: bool):
+        """add one transition"""
+        pos = self._pos
+        self.state_ids[pos] = state_id
+        self.action_ids[pos] = action_id
+        self.rewards[pos] = reward
+        self.next_state_ids[pos] = 0 if done else next_state_id
+        self.dones[pos] = done
+        self._pos = (pos + 1) % self._capacity
+        if self._size < self._capacity:
+            self._size += 1
+        self.added_cnt += 1
+
+    def add_batch(self, state_ids, action_ids, rewards, next_state_ids, dones):
+        """add transitions in arrays, e.g. from the batched state machine"""
+        n = len(state_ids)
+        if n > self._capacity:
+            # only the latest `capacity` transitions will be kept
+            (state_ids, action_ids, rewards, next_state_ids, dones) = (v[-self._capacity:]
+                for v in (state_ids, action_ids, rewards, next_state_ids, dones))
+        dones = np.asarray(dones, dtype=bool)
+        write_num = len(dones)
+        pos = (self._pos + np.arange(write_num)) % self._capacity
+        self.state_ids[pos] = state_ids
+        self.action_ids[pos] = action_ids
+        self.rewards[pos] = rewards
+        self.next_state_ids[pos] = np.where(dones, 0, next_state_ids)
+        self.dones[pos] = dones
+        self._pos = (self._pos + write_num) % self._capacity
+        self._size = min(self._size + write_num, self._capacity)
+        self.added_cnt += n
+
+    def sample(self, batch_size: int):
+        """sample a minibatch uniformly (with replacement).
+        Returns
+        ----------
+        (state_ids, action_ids, rewards, next_state_ids, dones) arrays
+        """
+        if self._size == 0:
+            raise ValueError("can't sample from an empty replay buffer")
+        idx = self._rng.integers(0, self._size, size=batch_size)
+        return (self.state_ids[idx], self.action_ids[idx], self.rewards[idx],
+            self.next_state_ids[idx], self.dones[idx])
+
+    def clear(self):
+        """drop all transitions"""
+        self._pos = 0
+        self._size = 0
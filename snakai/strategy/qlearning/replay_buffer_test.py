@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+"""test (pytest)
+"""
+import numpy as np
+
+from . import replay_buffer as replay_buffer_module
+from . import qtable as qtable_module
+
+
+def test_ring_buffer():
+    buf = replay_buffer_module.ReplayBuffer(capacity=4, seed=1)
+    for i in range(3):
+        buf.add(i, i % 3, float(i), i + 1, False)
+    buf.add_batch(np.array([3, 4, 5]), np.array([0, 1, 2]), np.array([3., 4., 5.]),
+        np.array([4, 5, 6]), np.array([False, False, True]))
+    assert len(buf) == 4
+    assert buf.added_cnt == 6
+    # the oldest 2 transitions are overwritten
+    assert sorted(buf.state_ids.tolist()) == [2, 3, 4, 5]
+    assert buf.next_state_ids[buf.state_ids == 5][0] == 0
+    (state_ids, action_ids, rewards, next_state_ids, dones) = buf.sample(100)
+    assert set(state_ids.tolist()) <= {2, 3, 4, 5}
+    assert np.all(rewards == state_ids)
+    assert np.all(dones == (state_ids == 5))
+
+
+def test_batch_larger_than_capacity():
+    buf = replay_buffer_module.ReplayBuffer(capacity=4, seed=1)
+    buf.add(0, 0, 0., 1, False)
+    ids = np.arange(1, 7)
+    buf.add_batch(ids, ids % 3, ids.astype(float), ids + 1, np.zeros(6, dtype=bool))
+    assert len(buf) == 4
+    assert buf.added_cnt == 7
+    assert sorted(buf.state_ids.tolist()) == [3, 4, 5, 6]
+    # the next batch overwrites the oldest kept transition (3) first
+    buf.add_batch(np.array([7]), np.array([1]), np.array([7.]), np.array([8]), np.array([False]))
+    assert sorted(buf.state_ids.tolist()) == [4, 5, 6, 7]
+
+
+def test_update_batch():
+    table = qtable_module.QTable(state_size=3, action_size=2)
+    state_ids = np.array([0, 0, 1])
+    action_ids = np.array([1, 1, 0])
+    table.update_batch(state_ids, action_ids, np.array([1., 1., -2.]), learning_rate=0.5)
+    # deltas of the repeated pair are accumulated
+    assert table.get_score(0, 1) == 1.
+    assert table.get_score(1, 0) == -1.
+    assert np.allclose(table.max_scores(np.array([0, 1, 2])), [1., 0., 0.])
+    assert table.table_filling_ratio() == 2 / 6
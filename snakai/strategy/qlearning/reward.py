@@ -3,6 +3,8 @@
 """
 import logging
 
+import numpy as np
+
 from ... import snake_state_machine as ssm
 
 
@@ -12,30 +14,47 @@ logger = logging.getLogger("snakai")
 class NaiveRewardCalc(object):
     """calculator for reward in naive
     """
-    def __init__(self):
-        self._env_prev_score = 0.
-
     def calc(self, game_state: ssm.SnakeStateMachine) -> float:
         """get reward
         """
         reward = self._calc_reward(game_state)
         return reward
 
+    def calc_batch(self, batch_state, is_ok, pre_score, pre_remaining_steps) -> np.ndarray:
+        """rewards of the last `BatchSnakeStateMachine.update_state`, the same as `calc` of each game.
+        Parameters
+        ------------
+        is_ok: returned by `update_state`, the ended games are read from `done_status` / `done_score`
+            (they may have been reset)
+        pre_score, pre_remaining_steps: score and remaining steps before the step
+        """
+        status = np.where(is_ok, batch_state.status, batch_state.done_status)
+        score = np.where(is_ok, batch_state.score, batch_state.done_score)
+        rewards = np.where(score > pre_score, score, 0.).astype(np.float32)
+        is_fail = status == ssm.SnakeStateMachine.InnerStatus.FAIL
+        # failed with the last step is treated as starved
+        rewards[is_fail] = np.where(pre_remaining_steps[is_fail] <= 1, -1., -5.)
+        rewards[status == ssm.SnakeStateMachine.InnerStatus.SUCCESS] = 100.
+        return rewards
+
     def clear4next(self):
         """clear inner state for next updating"""
-        self._env_prev_score = 0.
+        return
 
     def _calc_reward(self, game_state):
-        if game_state.is_fail():
-            if game_state.remaining_steps <= 0:
-                return -1.
-            else:
-                return -5.
-        elif game_state.is_success():
+        outcome = game_state.last_outcome
+        if outcome == ssm.StepOutcome.MOVED:
+            return 0.
+        elif outcome == ssm.StepOutcome.ATE:
+            return 1. * game_state.score
+        elif outcome == ssm.StepOutcome.SUCCEEDED:
             return 100.
-        env_score = game_state.score
-        if env_score > self._env_prev_score:
-            self._env_prev_score = env_score
-            return 1. * env_score
+        elif outcome == ssm.StepOutcome.NONE:
+            # not updated
+            return 0.
+        elif outcome == ssm.StepOutcome.STARVED or game_state.remaining_steps <= 0:
+            # also died on wall or body with the last step: treated as starved
+            return -1.
         else:
-            return 0.
\ No newline at end of file
+            # died on wall or body
+            return -5.
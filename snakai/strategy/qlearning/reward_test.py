@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+"""test (pytest)
+"""
+from . import reward
+from ... import snake_state_machine as ssm
+
+
+def _run2wall(remaining_steps_at_wall):
+    """move left until colliding on the edge, with the given remaining steps before the last step"""
+    state = ssm.SnakeStateMachine(10, 10, seed=1)
+    state.new_state()
+    # never turn back to the body
+    d = ssm.Direction.LEFT if state.direction == ssm.Direction.LEFT else ssm.Direction.UP
+    while state.is_state_ok():
+        at_edge = state.head.x == 0 if d == ssm.Direction.LEFT else state.head.y == 0
+        state.remaining_steps = remaining_steps_at_wall if at_edge else 100
+        state.update_state(d)
+    return state
+
+
+def test_reward_of_collision():
+    calc = reward.NaiveRewardCalc()
+    state = _run2wall(remaining_steps_at_wall=10)
+    assert state.last_outcome == ssm.StepOutcome.DIED_WALL
+    assert calc.calc(state) == -5.
+
+
+def test_reward_of_collision_on_the_last_step():
+    # same as the starvation, as before the step outcome was added
+    calc = reward.NaiveRewardCalc()
+    state = _run2wall(remaining_steps_at_wall=1)
+    assert state.last_outcome == ssm.StepOutcome.DIED_WALL
+    assert calc.calc(state) == -1.
+
+
+def test_reward_of_not_updated():
+    calc = reward.NaiveRewardCalc()
+    state = ssm.SnakeStateMachine(10, 10, seed=1)
+    state.new_state()
+    assert state.last_outcome == ssm.StepOutcome.NONE
+    assert calc.calc(state) == 0.
@@ -12,4 +12,5 @@ python -m cProfile -o output/profile.out train.py \
     --model_save_path output/ql_strategy.pickle 
 
 # -> numpy.count_nonzero cost almost all time...
-# we call it too many times.
\ No newline at end of file
+# we call it too many times.
+# (fixed: table filling ratio is maintained incrementally now)
\ No newline at end of file
@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+"""sparse Q table
+only the visited states take memory, for the encoders with a huge state space.
+"""
+import numpy as np
+
+from . import qtable as qtable_module
+
+_EMPTY_KEY = -1
+# fibonacci hashing: (key * 2^64 / golden ratio) mod 2^64, then take the high bits
+_HASH_MULTIPLIER = 11400714819323198485
+_U64_MASK = (1 << 64) - 1
+_MAX_LOAD_FACTOR = 0.5
+
+
+class SparseQTable(qtable_module.QTable):
+    """sparse Q table, with the same api as `QTable`.
+    a state gets an action-value row when it's written for the first time.
+    reading an unwritten state is the same as the dense table (all scores are 0).
+
+    1. rows: `_table` / `_debug_table_update_cnt` / `_state_visit_cnt` are indexed by row,
+        rows are contiguous and grow by doubling.
+    2. index: open-addressing hash table (linear probing) of int64 state id -> row.
+    """
+    def __init__(self, state_size, action_size, init_capacity=1024):
+        """init sparse q table
+        """
+        self._state_size = state_size
+        self._row_num = 0
+        self._table = np.zeros((init_capacity, action_size), dtype=qtable_module._TABLE_DTYPE)
+        self._debug_table_update_cnt = np.zeros((init_capacity, action_size), dtype=qtable_module._CNT_DTYPE)
+        self._state_visit_cnt = np.zeros(init_capacity, dtype=np.int64)
+        self._row2state = np.zeros(init_capacity, dtype=np.int64)
+        self._alloc_index(_slot_bits_for(init_capacity))
+        self._stats = np.zeros(qtable_module._STAT_SIZE, dtype=np.int64)
+        self._init_stats()
+        self._shm = None
+
+    @classmethod
+    def create_shared(cls, state_size, action_size, name=None):
+        raise TypeError("sparse Q table can't be shared")
+
+    @classmethod
+    def attach_shared(cls, name, state_size, action_size):
+        raise TypeError("sparse Q table can't be shared")
+
+    @classmethod
+    def from_weights(cls, weights):
+        raise TypeError("sparse Q table can't be made from dense weights")
+
+    def get_action_of_max_score(self, state_id: int) -> int:
+        row = self._find_row(state_id)
+        if row < 0:
+            return 0
+        return self._table[row].argmax(axis=0)
+
+    def get_score(self, state_id: int, action_id: int):
+        row = self._find_row(state_id)
+        if row < 0:
+            return self._table.dtype.type(0)
+        return self._table[row, action_id]
+
+    def max_scores(self, state_ids: np.ndarray) -> np.ndarray:
+        rows = self._find_rows(state_ids)
+        scores = np.zeros(len(rows), dtype=self._table.dtype)
+        found = rows >= 0
+        scores[found] = self._table[rows[found]].max(axis=1)
+        return scores
+
+    def actions_of_max_score(self, state_ids: np.ndarray) -> np.ndarray:
+        rows = self._find_rows(state_ids)
+        actions = np.zeros(len(rows), dtype=np.int64)
+        found = rows >= 0
+        actions[found] = self._table[rows[found]].argmax(axis=1)
+        return actions
+
+    @property
+    def weights(self) -> np.ndarray:
+        raise TypeError("sparse Q table has no dense weights, use `to_dense()`")
+
+    @property
+    def update_cnt(self) -> np.ndarray:
+        raise TypeError("sparse Q table has no dense update count, use `to_dense()`")
+
+    def state_visit_cnt(self, state_id: int) -> int:
+        row = self._find_row(state_id)
+        return int(self._state_visit_cnt[row]) if row >= 0 else 0
+
+    @property
+    def state_size(self) -> int:
+        return self._state_size
+
+    @property
+    def row_num(self) -> int:
+        """number of the allocated rows (written states)"""
+        return self._row_num
+
+    @property
+    def nbytes(self) -> int:
+        """memory of the arrays"""
+        return sum(arr.nbytes for arr in (self._table, self._debug_table_update_cnt, self._state_visit_cnt,
+            self._row2state, self._keys, self._slot2row))
+
+    def to_dense(self) -> qtable_module.QTable:
+        """convert to the dense table (e.g. for saving as the memmap model)"""
+        dense = qtable_module.QTable(self._state_size, self.action_size)
+        states = self._row2state[:self._row_num]
+        dense._table[states] = self._table[:self._row_num]
+        dense._debug_table_update_cnt[states] = self._debug_table_update_cnt[:self._row_num]
+        dense._rebuild_stats()
+        return dense
+
+    def _write_row(self, state_id: int) -> int:
+        row = self._find_row(state_id)
+        if row < 0:
+            row = self._insert(state_id)
+        return row
+
+    def _write_rows(self, state_ids: np.ndarray) -> np.ndarray:
+        rows = self._find_rows(state_ids)
+        missing = rows < 0
+        if missing.any():
+            for state_id in np.unique(state_ids[missing]).tolist():
+                self._insert(state_id)
+            rows[missing] = self._find_rows(state_ids[missing])
+        return rows
+
+    def _find_row(self, state_id: int) -> int:
+        state_id = int(state_id)
+        keys = self._keys
+        slot = ((state_id * _HASH_MULTIPLIER) & _U64_MASK) >> self._hash_shift
+        while True:
+            key = keys[slot]
+            if key == state_id:
+                return int(self._slot2row[slot])
+            if key == _EMPTY_KEY:
+                return -1
+            slot = (slot + 1) & self._slot_mask
+
+    def _find_rows(self, state_ids: np.ndarray) -> np.ndarray:
+        """vectorized `_find_row`: probe all the states together until found or hit empty"""
+        state_ids = np.asarray(state_ids, dtype=np.int64)
+        rows = np.full(len(state_ids), -1, dtype=np.int64)
+        slots = ((state_ids.astype(np.uint64) * np.uint64(_HASH_MULTIPLIER))
+            >> np.uint64(self._hash_shift)).astype(np.int64)
+        pending = np.arange(len(state_ids))
+        while len(pending):
+            keys = self._keys[slots[pending]]
+            is_found = keys == state_ids[pending]
+            found = pending[is_found]
+            rows[found] = self._slot2row[slots[found]]
+            pending = pending[~is_found & (keys != _EMPTY_KEY)]
+            slots[pending] = (slots[pending] + 1) & self._slot_mask
+        return rows
+
+    def _insert(self, state_id: int) -> int:
+        """add a row for the state (not in table yet)"""
+        state_id = int(state_id)
+        if not 0 <= state_id < self._state_size:
+            raise IndexError(f"state id {state_id} out of range [0, {self._state_size})")
+        row = self._row_num
+        if row == len(self._row2state):
+            self._grow_rows()
+        if (row + 1) > _MAX_LOAD_FACTOR * len(self._keys):
+            self._alloc_index(self._slot_bits + 1)
+            self._rehash()
+        self._place(state_id, row)
+        self._row2state[row] = state_id
+        self._row_num += 1
+        return row
+
+    def _place(self, state_id: int, row: int):
+        keys = self._keys
+        slot = ((state_id * _HASH_MULTIPLIER) & _U64_MASK) >> self._hash_shift
+        while keys[slot] != _EMPTY_KEY:
+            slot = (slot + 1) & self._slot_mask
+        keys[slot] = state_id
+        self._slot2row[slot] = row
+
+    def _grow_rows(self):
+        capacity = len(self._row2state) * 2
+        for attr in ("_table", "_debug_table_update_cnt", "_state_visit_cnt", "_row2state"):
+            arr = getattr(self, attr)
+            grown = np.zeros((capacity,) + arr.shape[1:], dtype=arr.dtype)
+            grown[:len(arr)] = arr
+            setattr(self, attr, grown)
+
+    def _alloc_index(self, slot_bits: int):
+        self._slot_bits = slot_bits
+        self._slot_mask = (1 << slot_bits) - 1
+        self._hash_shift = 64 - slot_bits
+        self._keys = np.full(1 << slot_bits, _EMPTY_KEY, dtype=np.int64)
+        self._slot2row = np.zeros(1 << slot_bits, dtype=np.int64)
+
+    def _rehash(self):
+        for (row, state_id) in enumerate(self._row2state[:self._row_num].tolist()):
+            self._place(state_id, row)
+
+
+def _slot_bits_for(row_capacity: int) -> int:
+    """slot bits so that `row_capacity` rows are under the max load factor"""
+    return max(4, int(np.ceil(np.log2(row_capacity / _MAX_LOAD_FACTOR))))
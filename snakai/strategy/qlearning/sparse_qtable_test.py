@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""test (pytest)
+"""
+import numpy as np
+import pytest
+
+from . import qtable as qtable_module
+from . import sparse_qtable as sparse_qtable_module
+
+
+def test_same_as_dense():
+    (state_size, action_size) = (100000, 4)
+    dense = qtable_module.QTable(state_size, action_size)
+    sparse = sparse_qtable_module.SparseQTable(state_size, action_size, init_capacity=4)
+    rng = np.random.default_rng(1)
+    # few visited states, some of them collide in the hash index
+    visited = rng.choice(state_size, size=300, replace=False)
+    for _ in range(2000):
+        (s, a) = (int(rng.choice(visited)), int(rng.integers(action_size)))
+        score = float(rng.normal())
+        dense.update_score(s, a, score)
+        sparse.update_score(s, a, score)
+    for _ in range(5):
+        state_ids = np.concatenate([rng.choice(visited, size=200), rng.integers(state_size, size=50)])
+        action_ids = rng.integers(action_size, size=len(state_ids))
+        targets = rng.normal(size=len(state_ids))
+        dense.update_batch(state_ids, action_ids, targets, learning_rate=0.1)
+        sparse.update_batch(state_ids, action_ids, targets, learning_rate=0.1)
+
+    queries = np.concatenate([visited, rng.integers(state_size, size=100)])
+    assert np.array_equal(sparse.max_scores(queries), dense.max_scores(queries))
+    assert np.array_equal(sparse.actions_of_max_score(queries), dense.actions_of_max_score(queries))
+    for s in queries[::7].tolist():
+        assert sparse.get_action_of_max_score(s) == dense.get_action_of_max_score(s)
+        assert sparse.get_score(s, 1) == dense.get_score(s, 1)
+        assert sparse.state_visit_cnt(s) == dense.state_visit_cnt(s)
+    assert sparse.table_filling_ratio(return_detail=True) == dense.table_filling_ratio(return_detail=True)
+    assert np.array_equal(sparse.state_visit_histogram(), dense.state_visit_histogram())
+    assert np.array_equal(sparse.to_dense().weights, dense.weights)
+    assert sparse.nbytes < dense.weights.nbytes
+
+
+def test_dense_only_api():
+    sparse = sparse_qtable_module.SparseQTable(10, 4)
+    with pytest.raises(TypeError):
+        sparse.weights
+    with pytest.raises(TypeError):
+        sparse.update_cnt
+    with pytest.raises(TypeError):
+        sparse_qtable_module.SparseQTable.create_shared(10, 4)
@@ -2,28 +2,30 @@
 """barrier distance encoder
 dist -> state enum
 """
-
-import bisect
+import numpy as np
 
 from .encoder_base import EncoderBase
 
 class BarrierDistUnitEncoder(EncoderBase):
-    """barrier dist encoder"""
-    def __init__(self):
-        self._dist_upperbound = [-1, 0, 1]
-        self._correspond_states = ["opposite", "0", "1", "2+"]
-        self._state2id = {_s: _i for (_i, _s) in enumerate(self._correspond_states)}
+    """barrier dist encoder
+    state is `min(dist + 1, 3)`, that is -1(opposite) -> 0, 0 -> 1, 1 -> 2, 2+ -> 3
+    """
+    _STATES = ("opposite", "0", "1", "2+")
+    _MAX_STATE_ID = len(_STATES) - 1
 
     def encode(self, dist: int) -> int:
         """encode dist to states"""
         assert dist >= -1, f"dist must >= -1, while got '{dist}'"
-        dist_range_idx = bisect.bisect_left(self._dist_upperbound, dist)
-        s = self._correspond_states[dist_range_idx]
-        return self._state2id[s]
+        state_id = dist + 1
+        return state_id if state_id < self._MAX_STATE_ID else self._MAX_STATE_ID
+
+    def encode_batch(self, features: np.ndarray) -> np.ndarray:
+        """features: dist array"""
+        return np.minimum(features + 1, self._MAX_STATE_ID)
 
     def readable_state(self, state_id) -> list:
-        return [self._correspond_states[state_id]]
+        return [self._STATES[state_id]]
 
     @property
-    def ids(self) -> list:
-        return self._state2id.values()
\ No newline at end of file
+    def radix(self) -> int:
+        return len(self._STATES)
\ No newline at end of file
@@ -1,17 +1,22 @@
 # coding: utf-8
+"""mixed-radix state id.
+a full state is the digits of every unit encoder, the first encoder is the most significant digit:
+    id = ((d0 * r1 + d1) * r2 + d2) ...
+it's the same order as enumerating all the combinations with the last digit changing fastest.
+"""
 
-def build_all_states(unit_encoders):
-    _all_states = []
-    def _recursive_build(encoder_idx, current_state):
-        if encoder_idx == len(unit_encoders):
-            full_state = tuple(current_state)
-            _all_states.append(full_state)
-        else:
-            unit_encoder = unit_encoders[encoder_idx]
-            for state_id in unit_encoder.ids:
-                current_state.append(state_id)
-                _recursive_build(encoder_idx + 1, current_state)
-                current_state.pop()
-    
-    _recursive_build(0, [])
-    return _all_states
+
+def mixed_radix_encode(digits, radices) -> int:
+    """digits -> id"""
+    state_id = 0
+    for (d, r) in zip(digits, radices):
+        state_id = state_id * r + d
+    return state_id
+
+
+def mixed_radix_decode(state_id: int, radices) -> list:
+    """id -> digits"""
+    digits = [0] * len(radices)
+    for i in range(len(radices) - 1, -1, -1):
+        (state_id, digits[i]) = divmod(state_id, radices[i])
+    return digits
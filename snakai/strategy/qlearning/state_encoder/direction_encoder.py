@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 """direction encoder
 """
+import numpy as np
 
 from .encoder_base import EncoderBase
 from snakai.snake_state_machine import Direction as D
@@ -13,14 +14,22 @@ class DirectionEncoder(EncoderBase):
     def __init__(self):
         # only use effective 4 directions
         self._id2states = [D.UP, D.DOWN, D.LEFT, D.RIGHT]
-        self._state2id = {_s: _i for (_i, _s) in enumerate(self._id2states)}
+        # direction value -> id
+        self._direction2id = np.full(len(D), -1, dtype=np.int64)
+        for (_i, _s) in enumerate(self._id2states):
+            self._direction2id[_s] = _i
+        self._direction2id_list = self._direction2id.tolist()
 
     def encode(self, game_state) -> int:
-        return self._state2id[game_state.direction]
+        return self._direction2id_list[game_state.direction]
+
+    def encode_batch(self, features: np.ndarray) -> np.ndarray:
+        """features: direction value array"""
+        return self._direction2id[features]
 
     def readable_state(self, state_id) -> list:
         return [self._id2states[state_id].name,]
 
     @property
-    def ids(self):
-        return self._state2id.values()
\ No newline at end of file
+    def radix(self) -> int:
+        return len(self._id2states)
\ No newline at end of file
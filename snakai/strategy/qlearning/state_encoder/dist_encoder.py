@@ -3,6 +3,8 @@
 """
 import logging
 
+import numpy as np
+
 from . import common
 from .encoder_base import EncoderBase
 from .barrier_dist_unit_encoder import BarrierDistUnitEncoder
@@ -16,37 +18,54 @@ logger = logging.getLogger("snakai")
 class DistEncoder(EncoderBase):
     """dist encoder"""
     def __init__(self):
+        self._barrier_encoder = BarrierDistUnitEncoder()
+        self._food_encoder = FoodDistUnitEncoder()
         self._unit_encoders = [
             # barrier UP, DOWN, LEFT, RIGHT
-            BarrierDistUnitEncoder(), BarrierDistUnitEncoder(), BarrierDistUnitEncoder(), BarrierDistUnitEncoder(),
+            self._barrier_encoder, self._barrier_encoder, self._barrier_encoder, self._barrier_encoder,
             # food X, Y
-            FoodDistUnitEncoder(), FoodDistUnitEncoder()
+            self._food_encoder, self._food_encoder
         ]
-        self._id2state = common.build_all_states(self._unit_encoders)
-        self._state2id = {_s: _i for (_i, _s) in enumerate(self._id2state)}
-    
+        self._radices = [e.radix for e in self._unit_encoders]
+        self._radix = int(np.prod(self._radices))
+        # place value of each unit
+        self._place_values = np.array([int(np.prod(self._radices[i + 1:])) for i in range(len(self._radices))],
+            dtype=np.int64)
+        # the distance calculator is bound to a state, reuse it for the same state
+        self._distance_calc = None
+
     def encode(self, game_state: ssm.SnakeStateMachine) -> int:
         """encode dist"""
-        distance_calc = ssm_util.DistanceCalc(game_state)
-        up_dist = distance_calc.barrier_up_dist()
-        down_dist = distance_calc.barrier_down_dist()
-        left_dist = distance_calc.barrier_left_dist()
-        right_dist = distance_calc.barrier_right_dist()
+        distance_calc = self._distance_calc
+        if distance_calc is None or distance_calc.state is not game_state:
+            distance_calc = self._distance_calc = ssm_util.DistanceCalc(game_state)
+        barrier_encode = self._barrier_encoder.encode
+        food_encode = self._food_encoder.encode
+        (br, fr) = (self._barrier_encoder.radix, self._food_encoder.radix)
+        state_id = barrier_encode(distance_calc.barrier_up_dist())
+        state_id = state_id * br + barrier_encode(distance_calc.barrier_down_dist())
+        state_id = state_id * br + barrier_encode(distance_calc.barrier_left_dist())
+        state_id = state_id * br + barrier_encode(distance_calc.barrier_right_dist())
         (food_x_with_sign, food_y_with_sign) = distance_calc.food_dist_with_sign()
+        state_id = state_id * fr + food_encode(food_x_with_sign)
+        state_id = state_id * fr + food_encode(food_y_with_sign)
+        return state_id
 
-        dists = [
-            up_dist, down_dist, left_dist, right_dist,
-            food_x_with_sign, food_y_with_sign
-        ]
-
-        state = [ue.encode(dist) for (ue, dist) in zip(self._unit_encoders, dists)]
-        return self._state2id[tuple(state)]
+    def encode_batch(self, features: np.ndarray) -> np.ndarray:
+        """features: int array with shape (n, 6), each row is the distances of
+            [barrier up, barrier down, barrier left, barrier right, food x with sign, food y with sign]
+        see `BatchSnakeStateMachine.dist_features`
+        """
+        features = np.asarray(features)
+        barrier_ids = self._barrier_encoder.encode_batch(features[:, :4])
+        food_ids = self._food_encoder.encode_batch(features[:, 4:])
+        return barrier_ids @ self._place_values[:4] + food_ids @ self._place_values[4:]
 
     def readable_state(self, state_id: int) -> list:
-        state = self._id2state[state_id]
+        state = common.mixed_radix_decode(state_id, self._radices)
         state = [e.readable_state(s)[0] for (e, s) in zip(self._unit_encoders, state)]
         return state
 
     @property
-    def ids(self):
-        return self._state2id.values()
+    def radix(self) -> int:
+        return self._radix
@@ -14,6 +14,19 @@ class EncoderBase(object):
     def readable_state(self, state_id: int) -> list:
         raise NotImplementedError("impl readable_state")
 
+    def encode_batch(self, features):
+        """encode a batch from numpy arrays, the features depend on the encoder.
+        Returns
+        --------
+        int array of the state ids
+        """
+        raise NotImplementedError("impl encode_batch")
+
+    @property
+    def radix(self) -> int:
+        """number of states"""
+        raise NotImplementedError("impl radix")
+
     @property
     def ids(self):
-        raise NotImplementedError("impl ids")
\ No newline at end of file
+        return range(self.radix)
\ No newline at end of file
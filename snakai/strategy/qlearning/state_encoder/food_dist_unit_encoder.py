@@ -3,6 +3,8 @@
 """
 import enum
 
+import numpy as np
+
 from .encoder_base import EncoderBase
 
 
@@ -13,23 +15,23 @@ class FoodDistState(enum.Enum):
 
 
 class FoodDistUnitEncoder(EncoderBase):
-    """food distance unit encoder"""
-    def __init__(self):
-        self._states = [s.value for s in FoodDistState]
-        self._state2id = {_s:_i for (_i, _s) in enumerate(self._states)}
+    """food distance unit encoder
+    state id is the index in `FoodDistState`: 0 -> 0, positive -> 1, negative -> 2
+    """
+    _STATES = tuple(s.value for s in FoodDistState)
 
-    def encode(self, dist: int) -> str:
+    def encode(self, dist: int) -> int:
         if dist == 0:
-            s = FoodDistState.ZERO.value
-        elif dist > 0:
-            s = FoodDistState.POSITIVE.value
-        else:
-            s = FoodDistState.NEGATIVE.value
-        return self._state2id[s]
+            return 0
+        return 1 if dist > 0 else 2
+
+    def encode_batch(self, features: np.ndarray) -> np.ndarray:
+        """features: dist (with sign) array"""
+        return np.where(features > 0, 1, np.where(features < 0, 2, 0))
 
     def readable_state(self, state_id) -> list:
-        return [self._states[state_id]]
+        return [self._STATES[state_id]]
 
     @property
-    def ids(self):
-        return self._state2id.values()
+    def radix(self) -> int:
+        return len(self._STATES)
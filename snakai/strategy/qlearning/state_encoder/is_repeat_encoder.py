@@ -2,6 +2,8 @@
 """Is snake repeat it's path
 """
 
+import numpy as np
+
 from .encoder_base import EncoderBase
 from snakai.snake_state_machine import SnakeStateMachine
 
@@ -11,7 +13,6 @@ class IsRepeatEncoder(EncoderBase):
         self._previous_score = -1
         self._head_history_pos = set()
         self._states = [False, True]
-        self._state2id = {_s: _i for (_i, _s) in enumerate(self._states)}
 
     def encode(self, game_state: SnakeStateMachine) -> int:
         cur_score = game_state.score
@@ -21,7 +22,11 @@ class IsRepeatEncoder(EncoderBase):
         is_repeat = game_state.head in self._head_history_pos
         if not is_repeat:
             self._head_history_pos.add(game_state.head)
-        return self._state2id[is_repeat]
+        return int(is_repeat)
+
+    def encode_batch(self, features: np.ndarray) -> np.ndarray:
+        """features: is-repeat bool array"""
+        return features.astype(np.int64)
 
     def clear(self):
         self._previous_score = -1
@@ -33,5 +38,5 @@ class IsRepeatEncoder(EncoderBase):
         return [state_str,]
 
     @property
-    def ids(self):
-        return self._state2id.values()
+    def radix(self) -> int:
+        return len(self._states)
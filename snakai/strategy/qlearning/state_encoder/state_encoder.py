@@ -5,8 +5,9 @@ from GameState to index
 import logging
 import itertools
 
+import numpy as np
+
 from snakai import snake_state_machine as ssm
-from snakai import snake_state_machine_util as ssm_util
 
 from . import common
 from .encoder_base import EncoderBase
@@ -20,38 +21,64 @@ logger = logging.getLogger("snakai")
 class StateEncoder(EncoderBase):
     """defines State encoder.
     from a game-state to QLearning state (index represented)
+    the state id is the mixed-radix number of each encoder's state (first encoder is the most significant),
+    so no need to enumerate all the states.
     """
     def __init__(self):
         self._encoders = [
             DistEncoder(), 
             # DirectionEncoder(), 
             IsRepeatEncoder()]
-        self._id2state = common.build_all_states(self._encoders)
-        self._state2id = {_s: _i for (_i, _s) in enumerate(self._id2state)}
+        self._radices = [e.radix for e in self._encoders]
+        self._size = int(np.prod(self._radices))
 
     def encode(self, game_state: ssm.SnakeStateMachine) -> int:
         """from game-state to index (0 based)
-        1. game-state -> inner state
-        2. inner state -> id
         """
-        state = [e.encode(game_state) for e in self._encoders]
-        return self._state2id[tuple(state)]
+        state_id = 0
+        for (e, r) in zip(self._encoders, self._radices):
+            state_id = state_id * r + e.encode(game_state)
+        return state_id
+
+    def encode_batch(self, features) -> np.ndarray:
+        """encode a batch.
+        features: list, the i-th is the batch features of the i-th encoder
+            (see `encode_batch` of each encoder)
+        """
+        state_ids = None
+        for (e, r, f) in zip(self._encoders, self._radices, features):
+            ids = e.encode_batch(f).astype(np.int64, copy=False)
+            state_ids = ids if state_ids is None else state_ids * r + ids
+        return state_ids
 
     def readable_state(self, state_id) -> list:
-        state = self._id2state[state_id]
+        state = common.mixed_radix_decode(state_id, self._radices)
         decodes = [e.readable_state(s) for (e, s) in zip(self._encoders, state)]
         return itertools.chain(*decodes)
 
+    def __getstate__(self):
+        # encoders have no learned data, rebuild them when loading,
+        # so models pickled with older encoder implementations still work
+        return {}
+
+    def __setstate__(self, _):
+        self.__init__()
+
     def clear(self):
         for e in self._encoders:
             e.clear()
 
     @property
-    def ids(self):
-        return self._state2id.values()
+    def radix(self) -> int:
+        return self._size
+
+    @property
+    def radices(self) -> list:
+        """radix of each encoder"""
+        return self._radices
 
     @property
     def size(self):
         """get size
         """
-        return len(self._id2state)
+        return self._size
\ No newline at end of file
@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+"""test (pytest)
+"""
+import itertools
+
+import numpy as np
+
+from snakai import batch_snake_state_machine as bssm
+from . import common
+from .state_encoder import StateEncoder
+from .dist_encoder import DistEncoder
+
+
+def test_mixed_radix_order():
+    radices = [4, 3, 2]
+    # same order as enumerating all the combinations
+    for (expected_id, digits) in enumerate(itertools.product(*(range(r) for r in radices))):
+        assert common.mixed_radix_encode(digits, radices) == expected_id
+        assert common.mixed_radix_decode(expected_id, radices) == list(digits)
+    assert StateEncoder().size == 4 ** 4 * 3 ** 2 * 2
+
+
+def test_encode_batch_same_as_scalar():
+    batch_state = bssm.BatchSnakeStateMachine(64, width=12, height=10, seed=1)
+    batch_state.new_state()
+    encoder = DistEncoder()
+    rng = np.random.default_rng(2)
+    for _ in range(50):
+        features = batch_state.dist_features()
+        ids = encoder.encode_batch(features)
+        for i in range(batch_state.batch_size):
+            assert ids[i] == encoder.encode(batch_state.to_state_machine(i))
+        batch_state.update_state(rng.integers(0, 5, size=batch_state.batch_size))
+
+    state_encoder = StateEncoder()
+    is_repeat = rng.integers(0, 2, size=batch_state.batch_size).astype(bool)
+    state_ids = state_encoder.encode_batch([batch_state.dist_features(), is_repeat])
+    assert np.array_equal(state_ids, encoder.encode_batch(batch_state.dist_features()) * 2 + is_repeat)
@@ -13,7 +13,11 @@ import numpy as np
 from . import action_encoder
 from . import state_encoder
 from . import qtable as qtable_module
+from . import sparse_qtable as sparse_qtable_module
 from . import reward as reward_module
+from . import replay_buffer as replay_buffer_module
+from . import training_stats as training_stats_module
+from . import model_io
 from .. import base as strategy_base
 from .. import register
 from ... import snake_state_machine as ssm
@@ -21,6 +25,19 @@ from ... import snake_state_machine as ssm
 
 logger = logging.getLogger("snakai")
 
+# size of the pre-generated random block for the fused step
+_RANDOM_BLOCK_SIZE = 4096
+
+# effective direction value -> ids of the valid actions, for the batched training
+_VALID_ACTION_IDS = np.array([action_encoder.ActionEncoder.valid_ids(d) for d in range(ssm.Direction.NONE)],
+    dtype=np.int64)
+
+# name -> Q table class
+_QTABLE_BACKENDS = {
+    "dense": qtable_module.QTable,
+    "sparse": sparse_qtable_module.SparseQTable,
+}
+
 @register("qlearning")
 class QLearningStrategy(strategy_base.Strategy):
     """Q-Learning strategy
@@ -31,25 +48,36 @@ class QLearningStrategy(strategy_base.Strategy):
     def __init__(self, 
             is_infer: bool, 
             train_args: typing.Optional[argparse.Namespace], 
-            infer_args: typing.Optional[argparse.Namespace]):
+            infer_args: typing.Optional[argparse.Namespace],
+            qtable: typing.Optional[qtable_module.QTable] = None):
         """init strategy.
+        qtable: train on this Q table instead of a new one (e.g. the shared table of hogwild)
         """
 
         if is_infer:
             model_path = infer_args.model_path
             if not model_path:
-                model_path = pathlib.Path(__file__).absolute().parent / "output/ql_strategy.pickle"
-            with open(model_path, mode="rb") as mf:
-                loaded_obj = pickle.load(mf)
-                self.__dict__.clear()
-                self.__dict__.update(loaded_obj.__dict__)
+                output_dir = pathlib.Path(__file__).absolute().parent / "output"
+                # prefer the memmap model
+                model_path = output_dir / "ql_strategy.qtable"
+                if not model_path.exists():
+                    model_path = output_dir / "ql_strategy.pickle"
+            if model_io.is_model_file(model_path):
+                self._init_from_model(model_path)
+            else:
+                with open(model_path, mode="rb") as mf:
+                    loaded_obj = pickle.load(mf)
+                    self.__dict__.clear()
+                    self.__dict__.update(loaded_obj.__dict__)
             # clear training state to avoid affect infer
             self.clear4next(None)
         else:
             self._state_encoder = state_encoder.StateEncoder()
             self._action_encoder = action_encoder.ActionEncoder()
-            self._qtable = qtable_module.QTable(state_size=self._state_encoder.size,
-                action_size=self._action_encoder.size)
+            if qtable is None:
+                qtable_cls = _QTABLE_BACKENDS[train_args.qtable_backend]
+                qtable = qtable_cls(state_size=self._state_encoder.size, action_size=self._action_encoder.size)
+            self._qtable = qtable
 
             self._learning_rate = train_args.learning_rate
             self._discount = train_args.discount
@@ -59,11 +87,45 @@ class QLearningStrategy(strategy_base.Strategy):
             self._exploration_decay_delta = self._exploration_rate / _decay_iter
             self._rng = np.random.RandomState(train_args.seed)
             self._reward_calc = reward_module.NaiveRewardCalc()
+            # experience replay: learn from sampled minibatch instead of the latest transition
+            if train_args.replay_capacity > 0:
+                self._replay_buffer = replay_buffer_module.ReplayBuffer(train_args.replay_capacity,
+                    seed=train_args.seed)
+                self._replay_batch_size = train_args.replay_batch_size
+                self._replay_interval = train_args.replay_interval
+            else:
+                self._replay_buffer = None
+            self._training_stats = training_stats_module.TrainingStats()
 
             self._pre_episode = None
             self._cached_cur_state_idx = None
+            self._init_fused_step()
         self._is_infer = is_infer
 
+    def _init_fused_step(self):
+        """state of `act_and_learn`: previous (state id, action id) and the pre-generated randoms"""
+        self._prev_state_id = -1
+        self._prev_action_id = -1
+        self._random_block = self._rng.random_sample(_RANDOM_BLOCK_SIZE).tolist()
+        self._random_pos = 0
+
+    def _init_from_model(self, model_path):
+        """init infer strategy from the memmap model (see `model_io`)"""
+        self._state_encoder = state_encoder.StateEncoder()
+        self._action_encoder = action_encoder.ActionEncoder()
+        self._qtable = model_io.load_qtable(model_path, self._state_encoder, self._action_encoder)
+        self._exploration_rate = 0.
+        self._exploration_decay_delta = 0.
+        self._rng = None
+        self._reward_calc = reward_module.NaiveRewardCalc()
+        self._replay_buffer = None
+        self._pre_episode = None
+        self._cached_cur_state_idx = None
+
+    def export_model(self, model_path):
+        """save the Q table as the memmap model, for infer"""
+        model_io.save_qtable(model_path, self._qtable.to_dense(), self._state_encoder, self._action_encoder)
+
     def gen_next_action(self, game_state: ssm.SnakeStateMachine, _) -> strategy_base.Action:
         """generating next action according to the game-state
         > will cache the state-id and action. so not thread-safe!
@@ -105,12 +167,20 @@ class QLearningStrategy(strategy_base.Strategy):
         if game_state.is_state_ok():
             # game still running
             new_state_idx = self._state_encoder.encode(game_state)
-
+        else:
+            new_state_idx = None
+        if self._replay_buffer is not None:
+            self._replay_buffer.add(self._pre_episode.state_id, self._pre_episode.action_id, reward,
+                new_state_idx, new_state_idx is None)
+            if self._replay_buffer.added_cnt % self._replay_interval == 0:
+                self.learn_from_replay()
+            self._cached_cur_state_idx = new_state_idx
+            return
+        if new_state_idx is not None:
             action_id = self._qtable.get_action_of_max_score(new_state_idx)
             max_score = self._qtable.get_score(new_state_idx, action_id)
             q_target = reward + self._discount * max_score
         else:
-            new_state_idx = None
             # ended (ignore pause condition)
             q_target = reward
         q_predict = self._qtable.get_score(**self._pre_episode._asdict())
@@ -122,12 +192,157 @@ class QLearningStrategy(strategy_base.Strategy):
                 reward, new_score, self._qtable.table_filling_ratio() * 100)
         self._cached_cur_state_idx = new_state_idx
 
-    def clear4next(self, _):
+    def act_and_learn(self, game_state: ssm.SnakeStateMachine) -> typing.Optional[ssm.Direction]:
+        """fused training step, the same as `update` (for the previous action) + `gen_next_action`,
+        but works on int ids only, and draws the randoms from a pre-generated block.
+        no per-step debug logging.
+        usage:
+            game_state.new_state()
+            d = strategy.act_and_learn(game_state)
+            while d is not None:
+                game_state.update_state(d)
+                d = strategy.act_and_learn(game_state)
+            strategy.clear4next(game_state)
+        Returns
+        ---------
+        the direction of the next action, None if the game has ended (the final transition is learned).
+        """
+        qtable = self._qtable
+        is_ok = game_state.is_state_ok()
+        state_id = self._state_encoder.encode(game_state) if is_ok else -1
+        prev_state_id = self._prev_state_id
+        if prev_state_id >= 0:
+            reward = self._reward_calc.calc(game_state)
+            prev_action_id = self._prev_action_id
+            if self._replay_buffer is not None:
+                self._replay_buffer.add(prev_state_id, prev_action_id, reward, state_id, not is_ok)
+                if self._replay_buffer.added_cnt % self._replay_interval == 0:
+                    self.learn_from_replay()
+            else:
+                if is_ok:
+                    q_target = reward + self._discount * qtable.get_score(state_id,
+                        qtable.get_action_of_max_score(state_id))
+                else:
+                    q_target = reward
+                q_predict = qtable.get_score(prev_state_id, prev_action_id)
+                qtable.update_score(prev_state_id, prev_action_id,
+                    q_predict + self._learning_rate * (q_target - q_predict))
+        if not is_ok:
+            self._prev_state_id = -1
+            return None
+
+        if self._next_random() < self._exploration_rate:
+            valid_ids = self._action_encoder.valid_ids(game_state.direction)
+            action_id = valid_ids[int(self._next_random() * len(valid_ids))]
+        else:
+            action_id = int(qtable.get_action_of_max_score(state_id))
+        self._prev_state_id = state_id
+        self._prev_action_id = action_id
+        return self._action_encoder.decode_direction(action_id)
+
+    def train_episode(self, game_state: ssm.SnakeStateMachine):
+        """play and learn a new game by `act_and_learn`"""
+        game_state.new_state()
+        d = self.act_and_learn(game_state)
+        while d is not None:
+            game_state.update_state(d)
+            d = self.act_and_learn(game_state)
+        self.clear4next(game_state)
+
+    def act_batch(self, state_ids: np.ndarray, directions: np.ndarray) -> np.ndarray:
+        """actions of many games (e.g. `BatchSnakeStateMachine`), the same as `gen_next_action` of each game.
+        Parameters
+        ------------
+        state_ids: (n,) state ids
+        directions: (n,) current direction values
+
+        Returns
+        ---------
+        (n,) action ids
+        """
+        action_ids = self._qtable.actions_of_max_score(state_ids)
+        is_random = self._rng.random_sample(len(action_ids)) < self._exploration_rate
+        random_num = np.count_nonzero(is_random)
+        if random_num:
+            valid_ids = _VALID_ACTION_IDS[directions[is_random]]
+            choices = self._rng.randint(valid_ids.shape[1], size=random_num)
+            action_ids[is_random] = valid_ids[np.arange(random_num), choices]
+        return action_ids
+
+    def learn_batch(self, state_ids, action_ids, rewards, next_state_ids, dones):
+        """learn the transitions of many games, the same as `update` of each game,
+        except that all the deltas are computed from the table before updating (see `QTable.update_batch`).
+        `next_state_ids` of the ended games are ignored.
+        """
+        replay_buffer = self._replay_buffer
+        if replay_buffer is not None:
+            pre_update_num = replay_buffer.added_cnt // self._replay_interval
+            replay_buffer.add_batch(state_ids, action_ids, rewards, next_state_ids, dones)
+            for _ in range(replay_buffer.added_cnt // self._replay_interval - pre_update_num):
+                self.learn_from_replay()
+            return
+        max_scores = self._qtable.max_scores(next_state_ids)
+        q_targets = rewards + self._discount * np.where(dones, 0., max_scores)
+        self._qtable.update_batch(state_ids, action_ids, q_targets, self._learning_rate)
+
+    def add_batch_episodes(self, scores, steps):
+        """record the ended games of the batched training, the same as `clear4next` of each game"""
+        for (score, step_num) in zip(scores, steps):
+            self._training_stats.add_episode(score, step_num)
+            if self._exploration_rate > 0:
+                self._exploration_rate -= self._exploration_decay_delta
+
+    def _next_random(self) -> float:
+        pos = self._random_pos
+        if pos == _RANDOM_BLOCK_SIZE:
+            self._random_block = self._rng.random_sample(_RANDOM_BLOCK_SIZE).tolist()
+            pos = 0
+        self._random_pos = pos + 1
+        return self._random_block[pos]
+
+    def warm_start(self, policy: np.ndarray, score: float = 1.) -> int:
+        """set Q(state, policy[state]) = score for every known state of a compiled lookup policy
+        (state id -> action id, -1 for unknown), so training starts from the policy's actions.
+        Returns
+        ---------
+        number of the warm started states
+        """
+        state_ids = np.flatnonzero(policy >= 0)
+        self._qtable.update_batch(state_ids, policy[state_ids].astype(np.int64),
+            np.full(len(state_ids), score, dtype=np.float32), learning_rate=1.)
+        return len(state_ids)
+
+    def learn_from_replay(self, batch_size: typing.Optional[int] = None):
+        """do one minibatch update from the replay buffer
+        """
+        if batch_size is None:
+            batch_size = self._replay_batch_size
+        (state_ids, action_ids, rewards, next_state_ids, dones) = self._replay_buffer.sample(batch_size)
+        max_scores = self._qtable.max_scores(next_state_ids)
+        q_targets = rewards + self._discount * np.where(dones, 0., max_scores)
+        self._qtable.update_batch(state_ids, action_ids, q_targets, self._learning_rate)
+
+    def __getstate__(self):
+        # replay buffer is training-only data, don't save it with the model
+        state = self.__dict__.copy()
+        state["_replay_buffer"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if not self._is_infer and "_random_block" not in state:
+            # pickled before the fused step
+            self._init_fused_step()
+
+    def clear4next(self, game_state: typing.Optional[ssm.SnakeStateMachine]):
         """clear inner state and ready for next new strategy. 
         here clear inner status
         """
+        if game_state is not None and not self._is_infer:
+            self._training_stats.add_episode(game_state.score, game_state.steps)
         self._pre_episode = None
         self._cached_cur_state_idx = None
+        self._prev_state_id = -1
         self._reward_calc.clear4next()
         if self._exploration_rate > 0:
             self._exploration_rate -= self._exploration_decay_delta
@@ -137,6 +352,11 @@ class QLearningStrategy(strategy_base.Strategy):
         """get table filling ratio"""
         return self._qtable.table_filling_ratio()
 
+    @property
+    def training_stats(self) -> training_stats_module.TrainingStats:
+        """episode statistics of training"""
+        return self._training_stats
+
     def _gen_random_action(self, cur_diction: ssm.Direction) -> strategy_base.Action:
         opposite_d = ssm.DirectionUtil.get_opposite(cur_diction)
         opposite_action = strategy_base.Action.effective_direction2action(opposite_d)
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+"""test (pytest)
+"""
+import argparse
+
+import numpy as np
+
+from . import strategy as strategy_module
+from ... import snake_state_machine as ssm
+
+
+def _new_strategy(exploration_rate, replay_capacity=0):
+    train_args = argparse.Namespace(learning_rate=0.1, discount=0.9, init_exploration_rate=exploration_rate,
+        exploration_decay_iter=10 ** 6, seed=1, replay_capacity=replay_capacity, replay_batch_size=8,
+        replay_interval=4, qtable_backend="dense")
+    return strategy_module.QLearningStrategy(is_infer=False, train_args=train_args, infer_args=None)
+
+
+def test_act_and_learn_same_as_update():
+    # without exploration, the fused step learns the same as gen_next_action + update
+    (fused, unfused) = (_new_strategy(0.), _new_strategy(0.))
+    (fused_state, unfused_state) = (ssm.SnakeStateMachine(10, 10, seed=3), ssm.SnakeStateMachine(10, 10, seed=3))
+    for _ in range(20):
+        fused.train_episode(fused_state)
+        unfused_state.new_state()
+        while unfused_state.is_state_ok():
+            unfused_state.update_state(unfused.gen_next_action(unfused_state, None).to_direction())
+            unfused.update(unfused_state)
+        unfused.clear4next(unfused_state)
+        assert (fused_state.score, fused_state.steps) == (unfused_state.score, unfused_state.steps)
+    assert np.array_equal(fused._qtable.weights, unfused._qtable.weights)
+    assert np.array_equal(fused._qtable.update_cnt, unfused._qtable.update_cnt)
+
+
+def test_act_and_learn_exploration():
+    ql_strategy = _new_strategy(1., replay_capacity=64)
+    state = ssm.SnakeStateMachine(10, 10, seed=3)
+    total_steps = 0
+    for _ in range(50):
+        state.new_state()
+        d = ql_strategy.act_and_learn(state)
+        while d is not None:
+            assert not ssm.DirectionUtil.is_opposite(d, state.direction)
+            state.update_state(d)
+            d = ql_strategy.act_and_learn(state)
+        total_steps += state.steps
+        ql_strategy.clear4next(state)
+    assert ql_strategy._replay_buffer.added_cnt == total_steps
+    assert ql_strategy.table_filling_ratio() > 0
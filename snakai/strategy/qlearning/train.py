@@ -3,12 +3,17 @@
 """train q-learning strategy
 """
 import argparse
+import contextlib
 import logging
 import pathlib
 import pickle
 import tqdm
 
+from snakai.strategy import lookup
 from snakai.strategy.qlearning import strategy
+from snakai.strategy.qlearning import parallel_train
+from snakai.strategy.qlearning import batch_train
+from snakai.strategy.qlearning import checkpoint
 from snakai import snake_state_machine as ssm
 from snakai.curses_game import ui as ui_module
 from snakai.util import logger as logger_module
@@ -16,25 +21,44 @@ from snakai.util import logger as logger_module
 
 logger = logging.getLogger("snakai")
 
+def _init_training(args):
+    """init (or resume from checkpoint) strategy and game state
+    Returns
+    ---------
+    (ql_strategy, state, start_iter)
+    """
+    state = ssm.SnakeStateMachine(width=args.win_width, height=args.win_height)
+    if args.resume:
+        (ql_strategy, start_iter) = checkpoint.load(_checkpoint_path(args), state)
+        logger.info("resume from checkpoint %s, iter %d", _checkpoint_path(args), start_iter)
+    else:
+        ql_strategy = strategy.QLearningStrategy(is_infer=False, train_args=args, infer_args=None)
+        start_iter = 0
+        if args.warm_start_policy:
+            policy = lookup.load_policy(args.warm_start_policy, ql_strategy._state_encoder,
+                ql_strategy._action_encoder)
+            state_num = ql_strategy.warm_start(policy, args.warm_start_score)
+            logger.info("warm start %d states from policy %s", state_num, args.warm_start_policy)
+    return (ql_strategy, state, start_iter)
+
+
+def _checkpoint_path(args):
+    return args.checkpoint_path or f"{args.model_save_path}.ckpt"
+
+
+def _checkpointer(args):
+    if args.checkpoint_iter <= 0 and args.checkpoint_seconds <= 0:
+        return contextlib.nullcontext()
+    pathlib.Path(_checkpoint_path(args)).parent.mkdir(parents=True, exist_ok=True)
+    return checkpoint.Checkpointer(_checkpoint_path(args), interval_iter=args.checkpoint_iter,
+        interval_seconds=args.checkpoint_seconds)
+
+
 def train_without_ui(args):
     """train without ui"""
-    ql_strategy = strategy.QLearningStrategy(is_infer=False, 
-        train_args=args,
-        infer_args=None)
-    
-    state = ssm.SnakeStateMachine(width=args.win_width, height=args.win_height)
-    
-    for train_iter in tqdm.tqdm(range(args.total_iter)):
-        state.new_state()
-        while state.is_state_ok():
-            action = ql_strategy.gen_next_action(state, None)
-            direction = action.to_direction()
-            state.update_state(direction)
-            ql_strategy.update(state)
-        ql_strategy.clear4next(state)
-        if (train_iter + 1) % 500 == 0:
-            logger.info("train iter %d, state score: %d, steps: %d, table-filling ratio: %.2f%%", 
-                train_iter, state.score, state.steps, ql_strategy.table_filling_ratio() * 100)
+    (ql_strategy, state, start_iter) = _init_training(args)
+    with _checkpointer(args) as checkpointer:
+        _train_without_ui(args, ql_strategy, state, start_iter, checkpointer)
     pathlib.Path(args.model_save_path).parent.mkdir(parents=True, exist_ok=True)
     with open(args.model_save_path, mode="wb") as outputf:
         pickle.dump(obj=ql_strategy, file=outputf)
@@ -42,15 +66,38 @@ def train_without_ui(args):
     print(f"table filling ratio: {_ratio:.2%}({_fill_cnt}/{_state_cnt})")
 
 
+def _train_without_ui(args, ql_strategy, state, start_iter, checkpointer):
+    for train_iter in tqdm.tqdm(range(start_iter, args.total_iter), initial=start_iter, total=args.total_iter):
+        ql_strategy.train_episode(state)
+        if (train_iter + 1) % 500 == 0:
+            stats = ql_strategy.training_stats
+            logger.info("train iter %d, state score: %d, steps: %d, avg score: %.2f, avg steps: %.1f, "
+                "max score: %d, table-filling ratio: %.2f%%",
+                train_iter, state.score, state.steps, stats.score.mean, stats.steps.mean, stats.score.max_ever,
+                ql_strategy.table_filling_ratio() * 100)
+        if checkpointer is not None:
+            checkpointer.maybe_save(train_iter + 1, ql_strategy, state)
+
+
 def train_with_ui(args):
     """train Q-Learning with UI monitor
     """
-    ql_strategy = strategy.QLearningStrategy(is_infer=False, train_args=args, infer_args=None)
-    state = ssm.SnakeStateMachine(width=args.win_width, height=args.win_height)
+    (ql_strategy, state, start_iter) = _init_training(args)
     ui = ui_module.SnakeUIFramework(width=args.win_width, height=args.win_height)
     state_render = ui_module.SnakeStateRender(ui)
 
-    for train_iter in range(args.total_iter):
+    with _checkpointer(args) as checkpointer:
+        _train_with_ui(args, ql_strategy, state, start_iter, checkpointer, ui, state_render)
+
+    pathlib.Path(args.model_save_path).parent.mkdir(parents=True, exist_ok=True)
+    with open(args.model_save_path, mode="wb") as outputf:
+        pickle.dump(obj=ql_strategy, file=outputf)
+    (_ratio, _fill_cnt, _state_cnt) = ql_strategy._qtable.table_filling_ratio(return_detail=True)
+    print(f"table filling ratio: {_ratio:.2%}({_fill_cnt}/{_state_cnt})")
+
+
+def _train_with_ui(args, ql_strategy, state, start_iter, checkpointer, ui, state_render):
+    for train_iter in range(start_iter, args.total_iter):
         logger.info("iter: %s", train_iter)
         with ui.active_env():
             ui.init_window()
@@ -66,12 +113,8 @@ def train_with_ui(args):
                 # time.sleep(0.001)
             ql_strategy.clear4next(state)
             logger.info("state score: %d, steps: %d", state.score, state.steps)
-    
-    pathlib.Path(args.model_save_path).parent.mkdir(parents=True, exist_ok=True)
-    with open(args.model_save_path, mode="wb") as outputf:
-        pickle.dump(obj=ql_strategy, file=outputf)
-    (_ratio, _fill_cnt, _state_cnt) = ql_strategy._qtable.table_filling_ratio(return_detail=True)
-    print(f"table filling ratio: {_ratio:.2%}({_fill_cnt}/{_state_cnt})")
+        if checkpointer is not None:
+            checkpointer.maybe_save(train_iter + 1, ql_strategy, state)
 
 def main():
     """main process for train"""
@@ -85,15 +128,58 @@ def main():
     parser.add_argument("--exploration_decay_iter", "-edi", type=int, 
         help="how many iterations after exploration decay to zero", default=20)
     parser.add_argument("--seed", type=int, help="random seed", default=1234)
+    parser.add_argument("--replay_capacity", type=int, default=0,
+        help="experience replay buffer capacity, 0 means disable experience replay")
+    parser.add_argument("--replay_batch_size", type=int, help="minibatch size of experience replay", default=256)
+    parser.add_argument("--replay_interval", type=int, default=64,
+        help="do one minibatch update every `replay_interval` steps")
+    parser.add_argument("--warm_start_policy",
+        help="compiled lookup policy (see `snakai.strategy.lookup_compile`) to warm start the Q table")
+    parser.add_argument("--warm_start_score", type=float, default=1.,
+        help="initial score of the policy's action in each known state")
     parser.add_argument("--total_iter", "-ti", type=int, help="training iterations", default=20)
+    parser.add_argument("--qtable_backend", choices=["dense", "sparse"], default="dense",
+        help="Q table storage. sparse only allocates the visited states (not supported by parallel training)")
+    parser.add_argument("--workers", type=int, default=1,
+        help="training processes, > 1 means parallel training (without ui)")
+    parser.add_argument("--sync_interval", type=int, default=100,
+        help="games each worker plays between Q table synchronizations in parallel training")
+    parser.add_argument("--hogwild", action="store_true",
+        help="in parallel training, workers update one shared Q table asynchronously instead of syncing")
+    parser.add_argument("--batch_games", type=int, default=1,
+        help="games played together in one batched state machine, > 1 means batched training (without ui)")
+    parser.add_argument("--checkpoint_path", help="checkpoint path, default is `{model_save_path}.ckpt`")
+    parser.add_argument("--checkpoint_iter", type=int, default=0,
+        help="save checkpoint every N iterations, 0 means disable")
+    parser.add_argument("--checkpoint_seconds", type=float, default=0.,
+        help="save checkpoint every T seconds, 0 means disable")
+    parser.add_argument("--resume", action="store_true", help="resume training from the checkpoint")
     parser.add_argument("--without_ui", action="store_true", help="whether diable ui")
     parser.add_argument("--model_save_path", "-o", help="where to save model", required=True)
     parser.add_argument("--log_level", help="log level", choices=["warning", "info", "debug"], default="debug")
     args = parser.parse_args()
+    if (args.workers > 1 or args.hogwild) and args.qtable_backend != "dense":
+        parser.error("parallel training (and hogwild) only supports the dense Q table")
+    if args.workers > 1 and (args.resume or args.checkpoint_iter > 0 or args.checkpoint_seconds > 0):
+        parser.error("checkpoint is not supported in parallel training")
+    if args.workers > 1 and args.warm_start_policy:
+        parser.error("warm start is not supported in parallel training")
+    if args.batch_games > 1 and args.workers > 1:
+        parser.error("batched training can't be combined with parallel training")
+    if args.batch_games > 1 and (args.resume or args.checkpoint_iter > 0 or args.checkpoint_seconds > 0):
+        parser.error("checkpoint is not supported in batched training")
+    if args.batch_games > 1 and args.warm_start_policy:
+        parser.error("warm start is not supported in batched training")
 
     logger_module.init_logger(name="snakai", fpath="/dev/shm/snakai_train_log.log", level=args.log_level.upper())
 
-    if args.without_ui:
+    if args.workers > 1 and args.hogwild:
+        parallel_train.train_hogwild(args)
+    elif args.workers > 1:
+        parallel_train.train_parallel(args)
+    elif args.batch_games > 1:
+        batch_train.train_batch(args)
+    elif args.without_ui:
         train_without_ui(args)
     else:
         train_with_ui(args)
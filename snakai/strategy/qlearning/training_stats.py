@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""training statistics
+all the statistics are maintained incrementally, so querying is O(1)
+and it's cheap to keep them on during long runs.
+"""
+import numpy as np
+
+
+class RollingWindow(object):
+    """rolling window of the latest `size` values, with running sum
+    """
+    def __init__(self, size: int):
+        if size <= 0:
+            raise ValueError(f"window size should be > 0, got {size}")
+        self._values = np.zeros(size, dtype=np.float64)
+        self._pos = 0
+        self._cnt = 0
+        self._sum = 0.
+        self._max = float("-inf")
+
+    def add(self, v):
+        """add a value, drop the oldest one if full"""
+        size = len(self._values)
+        if self._cnt == size:
+            self._sum -= self._values[self._pos]
+        else:
+            self._cnt += 1
+        self._values[self._pos] = v
+        self._sum += v
+        self._pos = (self._pos + 1) % size
+        if v > self._max:
+            self._max = v
+
+    def __len__(self):
+        return self._cnt
+
+    @property
+    def mean(self) -> float:
+        """mean of the values in window, 0 if empty"""
+        return self._sum / self._cnt if self._cnt else 0.
+
+    @property
+    def last(self):
+        """the latest value, None if empty"""
+        return self._values[self._pos - 1] if self._cnt else None
+
+    @property
+    def max_ever(self) -> float:
+        """max of all the added values (not only in window)"""
+        return self._max
+
+
+class TrainingStats(object):
+    """episode statistics of training
+    """
+    def __init__(self, window_size: int = 500):
+        self.episode_cnt = 0
+        self.total_steps = 0
+        self.score = RollingWindow(window_size)
+        self.steps = RollingWindow(window_size)
+
+    def add_episode(self, score: int, steps: int):
+        """record an ended episode"""
+        self.episode_cnt += 1
+        self.total_steps += steps
+        self.score.add(score)
+        self.steps.add(steps)
@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 """rule-based strategy
 """
-import collections
+import bisect
 import math
 
 from . import base
@@ -9,10 +9,21 @@ from . import register
 from .. import snake_state_machine as ssm
 
 
+_EFFECTIVE_DIRECTIONS = (ssm.Direction.LEFT, ssm.Direction.RIGHT, ssm.Direction.UP, ssm.Direction.DOWN)
+# direction value -> (dx, dy)
+_DIRECTION2OFFSET = ((-1, 0), (1, 0), (0, -1), (0, 1))
+
+
 @register("rule_based")
 class RuleBased(base.Strategy):
     """rule based strategy
     """
+    def __init__(self, lookahead=3):
+        """lookahead: steps to look forward in the danger-space scoring"""
+        if lookahead < 1:
+            raise ValueError(f"lookahead should be >= 1, got {lookahead}")
+        self._lookahead = lookahead
+
     def gen_next_action(self, game_state, _) -> base.Action:
         """gen next action according to current game-state
         """
@@ -36,21 +47,18 @@ class RuleBased(base.Strategy):
         """generating valid action
         """
         # 1. exclude reverse-direction action
-        d = game_state.direction
-        opposite_d = ssm.DirectionUtil.get_opposite(d)
-        exclude_oppo_dirs = ssm.DirectionUtil.get_effective() - {opposite_d,}
+        opposite_d = ssm.DirectionUtil.get_opposite(game_state.direction)
         
-        # 2. exclude immediately collision direction
-        def _will_collide(point):
-            # 1. window boder
-            if point.x in [-1, game_state.state_width] or point.y in [-1, game_state.state_height]:
-                return True
-            # 2. snake body
-            return game_state.is_outer_point_collide2snake(point)
-        
-        snake_head = game_state.snake[0]
-        exclude_collide_dirs = [d for d in exclude_oppo_dirs 
-            if not _will_collide(ssm.gen_next_step_point(snake_head, d))]
+        # 2. exclude immediately collision direction (window border or snake body)
+        neighbors = game_state.neighbors
+        head_base = game_state.head_cell * 4
+        exclude_collide_dirs = []
+        for d in _EFFECTIVE_DIRECTIONS:
+            if d == opposite_d:
+                continue
+            next_cell = neighbors[head_base + d]
+            if next_cell >= 0 and not game_state.is_cell_collide2snake(next_cell):
+                exclude_collide_dirs.append(d)
         return exclude_collide_dirs
 
     def _score_based_on_danger_space(self, game_state, valid_dirs) -> dict:
@@ -58,89 +66,31 @@ class RuleBased(base.Strategy):
         what is danger-space?
         - will cause collision in future k steps following the same direction
         - collision only consider to the snake body.
+        look-forward `lookahead` steps along the direction: score each point by the nearest body in the other
+        directions, and average them (divided by `lookahead`). stop at the wall or the body,
+        each step not taken is scored as a collision at the blocked distance, so a blocked direction is not safer.
+        the nearest body is a bisect query on the row/column body index kept by the state machine.
         """
-        def _create_snake_body_axis_index():
-            x2ys = collections.defaultdict(list)
-            y2xs = collections.defaultdict(list)
-            for point in game_state.snake:
-                x2ys[point.x].append(point.y)
-                y2xs[point.y].append(point.x)
-            x2ys = {x: sorted(ys) for (x, ys) in x2ys.items()}
-            y2xs = {y: sorted(xs) for (y, xs) in y2xs.items()}
-            return (x2ys, y2xs)
-
-        def _score(step2collision: int) -> float:
-            """score will be in range [-1, 0]. the closer to collision, the smaller score.
-            """
-            # because we have skiped the immediately collision direction.
-            assert step2collision > 0
-            if step2collision == math.inf:
-                return 0
-            return - 1 / step2collision
-
-        def _score_direction(d, snake_x2ys, snake_y2xs):
-            head = game_state.snake[0]
-            # look-foward 1 step: first go 1 step according to the direction, then check the collision.
-            # when infer score, we ignore the snake body changing after the step
-            next_step_point = ssm.gen_next_step_point(head, d)
-            # after move 1 step, test which direction would has collision. don't test opposite position.
-            test_dirs = ssm.DirectionUtil.get_effective() - {d,}
-            score = 0.
-            x, y = next_step_point.x, next_step_point.y
-            for direction in test_dirs:
-                if direction == ssm.Direction.LEFT:
-                    if y not in snake_y2xs:
-                        step2collision = math.inf
-                        continue
-                    xs = snake_y2xs[y]
-                    # TODO: can be optimized to use bisect
-                    xs = [_x for _x in xs if _x < x]
-                    if not xs:
-                        step2collision = math.inf
-                        continue
-                    # we have forward 1 step in direction, so should plus 1 if test direction == direction
-                    step2collision = x - max(xs) + (d == direction)
-                elif direction == ssm.Direction.RIGHT:
-                    if y not in snake_y2xs:
-                        step2collision = math.inf
-                        continue
-                    xs = snake_y2xs[y]
-                    xs = [_x for _x in xs if _x > x]
-                    if not xs:
-                        step2collision = math.inf
-                        continue
-                    step2collision = min(xs) - x + (d == direction)
-                elif direction == ssm.Direction.UP:
-                    if x not in snake_x2ys:
-                        step2collision = math.inf
-                        continue
-                    ys = snake_x2ys[x]
-                    ys = [_y for _y in ys if _y < y]
-                    if not ys:
-                        step2collision = math.inf
-                        continue
-                    step2collision = y - max(ys) + (d == direction)
-                elif direction == ssm.Direction.DOWN:
-                    if x not in snake_x2ys:
-                        step2collision = math.inf
-                        continue
-                    ys = snake_x2ys[x]
-                    ys = [_y for _y in ys if _y > y]
-                    if not ys:
-                        step2collision = math.inf
-                        continue
-                    step2collision = min(ys) - y + (d == direction)
-                else:
-                    raise ValueError(f"not effective direction: [{direction}], something error")
-                score += _score(step2collision)
-            return score
-
-        (x2ys, y2xs) = _create_snake_body_axis_index()
+        (head_y, head_x) = divmod(game_state.head_cell, game_state.state_width)
+        neighbors = game_state.neighbors
         dir2scores = {}
         for direction in valid_dirs:
-            score = _score_direction(direction, x2ys, y2xs)
-            dir2scores[direction] = score
-
+            # when infer score, we ignore the snake body changing after the step.
+            # after move, test which direction would has collision. don't test the moving direction.
+            test_dirs = [d for d in _EFFECTIVE_DIRECTIONS if d != direction]
+            (dx, dy) = _DIRECTION2OFFSET[direction]
+            cell = game_state.head_cell
+            score = 0.
+            for step in range(1, self._lookahead + 1):
+                cell = neighbors[cell * 4 + direction]
+                if cell < 0 or game_state.is_cell_collide2snake(cell):
+                    # each step not taken is a collision at the blocked distance
+                    score += (self._lookahead - step + 1) * _score(step)
+                    break
+                (x, y) = (head_x + dx * step, head_y + dy * step)
+                for test_dir in test_dirs:
+                    score += _score(_step2collision(game_state, x, y, test_dir))
+            dir2scores[direction] = score / self._lookahead
         return dir2scores
 
     def _score_based_on_food(self, game_state, valid_dirs) -> dict:
@@ -182,6 +132,37 @@ class RuleBased(base.Strategy):
         return dir2score
 
 
+def _score(step2collision) -> float:
+    """score will be in range [-1, 0]. the closer to collision, the smaller score.
+    """
+    # because we only test from the free points.
+    assert step2collision > 0
+    if step2collision == math.inf:
+        return 0
+    return - 1 / step2collision
+
+
+def _step2collision(game_state, x, y, direction):
+    """steps from (x, y) to the nearest body in the direction, inf if no body"""
+    if direction == ssm.Direction.LEFT:
+        xs = game_state.row_body_xs(y)
+        idx = bisect.bisect_left(xs, x) - 1
+        return x - xs[idx] if idx >= 0 else math.inf
+    if direction == ssm.Direction.RIGHT:
+        xs = game_state.row_body_xs(y)
+        idx = bisect.bisect_right(xs, x)
+        return xs[idx] - x if idx < len(xs) else math.inf
+    if direction == ssm.Direction.UP:
+        ys = game_state.col_body_ys(x)
+        idx = bisect.bisect_left(ys, y) - 1
+        return y - ys[idx] if idx >= 0 else math.inf
+    if direction == ssm.Direction.DOWN:
+        ys = game_state.col_body_ys(x)
+        idx = bisect.bisect_right(ys, y)
+        return ys[idx] - y if idx < len(ys) else math.inf
+    raise ValueError(f"not effective direction: [{direction}], something error")
+
+
 def _combine_scores(*args):
     result = {}
     for d in args:
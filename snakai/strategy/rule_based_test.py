@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""test (pytest)
+"""
+import math
+import random
+
+from . import base
+from . import rule_based
+from .. import snake_state_machine as ssm
+
+
+def _brute_force_danger_scores(game_state, valid_dirs, lookahead):
+    """walk from every point to find the nearest collision"""
+    body = [game_state.cell2point(c) for c in game_state.body_cells()]
+    (w, h) = (game_state.state_width, game_state.state_height)
+    dir2scores = {}
+    for direction in valid_dirs:
+        p = game_state.head
+        score = 0.
+        blocked_step = 0
+        for step in range(1, lookahead + 1):
+            p = ssm.gen_next_step_point(p, direction)
+            if not blocked_step and (not (0 <= p.x < w and 0 <= p.y < h) or p in body):
+                blocked_step = step
+            if blocked_step:
+                score -= 1 / blocked_step
+                continue
+            for test_dir in ssm.DirectionUtil.get_effective() - {direction}:
+                # walk until the body (ignore the wall)
+                (q, step2collision) = (p, 0)
+                while 0 <= q.x < w and 0 <= q.y < h:
+                    (q, step2collision) = (ssm.gen_next_step_point(q, test_dir), step2collision + 1)
+                    if q in body:
+                        score -= 1 / step2collision
+                        break
+        dir2scores[direction] = score / lookahead
+    return dir2scores
+
+
+def test_danger_scores_same_as_brute_force():
+    rng = random.Random(1)
+    for lookahead in (1, 3):
+        strategy = rule_based.RuleBased(lookahead=lookahead)
+        state = ssm.SnakeStateMachine(15, 12, seed=2)
+        for _ in range(5):
+            state.new_state()
+            while state.is_state_ok():
+                valid_dirs = strategy._get_valid_directions(state)
+                scores = strategy._score_based_on_danger_space(state, valid_dirs)
+                expect = _brute_force_danger_scores(state, valid_dirs, lookahead)
+                assert scores.keys() == expect.keys()
+                assert all(math.isclose(scores[d], expect[d]) for d in scores)
+                action = strategy.gen_next_action(state, None)
+                if rng.random() < 0.2:
+                    action = base.Action.effective_direction2action(ssm.Direction(rng.randrange(4)))
+                state.update_state(ssm.Direction.NONE if action == base.Action.IDLE else action.to_direction())
+
+
+def test_blocked_direction_loses():
+    state = ssm.SnakeStateMachine(15, 12, seed=1)
+    state.new_state()
+    rng_state = state.export_frame()[-1]
+    # head at (13, 6) moving right: the wall is 2 steps ahead, up is open and closer to the food
+    body = [6 * 15 + 13, 6 * 15 + 12, 6 * 15 + 11]
+    state.load_frame((0, 0, 100, int(ssm.Direction.RIGHT), ssm.SnakeStateMachine.InnerStatus.RUNNING,
+        0 * 15 + 14, body, rng_state))
+    strategy = rule_based.RuleBased(lookahead=3)
+    valid_dirs = strategy._get_valid_directions(state)
+    scores = strategy._score_based_on_danger_space(state, valid_dirs)
+    assert scores[ssm.Direction.RIGHT] < min(scores[ssm.Direction.UP], scores[ssm.Direction.DOWN])
+    assert strategy.gen_next_action(state, None) == base.Action.MOVE_UP